@@ -0,0 +1,107 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: bert_tokenizer_benchmark.py
+# time: 5:02 下午
+
+import random
+import string
+import time
+import unicodedata
+from typing import List
+
+from kashgari.tokenizers import BertTokenizer
+
+
+class LegacyBertTokenizer(BertTokenizer):
+    """
+    String slicing word piece and per-character unicodedata calls, kept for comparison.
+    """
+
+    def _tokenize(self, text: str, word_cache: dict = None) -> List[str]:
+        if not self._cased:
+            text = unicodedata.normalize('NFD', text)
+            text = ''.join([ch for ch in text if unicodedata.category(ch) != 'Mn'])
+            text = text.lower()
+        spaced = ''
+        for ch in text:
+            if self._is_punctuation(ch) or self._is_cjk_character(ch):
+                spaced += ' ' + ch + ' '
+            elif self._is_space(ch):
+                spaced += ' '
+            elif ord(ch) == 0 or ord(ch) == 0xfffd or self._is_control(ch):
+                continue
+            else:
+                spaced += ch
+
+        if len(self._token_dict) > 0:
+            tokens = []
+            for word in spaced.strip().split():
+                tokens += self._word_piece_tokenize(word)
+            return tokens
+        else:
+            return spaced.strip().split()
+
+    def _word_piece_tokenize(self, word: str) -> List[str]:
+        if word in self._token_dict:
+            return [word]
+        tokens = []
+        start, stop = 0, 0
+        while start < len(word):
+            stop = len(word)
+            while stop > start:
+                sub = word[start:stop]
+                if start > 0:
+                    sub = '##' + sub
+                if sub in self._token_dict:
+                    break
+                stop -= 1
+            if start == stop:
+                stop += 1
+            tokens.append(sub)
+            start = stop
+        return tokens
+
+
+def run_benchmark(text_count: int = 20000) -> None:
+    random.seed(42)
+    letters = string.ascii_lowercase
+    vocab = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + list(string.punctuation)
+    vocab += [chr(0x4e00 + i) for i in range(5000)]
+    for _ in range(25000):
+        piece = ''.join(random.choice(letters) for _ in range(random.randint(1, 8)))
+        vocab.append(piece if random.random() < 0.5 else '##' + piece)
+    token_dict = dict((token, index) for index, token in enumerate(dict.fromkeys(vocab)))
+
+    words = [''.join(random.choice(letters) for _ in range(random.randint(2, 16))) for _ in range(5000)]
+    texts = []
+    for _ in range(text_count):
+        text = ' '.join(random.choice(words).capitalize() for _ in range(random.randint(5, 30)))
+        texts.append(text + ', ' + ''.join(chr(0x4e00 + random.randint(0, 5000)) for _ in range(10)) + '.')
+
+    legacy = LegacyBertTokenizer(token_dict=token_dict)
+    tokenizer = BertTokenizer(token_dict=token_dict)
+
+    start = time.perf_counter()
+    legacy_tokens = [legacy.tokenize(text) for text in texts]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tokens = [tokenizer.tokenize(text) for text in texts]
+    tokenize_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_tokens = tokenizer.tokenize_batch(texts)
+    batch_time = time.perf_counter() - start
+
+    assert tokens == legacy_tokens and batch_tokens == legacy_tokens
+    print(f'legacy         : {text_count / legacy_time:.0f} texts/sec')
+    print(f'tokenize       : {text_count / tokenize_time:.0f} texts/sec ({legacy_time / tokenize_time:.1f}x)')
+    print(f'tokenize_batch : {text_count / batch_time:.0f} texts/sec ({legacy_time / batch_time:.1f}x)')
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,68 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: crf_decode_benchmark.py
+# time: 3:40 下午
+
+import random
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from kashgari.tasks.labeling import BiLSTM_CRF_Model
+from kashgari.utils import viterbi_decode
+
+
+def legacy_predict(model: BiLSTM_CRF_Model, x_data: List[List[str]], batch_size: int) -> List[List[str]]:
+    """
+    Labeling predict before the viterbi decoding, argmax of the crf emission scores, kept for comparison.
+    """
+    tensor = model.text_processor.transform(x_data, max_position=model.embedding.max_position)
+    pred = model.tf_model.predict(tensor, batch_size=batch_size, verbose=0)
+    pred = pred.argmax(-1)
+    lengths = [len(sen) for sen in x_data]
+    return model.label_processor.inverse_transform(pred, lengths=lengths)
+
+
+def best_time(func: Callable[[], None], repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_benchmark(seq_length: int = 64, tag_count: int = 15) -> None:
+    random.seed(42)
+    words = [chr(0x4e00 + i) for i in range(500)]
+    tags = [f'B-{i}' for i in range(tag_count // 2)] + [f'I-{i}' for i in range(tag_count // 2)] + ['O']
+    x = [[random.choice(words) for _ in range(random.randint(5, seq_length - 2))] for _ in range(2000)]
+    y = [[random.choice(tags) for _ in sen] for sen in x]
+
+    model = BiLSTM_CRF_Model(sequence_length=seq_length)
+    model.build_model(x, y)
+    transitions = model.layer_crf.trans.numpy()
+
+    print(f"{'batch size':>10s} | {'argmax decode':>14s} | {'viterbi decode':>14s} | "
+          f"{'legacy predict':>14s} | {'viterbi predict':>15s}")
+    for batch_size in [1, 8, 32, 128, 512]:
+        x_batch = x[:batch_size]
+        emissions = np.random.randn(batch_size, seq_length, transitions.shape[0]).astype(np.float32)
+        lengths = [len(sen) + 2 for sen in x_batch]
+
+        argmax_time = best_time(lambda: emissions.argmax(-1))
+        viterbi_time = best_time(lambda: viterbi_decode(emissions, transitions, lengths))
+        legacy_time = best_time(lambda: legacy_predict(model, x_batch, batch_size))
+        predict_time = best_time(lambda: model.predict(x_batch, batch_size=batch_size,
+                                                       predict_kwargs={'verbose': 0}))
+        print(f'{batch_size:10d} | {argmax_time * 1000:12.3f}ms | {viterbi_time * 1000:12.3f}ms | '
+              f'{legacy_time * 1000:12.1f}ms | {predict_time * 1000:13.1f}ms')
+
+
+if __name__ == "__main__":
+    run_benchmark()
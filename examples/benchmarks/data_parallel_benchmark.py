@@ -0,0 +1,64 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: data_parallel_benchmark.py
+# time: 11:20 上午
+
+import os
+import random
+import time
+from typing import List, Tuple
+
+from kashgari.distribute import get_worker_context, run_local_workers
+from kashgari.generators import CorpusGenerator
+
+
+def build_corpus(sample_count: int) -> Tuple[List[List[str]], List[List[str]]]:
+    rand = random.Random(42)
+    words = [chr(0x4e00 + i) for i in range(3000)]
+    tags = ['B-PER', 'I-PER', 'B-LOC', 'I-LOC', 'O']
+    x = [[rand.choice(words) for _ in range(rand.randint(10, 60))] for _ in range(sample_count)]
+    y = [[rand.choice(tags) for _ in sample] for sample in x]
+    return x, y
+
+
+def train_worker(x: List[List[str]], y: List[List[str]], epochs: int) -> float:
+    import tensorflow as tf
+    strategy = tf.distribute.MultiWorkerMirroredStrategy()
+
+    from kashgari.tasks.labeling import BiLSTM_Model
+    num_workers, worker_index = get_worker_context()
+    corpus = CorpusGenerator(x, y)
+    with strategy.scope():
+        model = BiLSTM_Model(sequence_length=60)
+        model.build_model_generator(corpus)
+    shard = corpus.shard(num_workers, worker_index)
+
+    # first epoch traces the train function
+    model.fit_generator(shard, batch_size=64, epochs=1, fit_kwargs={'verbose': 0})
+    start = time.perf_counter()
+    model.fit_generator(shard, batch_size=64, epochs=epochs, fit_kwargs={'verbose': 0})
+    return len(shard) * epochs / (time.perf_counter() - start)
+
+
+def run_benchmark(sample_count: int = 8000, epochs: int = 2) -> None:
+    x, y = build_corpus(sample_count)
+    cpu_count = os.cpu_count() or 1
+    worker_counts = [n for n in [1, 2, 4, 8, 16] if n <= max(cpu_count // 2, 1)]
+
+    base_throughput = None
+    for num_workers in worker_counts:
+        # batch size is per worker, every worker trains sample_count / num_workers samples per epoch.
+        throughput = sum(run_local_workers(train_worker, num_workers, args=(x, y, epochs)))
+        if base_throughput is None:
+            base_throughput = throughput
+        efficiency = throughput / (base_throughput * num_workers)
+        print(f'{num_workers:2d} workers: {throughput:8.1f} samples/sec, '
+              f'speedup {throughput / base_throughput:.2f}x, scaling efficiency {efficiency:.0%}')
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,76 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: embed_sentences_benchmark.py
+# time: 3:40 下午
+
+import json
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from kashgari.embeddings import TransformerEmbedding
+from kashgari.processors import SequenceProcessor
+
+
+def legacy_embed_sentences(embedding: TransformerEmbedding,
+                           sentences: List[List[str]],
+                           batch_size: int) -> np.ndarray:
+    """
+    Slice the sentences, embed the full tensor and mean pool in python.
+    """
+    results = []
+    for start in range(0, len(sentences), batch_size):
+        batch = sentences[start:start + batch_size]
+        token_vectors = embedding.embed(batch)
+        token_ids = embedding._text_processor.transform(batch, seq_length=embedding.max_position)
+        mask = (token_ids != 0)[:, :, np.newaxis]
+        results.append((token_vectors * mask).sum(axis=1) / mask.sum(axis=1))
+    return np.concatenate(results)
+
+
+def run_benchmark(sample_count: int = 4000, batch_size: int = 64) -> None:
+    random.seed(42)
+    words = [chr(0x4e00 + i) for i in range(3000)]
+    sentences = [[random.choice(words) for _ in range(random.randint(5, 120))] for _ in range(sample_count)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        # randomly initialized transformer, the speed does not depend on the weights.
+        with open(os.path.join(folder, 'vocab.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + words))
+        with open(os.path.join(folder, 'bert_config.json'), 'w') as f:
+            json.dump({'hidden_act': 'gelu', 'hidden_size': 256, 'intermediate_size': 1024,
+                       'max_position_embeddings': 512, 'num_attention_heads': 4, 'num_hidden_layers': 4,
+                       'type_vocab_size': 2, 'vocab_size': len(words) + 5}, f)
+        embedding = TransformerEmbedding(os.path.join(folder, 'vocab.txt'),
+                                         os.path.join(folder, 'bert_config.json'),
+                                         None)
+        processor = SequenceProcessor(min_count=1)
+        processor.build_vocab(sentences, sentences)
+        embedding.setup_text_processor(processor)
+
+        start = time.perf_counter()
+        legacy = legacy_embed_sentences(embedding, sentences, batch_size)
+        legacy_time = time.perf_counter() - start
+
+        for sort_by_length in [False, True]:
+            start = time.perf_counter()
+            vectors = np.concatenate(list(embedding.embed_sentences(sentences,
+                                                                    batch_size=batch_size,
+                                                                    sort_by_length=sort_by_length)))
+            current_time = time.perf_counter() - start
+            assert np.allclose(vectors, legacy, atol=1e-4)
+            print(f'embed_sentences(sort_by_length={sort_by_length}): {sample_count / current_time:.0f} sentences/sec '
+                  f'({legacy_time / current_time:.1f}x)')
+        print(f'legacy slicing: {sample_count / legacy_time:.0f} sentences/sec')
+
+
+if __name__ == "__main__":
+    run_benchmark()
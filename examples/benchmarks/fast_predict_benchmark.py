@@ -0,0 +1,54 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: fast_predict_benchmark.py
+# time: 10:05 上午
+
+import random
+import time
+from typing import List
+
+import numpy as np
+
+from kashgari.tasks.labeling import BiLSTM_CRF_Model
+
+
+def latencies(model: BiLSTM_CRF_Model, samples: List[List[str]], batch_size: int) -> List[float]:
+    result = []
+    for i in range(0, len(samples), batch_size):
+        batch = samples[i:i + batch_size]
+        start = time.perf_counter()
+        model.predict_entities(batch, batch_size=batch_size, predict_kwargs={'verbose': 0})
+        result.append(time.perf_counter() - start)
+    return result
+
+
+def run_benchmark() -> None:
+    random.seed(42)
+    words = [chr(0x4e00 + i) for i in range(500)]
+    tags = ['B-PER', 'I-PER', 'B-LOC', 'I-LOC', 'O']
+    x = [[random.choice(words) for _ in range(random.randint(5, 60))] for _ in range(2000)]
+    y = [[random.choice(tags) for _ in sen] for sen in x]
+
+    model = BiLSTM_CRF_Model()
+    model.build_model(x, y)
+
+    print(f"{'batch size':>10s} | {'keras predict p50':>18s} | {'fast path p50':>14s} | {'speedup':>8s}")
+    for batch_size in [1, 8, 32]:
+        samples = x[:batch_size * 100]
+        # warm up both paths, trace functions before timing
+        model.fast_predict_max_batch_size = 0
+        latencies(model, samples[:batch_size * 5], batch_size)
+        legacy = np.percentile(latencies(model, samples, batch_size), 50)
+
+        model.fast_predict_max_batch_size = 64
+        latencies(model, samples[:batch_size * 5], batch_size)
+        fast = np.percentile(latencies(model, samples, batch_size), 50)
+        print(f'{batch_size:10d} | {legacy * 1000:16.2f}ms | {fast * 1000:12.2f}ms | {legacy / fast:7.1f}x')
+
+
+if __name__ == "__main__":
+    run_benchmark()
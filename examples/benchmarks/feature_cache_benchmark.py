@@ -0,0 +1,71 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: feature_cache_benchmark.py
+# time: 11:48 上午
+
+import json
+import os
+import random
+import tempfile
+import time
+
+from kashgari.embeddings import TransformerEmbedding
+from kashgari.tasks.labeling import BiLSTM_Model
+
+
+def write_bert_files(folder: str, words: list) -> None:
+    # randomly initialized transformer, the speed does not depend on the weights.
+    with open(os.path.join(folder, 'vocab.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + words))
+    with open(os.path.join(folder, 'bert_config.json'), 'w') as f:
+        json.dump({'attention_probs_dropout_prob': 0.1,
+                   'hidden_act': 'gelu',
+                   'hidden_dropout_prob': 0.1,
+                   'hidden_size': 256,
+                   'initializer_range': 0.02,
+                   'intermediate_size': 1024,
+                   'max_position_embeddings': 512,
+                   'num_attention_heads': 4,
+                   'num_hidden_layers': 4,
+                   'type_vocab_size': 2,
+                   'vocab_size': len(words) + 5}, f)
+
+
+def seconds_per_epoch(model: BiLSTM_Model, x: list, y: list, epochs: int) -> float:
+    # first epoch builds the model, and the feature cache if enabled
+    model.fit(x, y, epochs=1, batch_size=64)
+    start = time.perf_counter()
+    model.fit(x, y, epochs=epochs, batch_size=64)
+    return (time.perf_counter() - start) / epochs
+
+
+def run_benchmark(sample_count: int = 4000, epochs: int = 3) -> None:
+    random.seed(42)
+    words = [chr(0x4e00 + i) for i in range(3000)]
+    tags = ['B-PER', 'I-PER', 'B-LOC', 'I-LOC', 'O']
+    x = [[random.choice(words) for _ in range(random.randint(10, 60))] for _ in range(sample_count)]
+    y = [[random.choice(tags) for _ in sen] for sen in x]
+
+    with tempfile.TemporaryDirectory() as folder:
+        write_bert_files(folder, words)
+        vocab_path = os.path.join(folder, 'vocab.txt')
+        config_path = os.path.join(folder, 'bert_config.json')
+
+        embedding = TransformerEmbedding(vocab_path, config_path, None)
+        legacy = seconds_per_epoch(BiLSTM_Model(embedding), x, y, epochs)
+
+        embedding = TransformerEmbedding(vocab_path, config_path, None,
+                                         feature_cache_dir=os.path.join(folder, 'cache'))
+        start = time.perf_counter()
+        cached = seconds_per_epoch(BiLSTM_Model(embedding), x, y, epochs)
+        print(f'without cache : {legacy:.2f}s/epoch')
+        print(f'feature cache : {cached:.2f}s/epoch ({legacy / cached:.1f}x), '
+              f'{time.perf_counter() - start - cached * epochs:.2f}s for building the cache and the first epoch')
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,101 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: seq2seq_train_step_benchmark.py
+# time: 2:26 下午
+
+import random
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from kashgari.generators import CorpusGenerator, Seq2SeqDataSet
+from kashgari.tasks.seq2seq import Seq2Seq
+
+
+class LegacySeq2Seq(Seq2Seq):
+    """
+    Eager train step before the compiled teacher forcing, kept for comparison.
+    """
+
+    def train_step(self,  # type: ignore
+                   input_seq,
+                   target_seq,
+                   enc_hidden):
+        loss = 0
+
+        with tf.GradientTape() as tape:
+            enc_output, enc_hidden = self.encoder(input_seq, enc_hidden)
+
+            dec_hidden = enc_hidden
+
+            bos_token_id = self.encoder_processor.vocab2idx[self.encoder_processor.token_bos]
+            dec_input = tf.expand_dims([bos_token_id] * target_seq.shape[0], 1)
+
+            # Teacher forcing - feeding the target as the next input
+            for t in range(1, target_seq.shape[1]):
+                # pass enc_output to the decoder
+                predictions, dec_hidden, _ = self.decoder(dec_input, dec_hidden, enc_output)
+                loss += self.loss_function(target_seq[:, t], predictions)
+                # using teacher forcing
+                dec_input = tf.expand_dims(target_seq[:, t], 1)
+
+        batch_loss = (loss / int(target_seq.shape[1]))
+        variables = self.encoder.trainable_variables + self.decoder.trainable_variables
+        gradients = tape.gradient(loss, variables)
+        self.optimizer.apply_gradients(zip(gradients, variables))
+
+        return batch_loss
+
+
+def steps_per_second(model: Seq2Seq, batches: list, batch_size: int) -> float:
+    enc_hidden = tf.zeros((batch_size, model.hidden_size))
+    # warm up, the compiled step is traced at the first call
+    model.train_step(*batches[0], enc_hidden)
+    start = time.perf_counter()
+    for inputs, targets in batches:
+        model.train_step(inputs, targets, enc_hidden).numpy()
+    return len(batches) / (time.perf_counter() - start)
+
+
+def run_benchmark(batch_size: int = 64, hidden_size: int = 256, seq_length: int = 32) -> None:
+    random.seed(42)
+    words = [chr(0x4e00 + i) for i in range(2000)]
+    x = [[random.choice(words) for _ in range(random.randint(5, seq_length - 2))] for _ in range(2000)]
+    y = [list(reversed(sen)) for sen in x]
+
+    models = {}
+    for name, model_class in [('legacy', LegacySeq2Seq), ('current', Seq2Seq)]:
+        model = model_class(hidden_size=hidden_size, encoder_seq_length=seq_length, decoder_seq_length=seq_length)
+        model.build_model(x, y)
+        models[name] = model
+    # same weights for both models
+    models['current'].encoder.set_weights(models['legacy'].encoder.get_weights())
+    models['current'].decoder.set_weights(models['legacy'].decoder.get_weights())
+
+    model = models['current']
+    dataset = Seq2SeqDataSet(CorpusGenerator(x, y),
+                             batch_size=batch_size,
+                             encoder_processor=model.encoder_processor,
+                             encoder_seq_length=model.encoder_seq_length,
+                             decoder_processor=model.decoder_processor,
+                             decoder_seq_length=model.decoder_seq_length)
+    batches = [(inputs.numpy(), targets.numpy()) for inputs, targets in dataset.take(10)]
+
+    enc_hidden = tf.zeros((batch_size, hidden_size))
+    losses = [models[name].train_step(*batches[0], enc_hidden).numpy() for name in ['legacy', 'current']]
+    print(f'first step loss, legacy: {losses[0]:.6f}, current: {losses[1]:.6f}')
+    assert np.isclose(losses[0], losses[1], rtol=1e-4)
+
+    legacy = steps_per_second(models['legacy'], batches, batch_size)
+    current = steps_per_second(models['current'], batches, batch_size)
+    print(f'legacy  : {legacy:.2f} steps/sec')
+    print(f'current : {current:.2f} steps/sec ({current / legacy:.1f}x)')
+
+
+if __name__ == "__main__":
+    run_benchmark()
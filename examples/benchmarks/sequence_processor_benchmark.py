@@ -0,0 +1,70 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: sequence_processor_benchmark.py
+# time: 11:02 上午
+
+import random
+import time
+from typing import List
+
+import numpy as np
+from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+from kashgari.processors import SequenceProcessor
+
+
+def legacy_transform(processor: SequenceProcessor,
+                     samples: List[List[str]],
+                     seq_length: int) -> np.ndarray:
+    """
+    The list + dict.get + pad_sequences implementation, kept for comparison.
+    """
+    numerized_samples = []
+    unk_index = processor.vocab2idx[processor.token_unk]
+    for seq in samples:
+        seq = [processor.token_bos] + seq + [processor.token_eos]
+        numerized_samples.append([processor.vocab2idx.get(token, unk_index) for token in seq])
+    return np.array(pad_sequences(numerized_samples, seq_length, padding='post', truncating='post'))
+
+
+def run_benchmark(sample_count: int = 100000, seq_length: int = 64) -> None:
+    random.seed(42)
+    chars = [chr(i) for i in range(0x4E00, 0x4E00 + 3000)]
+    samples = [random.choices(chars, k=random.randint(5, 80)) for _ in range(sample_count)]
+    processor = SequenceProcessor(min_count=1)
+    processor.build_vocab(samples[:sample_count // 2], samples[:sample_count // 2])
+
+    start = time.perf_counter()
+    legacy = legacy_transform(processor, samples, seq_length)
+    legacy_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = processor.transform(samples, seq_length=seq_length)
+    current_duration = time.perf_counter() - start
+
+    assert legacy.dtype == current.dtype
+    assert (legacy == current).all()
+
+    # repeated sentences, like the online inference traffic
+    config = processor.to_dict()['config']
+    config['cache_size'] = 1000
+    cached_processor = SequenceProcessor(**config)
+    repeated_samples = [random.choice(samples[:1000]) for _ in range(sample_count)]
+    cached_processor.transform(repeated_samples, seq_length=seq_length)
+    start = time.perf_counter()
+    cached = cached_processor.transform(repeated_samples, seq_length=seq_length)
+    cached_duration = time.perf_counter() - start
+    assert (cached == legacy_transform(processor, repeated_samples, seq_length)).all()
+
+    print(f'{sample_count} sentences, seq_length {seq_length}')
+    print(f'legacy transform         : {legacy_duration:.3f}s')
+    print(f'current transform        : {current_duration:.3f}s')
+    print(f'cached, repeated samples : {cached_duration:.3f}s')
+
+
+if __name__ == "__main__":
+    run_benchmark()
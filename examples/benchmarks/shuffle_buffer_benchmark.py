@@ -0,0 +1,55 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: shuffle_buffer_benchmark.py
+# time: 10:21 上午
+
+import time
+from typing import Any, Iterator, Tuple
+
+import numpy as np
+
+from kashgari.generators import CorpusGenerator
+
+
+class LegacyCorpusGenerator(CorpusGenerator):
+    """
+    Shuffle buffer implementation before the swap-with-last version, kept for comparison.
+    """
+
+    def sample(self) -> Iterator[Tuple[Any, Any]]:
+        buffer, is_full = [], False
+        for sample in self:
+            buffer.append(sample)
+            if is_full:
+                i = np.random.randint(len(buffer))
+                yield buffer.pop(i)
+            elif len(buffer) == self.buffer_size:
+                is_full = True
+        while buffer:
+            i = np.random.randint(len(buffer))
+            yield buffer.pop(i)
+
+
+def samples_per_second(generator: CorpusGenerator) -> float:
+    start = time.perf_counter()
+    count = sum(1 for _ in generator.sample())
+    return count / (time.perf_counter() - start)
+
+
+def run_benchmark(sample_count: int = 500000) -> None:
+    x = [['token'] * 10] * sample_count
+    y = ['label'] * sample_count
+
+    print(f"{'buffer size':>12s} | {'legacy samples/sec':>20s} | {'current samples/sec':>20s}")
+    for buffer_size in [2000, 10000, 100000]:
+        legacy = samples_per_second(LegacyCorpusGenerator(x, y, buffer_size=buffer_size))
+        current = samples_per_second(CorpusGenerator(x, y, buffer_size=buffer_size, seed=42))
+        print(f'{buffer_size:12d} | {legacy:20,.0f} | {current:20,.0f}')
+
+
+if __name__ == "__main__":
+    run_benchmark()
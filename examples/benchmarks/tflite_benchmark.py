@@ -0,0 +1,48 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: tflite_benchmark.py
+# time: 4:05 下午
+
+import random
+import tempfile
+from typing import List, Tuple
+
+from kashgari.generators import CorpusGenerator
+from kashgari.tasks.labeling import BiLSTM_CRF_Model
+from kashgari.tflite import QUANTIZATION_MODES, TFLitePredictor, compare_with_model, export_tflite
+
+
+def build_corpus(sample_count: int) -> Tuple[List[List[str]], List[List[str]]]:
+    rand = random.Random(42)
+    words = [chr(0x4e00 + i) for i in range(3000)]
+    tags = ['O', 'B-PER', 'I-PER', 'B-LOC', 'I-LOC']
+    x = [[rand.choice(words) for _ in range(rand.randint(10, 60))] for _ in range(sample_count)]
+    y = [[tags[ord(word) % len(tags)] for word in sample] for sample in x]
+    return x, y
+
+
+def run_benchmark(sample_count: int = 3000, test_count: int = 200) -> None:
+    x, y = build_corpus(sample_count + test_count)
+    train_x, train_y = x[:sample_count], y[:sample_count]
+    test_x, test_y = x[sample_count:], y[sample_count:]
+
+    model = BiLSTM_CRF_Model(sequence_length=60)
+    model.fit(train_x, train_y, epochs=5, batch_size=64, fit_kwargs={'verbose': 0})
+
+    for quantization in QUANTIZATION_MODES:
+        model_path = export_tflite(model, tempfile.mkdtemp(), quantization=quantization,
+                                   calibration_gen=CorpusGenerator(train_x, train_y))
+        report = compare_with_model(model, TFLitePredictor(model_path), test_x, test_y)
+        print(f'{quantization:8s}: size {report["tflite_size_mb"]:.2f}MB / {report["model_size_mb"]:.2f}MB, '
+              f'p50 {report["tflite_latency"]["p50_ms"]:.2f}ms / {report["model_latency"]["p50_ms"]:.2f}ms, '
+              f'p95 {report["tflite_latency"]["p95_ms"]:.2f}ms / {report["model_latency"]["p95_ms"]:.2f}ms, '
+              f'agreement {report["agreement"]:.2%}, '
+              f'accuracy {report["tflite_accuracy"]:.2%} / {report["model_accuracy"]:.2%}')
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,49 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: word_embedding_cache_benchmark.py
+# time: 4:32 下午
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from kashgari.embeddings import WordEmbedding
+
+
+def write_w2v_file(path: str, word_count: int, vector_size: int) -> None:
+    rng = np.random.default_rng(42)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'{word_count} {vector_size}\n')
+        for start in range(0, word_count, 10000):
+            vectors = rng.standard_normal((min(10000, word_count - start), vector_size))
+            for index, vector in enumerate(vectors):
+                f.write(f'word{start + index} ' + ' '.join(f'{v:.5f}' for v in vector) + '\n')
+
+
+def run_benchmark(word_count: int = 200000, vector_size: int = 300) -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        w2v_path = os.path.join(folder, 'w2v.txt')
+        write_w2v_file(w2v_path, word_count, vector_size)
+        cache_dir = os.path.join(folder, 'cache')
+
+        start = time.perf_counter()
+        WordEmbedding(w2v_path, use_cache=False)
+        print(f'parse without cache : {time.perf_counter() - start:.2f}s')
+
+        start = time.perf_counter()
+        WordEmbedding(w2v_path, cache_dir=cache_dir)
+        print(f'first load, cached  : {time.perf_counter() - start:.2f}s')
+
+        start = time.perf_counter()
+        WordEmbedding(w2v_path, cache_dir=cache_dir)
+        print(f'load from cache     : {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -28,3 +28,5 @@ from kashgari import macros
 from kashgari import processors
 from kashgari import tasks
 from kashgari import utils
+
+custom_objects['BahdanauAttention'] = layers.BahdanauAttention
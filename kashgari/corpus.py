@@ -8,7 +8,7 @@
 # time: 12:38 下午
 
 import os
-from typing import List
+from typing import List, Optional
 from typing import Tuple
 
 import numpy as np
@@ -20,6 +20,7 @@ from kashgari import utils
 from kashgari.logger import logger
 from kashgari.tokenizers.base_tokenizer import Tokenizer
 from kashgari.tokenizers.bert_tokenizer import BertTokenizer
+from kashgari.tokenizers.jieba_tokenizer import JiebaTokenizer
 
 CORPUS_PATH = os.path.join(K.DATA_PATH, 'corpus')
 
@@ -145,7 +146,9 @@ class SMP2018ECDTCorpus:
     def load_data(cls,
                   subset_name: str = 'train',
                   shuffle: bool = True,
-                  cutter: str = 'char') -> Tuple[List[List[str]], List[str]]:
+                  cutter: str = 'char',
+                  *,
+                  workers: int = 1) -> Tuple[List[List[str]], List[str]]:
         """
         Load dataset as sequence classification format, char level tokenized
 
@@ -153,6 +156,7 @@ class SMP2018ECDTCorpus:
             subset_name: {train, test, valid}
             shuffle: should shuffle or not, default True.
             cutter: sentence cutter, {char, jieba}
+            workers: number of jieba tokenizing processes, default 1.
 
         Returns:
             dataset_features and dataset labels
@@ -170,15 +174,10 @@ class SMP2018ECDTCorpus:
         df_path = os.path.join(corpus_path, f'{subset_name}.csv')
         df = pd.read_csv(df_path)
         if cutter == 'jieba':
-            try:
-                import jieba
-            except ModuleNotFoundError:
-                raise ModuleNotFoundError(
-                    "please install jieba, `$ pip install jieba`")
-            x_data = [list(jieba.cut(item)) for item in df['query'].to_list()]
-        elif 'char':
+            x_data = JiebaTokenizer().tokenize_batch(df['query'].to_list(), workers=workers)
+        else:
             x_data = [list(item) for item in df['query'].to_list()]
-        y_data = df['label'].to_list()
+        y_data: List[str] = df['label'].to_list()
 
         if shuffle:
             x_data, y_data = utils.unison_shuffled_copies(x_data, y_data)
@@ -210,8 +209,23 @@ class JigsawToxicCommentCorpus:
     def __init__(self,
                  corpus_train_csv_path: str,
                  sample_count: int = None,
-                 tokenizer: Tokenizer = None) -> None:
+                 tokenizer: Tokenizer = None,
+                 *,
+                 workers: int = 1,
+                 chunk_size: int = 1000) -> None:
+        """
+        Args:
+            corpus_train_csv_path: path of the ``train.csv`` file.
+            sample_count: number of samples to load, default None which loads all samples.
+            tokenizer: comment tokenizer, default is :class:`kashgari.tokenizers.BertTokenizer`.
+            workers: number of tokenizing processes, default 1.
+            chunk_size: number of comments sent to a tokenizing process at a time.
+        """
         self.file_path = corpus_train_csv_path
+        self.workers = workers
+        self.chunk_size = chunk_size
+        # tokenized samples of the whole file, shared by all subsets
+        self._tokenized_data: Optional[Tuple[List[List[str]], List[List[str]]]] = None
         self.train_ids = []
         self.test_ids = []
         self.valid_ids = []
@@ -245,8 +259,16 @@ class JigsawToxicCommentCorpus:
                 y.append(label)
         return y
 
-    def _text_process(self, text: str) -> List[str]:
-        return self.tokenizer.tokenize(text)
+    def _load_tokenized_data(self) -> Tuple[List[List[str]], List[List[str]]]:
+        if self._tokenized_data is None:
+            df = pd.read_csv(self.file_path)
+            df = df[:self.sample_count]
+            y_data = df.apply(self._extract_label, axis=1).to_list()
+            x_data = self.tokenizer.tokenize_batch(df['comment_text'].to_list(),
+                                                   workers=self.workers,
+                                                   chunk_size=self.chunk_size)
+            self._tokenized_data = (x_data, y_data)
+        return self._tokenized_data
 
     def load_data(self,
                   subset_name: str = 'train',
@@ -262,19 +284,15 @@ class JigsawToxicCommentCorpus:
            dataset_features and dataset labels
         """
 
-        df = pd.read_csv(self.file_path)
-        df = df[:self.sample_count]
-        df['y'] = df.apply(self._extract_label, axis=1)
-        df['x'] = df['comment_text'].apply(self._text_process)
-        df = df[['x', 'y']]
+        x_data, y_data = self._load_tokenized_data()
         if subset_name == 'train':
-            df = df.loc[self.train_ids]
+            ids = self.train_ids
         elif subset_name == 'valid':
-            df = df.loc[self.valid_ids]
+            ids = self.valid_ids
         else:
-            df = df.loc[self.test_ids]
+            ids = self.test_ids
 
-        xs, ys = list(df['x'].values), list(df['y'].values)
+        xs, ys = [x_data[i] for i in ids], [y_data[i] for i in ids]
         if shuffle:
             xs, ys = utils.unison_shuffled_copies(xs, ys)
         return xs, ys
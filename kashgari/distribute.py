@@ -0,0 +1,159 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: distribute.py
+# time: 10:12 上午
+
+"""
+Data-parallel training with ``tf.distribute.MultiWorkerMirroredStrategy``.
+
+Every worker is a process with its own copy of the model, trains with its own shard of the corpus,
+and gradients are all-reduced between workers after every step. Workers could be started on several
+machines with the ``TF_CONFIG`` environment variable, or on one machine with :func:`run_local_workers`,
+which makes use of the idle CPU cores when the python input pipeline and small kernels can not.
+
+Example of the worker function::
+
+    def train_worker(train_x, train_y):
+        strategy = tf.distribute.MultiWorkerMirroredStrategy()
+        num_workers, worker_index = get_worker_context()
+        corpus = CorpusGenerator(train_x, train_y)
+        with strategy.scope():
+            model = BiLSTM_Model()
+            # vocabs are built with the full corpus, so they are the same on all workers
+            model.build_model_generator(corpus)
+        model.fit_generator(corpus.shard(num_workers, worker_index), batch_size=64, epochs=5)
+        if worker_index == 0:
+            model.save('model')
+
+    run_local_workers(train_worker, 4, args=(train_x, train_y))
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Tuple
+
+from kashgari.logger import logger
+
+
+def get_worker_context() -> Tuple[int, int]:
+    """
+    Get the worker count and the index of the current worker from the ``TF_CONFIG`` environment variable.
+
+    Returns:
+        tuple of ``(num_workers, worker_index)``, ``(1, 0)`` when ``TF_CONFIG`` is not set.
+    """
+    tf_config = json.loads(os.environ.get('TF_CONFIG', '{}'))
+    workers = tf_config.get('cluster', {}).get('worker', [])
+    if not workers:
+        return 1, 0
+    return len(workers), tf_config.get('task', {}).get('index', 0)
+
+
+def _get_free_ports(count: int) -> List[int]:
+    sockets = []
+    for _ in range(count):
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(('localhost', 0))
+        sockets.append(s)
+    ports = [s.getsockname()[1] for s in sockets]
+    for s in sockets:
+        s.close()
+    return ports
+
+
+def _worker_main(worker_fn: Callable,
+                 args: Tuple,
+                 tf_config: Dict[str, Any],
+                 threads_per_worker: int,
+                 results: multiprocessing.Queue) -> None:
+    worker_index = tf_config['task']['index']
+    os.environ['TF_CONFIG'] = json.dumps(tf_config)
+    try:
+        import tensorflow as tf
+        # split the cores between workers, otherwise every worker starts a thread per core.
+        tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+        tf.config.threading.set_inter_op_parallelism_threads(min(threads_per_worker, 2))
+        results.put((worker_index, True, worker_fn(*args)))
+    except BaseException:
+        results.put((worker_index, False, traceback.format_exc()))
+
+
+def run_local_workers(worker_fn: Callable,
+                      num_workers: int,
+                      *,
+                      args: Tuple = (),
+                      threads_per_worker: int = None,
+                      timeout: float = None) -> List[Any]:
+    """
+    Run ``worker_fn(*args)`` in ``num_workers`` local processes, which form a
+    ``MultiWorkerMirroredStrategy`` cluster on localhost.
+
+    ``worker_fn`` should create the strategy before any other tensorflow operation, build the model
+    in ``strategy.scope()`` and train with its shard of the corpus, see the module example.
+    Processes are started with the ``spawn`` method, so ``worker_fn`` and ``args`` must be picklable,
+    and the return value of ``worker_fn`` is sent back to the caller.
+
+    Args:
+        worker_fn: module level function to run in every worker.
+        num_workers: number of worker processes.
+        args: arguments of ``worker_fn``.
+        threads_per_worker: number of tensorflow intra-op threads per worker,
+            default is the cpu count divided by the worker count.
+        timeout: seconds to wait for the workers, default None, wait forever.
+
+    Returns:
+        return values of ``worker_fn``, in the order of the worker index.
+    """
+    if threads_per_worker is None:
+        threads_per_worker = max((os.cpu_count() or 1) // num_workers, 1)
+    cluster = {'worker': [f'localhost:{port}' for port in _get_free_ports(num_workers)]}
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = []
+    for index in range(num_workers):
+        tf_config = {'cluster': cluster, 'task': {'type': 'worker', 'index': index}}
+        process = context.Process(target=_worker_main,
+                                  args=(worker_fn, args, tf_config, threads_per_worker, results),
+                                  daemon=True)
+        process.start()
+        processes.append(process)
+    logger.info(f'Started {num_workers} local workers, cluster: {cluster["worker"]}')
+
+    outputs: Dict[int, Any] = {}
+    try:
+        start_time = time.perf_counter()
+        while len(outputs) < num_workers:
+            try:
+                worker_index, succeed, output = results.get(timeout=1)
+            except queue.Empty:
+                for index, process in enumerate(processes):
+                    # worker killed before reporting, such as out of memory.
+                    if index not in outputs and process.exitcode not in (None, 0):
+                        raise RuntimeError(f'Worker {index} exited with code {process.exitcode}.')
+                if timeout is not None and time.perf_counter() - start_time > timeout:
+                    raise TimeoutError(f'Local workers did not finish in {timeout} seconds.')
+                continue
+            if not succeed:
+                raise RuntimeError(f'Worker {worker_index} failed:\n{output}')
+            outputs[worker_index] = output
+    finally:
+        # workers wait for each other in the collective ops, stop the others when one fails.
+        for process in processes:
+            if process.is_alive() and len(outputs) < num_workers:
+                process.terminate()
+            process.join()
+    return [outputs[index] for index in range(num_workers)]
+
+
+if __name__ == "__main__":
+    pass
@@ -10,6 +10,7 @@
 from .abc_embedding import ABCEmbedding
 from .bare_embedding import BareEmbedding
 from .bert_embedding import BertEmbedding
+from .feature_cache import FeatureCache, FeatureCacheDataSet
 from .transformer_embedding import TransformerEmbedding
 from .word_embedding import WordEmbedding
 
@@ -7,8 +7,9 @@
 # file: abc_embedding.py
 # time: 2:43 下午
 
+import itertools
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, TYPE_CHECKING, Callable, Iterable, Iterator, Tuple
 
 import numpy as np
 import tensorflow as tf
@@ -17,7 +18,11 @@ import tqdm
 import kashgari
 from kashgari.generators import CorpusGenerator
 from kashgari.logger import logger
-from kashgari.processors import ABCProcessor
+from kashgari.processors import ABCProcessor, CorpusStatistics
+from kashgari.utils import LRUCache
+
+if TYPE_CHECKING:
+    from kashgari.embeddings.feature_cache import FeatureCache
 
 L = tf.keras.layers
 
@@ -28,6 +33,7 @@ class ABCEmbedding:
             'segment': self.segment,
             'embedding_size': self.embedding_size,
             'max_position': self.max_position,
+            'embed_cache_bytes': self.embed_cache_bytes,
             **self.kwargs
         }
         return {
@@ -41,17 +47,33 @@ class ABCEmbedding:
                  segment: bool = False,
                  embedding_size: int = 100,
                  max_position: int = None,
+                 embed_cache_bytes: int = 0,
                  **kwargs: Any):
-
+        """
+        Args:
+            segment: the embedding model takes the segment ids as the second input.
+            embedding_size: size of the embedding vector.
+            max_position: max sequence length of the embedding model.
+            embed_cache_bytes: max bytes of the :meth:`embed` result cache, the embedding result of each
+                sentence is cached by its token ids with LRU eviction. Default 0, cache is disabled.
+            kwargs: additional params
+        """
         self.embed_model: tf.keras.Model = None
+        # store of the precomputed embedding outputs, only supported by the frozen embeddings.
+        self.feature_cache: Optional['FeatureCache'] = None
 
         self.segment: bool = segment  # type: ignore
         self.kwargs = kwargs
 
         self.embedding_size: int = embedding_size  # type: ignore
         self.max_position: int = max_position  # type: ignore
+        self.embed_cache_bytes = embed_cache_bytes
+        self.embed_cache: Optional[LRUCache] = LRUCache(embed_cache_bytes) if embed_cache_bytes else None
+        # embed_model of the cached results, the cache is cleared when embed_model is replaced.
+        self._embed_cache_model: Optional[tf.keras.Model] = None
         self.vocab2idx = self.load_embed_vocab()
         self._text_processor: Optional[ABCProcessor] = None
+        self._pooling_functions: Dict[str, Tuple[tf.keras.Model, Callable]] = {}
 
     def _override_load_model(self, config: Dict) -> None:
         embed_model_json_str = json.dumps(config['embed_model'])
@@ -82,17 +104,31 @@ class ABCEmbedding:
         Returns:
 
         """
-        seq_lens = []
+        stats = CorpusStatistics()
         for sentence, label in tqdm.tqdm(corpus_gen, desc="Calculating sequence length"):
             if use_label:
-                seq_lens.append(len(label))
+                stats.label_lengths[len(label)] += 1
             else:
-                seq_lens.append(len(sentence))
-        if cover_rate == 1.0:
-            target_index = -1
-        else:
-            target_index = int(cover_rate * len(seq_lens))
-        sequence_length = sorted(seq_lens)[target_index]
+                stats.text_lengths[len(sentence)] += 1
+        return self.get_seq_length_from_statistics(stats, use_label=use_label, cover_rate=cover_rate)
+
+    def get_seq_length_from_statistics(self,
+                                       stats: CorpusStatistics,
+                                       *,
+                                       use_label: bool = False,
+                                       cover_rate: float = 0.95) -> int:
+        """
+        Calculate proper sequence length with the pre-calculated corpus statistics
+
+        Args:
+            stats: corpus statistics
+            use_label: use the label length instead of the text length
+            cover_rate: ratio of samples need to be covered
+
+        Returns:
+            sequence length
+        """
+        sequence_length = stats.get_seq_length(use_label=use_label, cover_rate=cover_rate)
         logger.debug(f'Calculated sequence length = {sequence_length}')
         return sequence_length
 
@@ -119,6 +155,10 @@ class ABCEmbedding:
         """
         batch embed sentences
 
+        Padding positions of the result are zero. When ``embed_cache_bytes`` is set, results are cached
+        by the token ids of each sentence, only the uncached sentences are embedded with the model.
+        Cache stats are available at ``embedding.embed_cache.stats()``.
+
         Args:
             sentences: Sentence list to embed
             debug: show debug info
@@ -133,9 +173,158 @@ class ABCEmbedding:
                                                   seq_length=self.max_position)
         if debug:
             logger.debug(f'sentence tensor: {tensor_x}')
-        embed_results = self.embed_model.predict(tensor_x)
+        if self.embed_cache is None:
+            token_ids = tensor_x[0] if self.segment else tensor_x
+            embed_results = np.asarray(self.embed_model.predict(tensor_x), dtype=np.float32)
+            embed_results[token_ids == 0] = 0
+        else:
+            embed_results = self._embed_with_cache(tensor_x)
+        return embed_results
+
+    def _embed_with_cache(self, tensor_x: Any) -> np.ndarray:
+        # results of the replaced embed_model are outdated, such as rebuilding or loading the model again.
+        if self._embed_cache_model is not self.embed_model:
+            self.embed_cache.clear()  # type: ignore
+            self._embed_cache_model = self.embed_model
+
+        token_ids = tensor_x[0] if self.segment else tensor_x
+        lengths = (token_ids != 0).sum(axis=1)
+        embed_results = np.zeros(token_ids.shape + (self.embedding_size,), dtype=np.float32)
+
+        # sentences not in the cache, duplicated sentences are embedded only once.
+        miss_indexes: Dict[tuple, List[int]] = {}
+        for index, (ids, length) in enumerate(zip(token_ids, lengths)):
+            key = tuple(ids[:length].tolist())
+            if key in miss_indexes:
+                miss_indexes[key].append(index)
+                continue
+            cached = self.embed_cache.get(key)  # type: ignore
+            if cached is None:
+                miss_indexes[key] = [index]
+            else:
+                embed_results[index, :length] = cached
+
+        if miss_indexes:
+            rows = [indexes[0] for indexes in miss_indexes.values()]
+            if self.segment:
+                miss_tensor = [t[rows] for t in tensor_x]
+            else:
+                miss_tensor = tensor_x[rows]
+            miss_results = self.embed_model.predict(miss_tensor)
+            for (key, indexes), result in zip(miss_indexes.items(), miss_results):
+                vectors = np.array(result[:len(key)], dtype=np.float32)
+                self.embed_cache.put(key, vectors)  # type: ignore
+                embed_results[indexes, :len(key)] = vectors
         return embed_results
 
+    def _get_pooling_function(self, pooling: str) -> Callable:
+        # rebuild when embed_model is replaced, such as loading the model again.
+        if pooling not in self._pooling_functions or self._pooling_functions[pooling][0] is not self.embed_model:
+            embed_model = self.embed_model
+            input_signature = [tf.TensorSpec(shape=[None] * len(i.shape), dtype=i.dtype)
+                               for i in embed_model.inputs]
+
+            @tf.function(input_signature=input_signature)
+            def pooling_function(*inputs: tf.Tensor) -> tf.Tensor:
+                outputs = embed_model(list(inputs) if len(inputs) > 1 else inputs[0], training=False)
+                outputs = tf.cast(outputs, tf.float32)
+                if pooling == 'cls':
+                    return outputs[:, 0]
+                mask = tf.not_equal(inputs[0], 0)[:, :, tf.newaxis]
+                if pooling == 'max':
+                    return tf.reduce_max(tf.where(mask, outputs, outputs.dtype.min), axis=1)
+                mask = tf.cast(mask, tf.float32)
+                return tf.reduce_sum(outputs * mask, axis=1) / tf.maximum(tf.reduce_sum(mask, axis=1), 1.0)
+
+            self._pooling_functions[pooling] = (embed_model, pooling_function)
+        return self._pooling_functions[pooling][1]
+
+    def embed_sentences(self,
+                        sentences: Iterable[List[str]],
+                        *,
+                        pooling: str = 'mean',
+                        batch_size: int = 64,
+                        chunk_size: int = 4096,
+                        sort_by_length: bool = False) -> Iterator[np.ndarray]:
+        """
+        Embed sentences into sentence vectors, stream the result in chunks.
+
+        Sentences are read ``chunk_size`` at a time, so the memory usage does not grow with the input size.
+        Each batch is padded to its own max length, token vectors are pooled in the model graph
+        with the padding positions masked out.
+
+        Args:
+            sentences: iterable of tokenized sentences.
+            pooling: ``mean`` or ``max`` of the token vectors, or ``cls`` for the vector of the first token.
+            batch_size: number of sentences per model call.
+            chunk_size: number of sentences per yielded chunk.
+            sort_by_length: sort sentences by length within each chunk before batching,
+                which reduces the padding. Results are still in the input order.
+
+        Returns:
+            iterator of float32 arrays with shape ``(chunk_size, embedding_size)``, the last one could be smaller.
+        """
+        if pooling not in ('mean', 'max', 'cls'):
+            raise ValueError(f'Pooling should be one of mean, max and cls, got {pooling}')
+        if self._text_processor is None:
+            raise ValueError('Need to setup the `embedding.setup_text_processor` before calling the embed function.')
+        pooling_function = self._get_pooling_function(pooling)
+
+        sentence_iter = iter(sentences)
+        while True:
+            chunk = list(itertools.islice(sentence_iter, chunk_size))
+            if not chunk:
+                return
+            order = np.arange(len(chunk))
+            if sort_by_length:
+                order = np.argsort([len(sentence) for sentence in chunk], kind='stable')
+
+            chunk_vectors = np.zeros((len(chunk), self.embedding_size), dtype=np.float32)
+            for start in range(0, len(chunk), batch_size):
+                indexes = order[start:start + batch_size]
+                batch = [chunk[i] for i in indexes]
+                # +2 for the bos and eos token
+                tensor = self._text_processor.transform(batch,
+                                                        segment=self.segment,
+                                                        seq_length=max([len(i) for i in batch]) + 2,
+                                                        max_position=self.max_position)
+                inputs = tensor if self.segment else [tensor]
+                chunk_vectors[indexes] = pooling_function(*inputs).numpy()
+            yield chunk_vectors
+
+    def embed_sentences_to_file(self,
+                                sentences: Iterable[List[str]],
+                                output_path: str,
+                                *,
+                                total: int = None,
+                                **kwargs: Any) -> np.ndarray:
+        """
+        Embed sentences into sentence vectors and write them to a preallocated ``.npy`` file.
+
+        Args:
+            sentences: iterable of tokenized sentences.
+            output_path: path of the output ``.npy`` file.
+            total: number of sentences, required if the sentences has no length.
+            kwargs: params passed to :meth:`embed_sentences`
+
+        Returns:
+            memory-mapped float32 array with shape ``(total, embedding_size)``.
+        """
+        if total is None:
+            total = len(sentences)  # type: ignore
+        vectors = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.float32,
+                                            shape=(total, self.embedding_size))
+        index = 0
+        for chunk_vectors in self.embed_sentences(sentences, **kwargs):
+            if index + len(chunk_vectors) > total:
+                raise ValueError(f'Got more than {total} sentences.')
+            vectors[index:index + len(chunk_vectors)] = chunk_vectors
+            index += len(chunk_vectors)
+        if index != total:
+            raise ValueError(f'Expected {total} sentences, got {index}.')
+        vectors.flush()
+        return vectors
+
 
 if __name__ == "__main__":
     pass
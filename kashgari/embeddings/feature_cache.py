@@ -0,0 +1,235 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: feature_cache.py
+# time: 10:26 上午
+
+import glob
+import hashlib
+import itertools
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+from kashgari.generators import ABCDataSet
+from kashgari.logger import logger
+
+
+class FeatureCache:
+    """
+    Memory-mapped store of the contextual vectors of a frozen embedding model, keyed by the token ids.
+
+    Features are computed once with :meth:`update` and written to ``.npy`` shards in the cache folder,
+    later training runs on the same corpus read them back with :meth:`lookup` instead of
+    running the embedding model again. Vectors of the padding positions are stored as zero.
+
+    One cache folder should only be used with one embedding model.
+    """
+    # size of the sha1 digest
+    KEY_SIZE = 20
+
+    def __init__(self,
+                 cache_dir: str,
+                 *,
+                 dtype: str = 'float16',
+                 shard_size: int = 10000) -> None:
+        """
+        Args:
+            cache_dir: cache folder, will be created at the first update.
+            dtype: dtype of the stored vectors, default is ``float16`` which halves the disk usage.
+            shard_size: max number of samples per shard file.
+        """
+        self.cache_dir = cache_dir
+        self.dtype = dtype
+        self.shard_size = shard_size
+        self.embedding_size: int = None  # type: ignore
+
+        self._features: List[np.ndarray] = []
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+
+        meta_path = os.path.join(cache_dir, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            self.dtype = meta['dtype']
+            self.embedding_size = meta['embedding_size']
+
+        # keys file is written after the features file, so a shard with keys file is complete.
+        for keys_path in sorted(glob.glob(os.path.join(cache_dir, 'shard_*_keys.npy'))):
+            self._load_shard(keys_path[:-len('_keys.npy')])
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _load_shard(self, shard_path: str) -> None:
+        shard_index = len(self._features)
+        self._features.append(np.load(f'{shard_path}_features.npy', mmap_mode='r'))
+        # keys are stored as uint8 array, bytes dtype of numpy strips the trailing null bytes.
+        keys = np.load(f'{shard_path}_keys.npy').tobytes()
+        for row in range(len(keys) // self.KEY_SIZE):
+            self._index[keys[row * self.KEY_SIZE:(row + 1) * self.KEY_SIZE]] = (shard_index, row)
+
+    @staticmethod
+    def _iter_samples(x: Any) -> Iterator[Tuple[bytes, np.ndarray, np.ndarray]]:
+        """
+        Yield ``(key, token_ids, segment_ids)`` of each sample in the batch, with padding removed.
+        """
+        if isinstance(x, (list, tuple)):
+            token_ids, segment_ids = x
+        else:
+            token_ids, segment_ids = x, np.zeros_like(x)
+        token_ids = np.asarray(token_ids, dtype=np.int32)
+        segment_ids = np.asarray(segment_ids, dtype=np.int32)
+        lengths = (token_ids != 0).sum(axis=1)
+        for ids, segments, length in zip(token_ids, segment_ids, lengths):
+            ids, segments = ids[:length], segments[:length]
+            key = hashlib.sha1(ids.tobytes() + segments.tobytes()).digest()
+            yield key, ids, segments
+
+    def lookup(self, x: Any) -> np.ndarray:
+        """
+        Get the cached features of a numericalized batch.
+
+        Args:
+            x: token ids tensor, or tuple of token ids and segment ids tensor.
+
+        Returns:
+            float32 features with shape ``(batch_size, seq_length, embedding_size)``.
+        """
+        token_ids = x[0] if isinstance(x, (list, tuple)) else x
+        features = np.zeros(np.shape(token_ids) + (self.embedding_size,), dtype=np.float32)
+        for i, (key, ids, _) in enumerate(self._iter_samples(x)):
+            if key not in self._index:
+                raise KeyError(f'Sample {ids.tolist()} is not in the feature cache, call `update` first.')
+            shard_index, row = self._index[key]
+            features[i, :len(ids)] = self._features[shard_index][row, :len(ids)]
+        return features
+
+    def update(self,
+               embed_model: tf.keras.Model,
+               batches: Iterable[Any],
+               *,
+               batch_size: int = 64) -> int:
+        """
+        Compute and store the features of the samples which are not cached yet.
+
+        Args:
+            embed_model: frozen embedding model.
+            batches: iterable of numericalized batches, token ids tensor or tuple of token ids and segment ids tensor.
+            batch_size: batch size of the embedding model.
+
+        Returns:
+            number of new cached samples.
+        """
+        embedding_size = int(embed_model.output.shape[-1])
+        if self.embedding_size is None:
+            self.embedding_size = embedding_size
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, 'meta.json'), 'w') as f:
+                json.dump({'dtype': self.dtype, 'embedding_size': embedding_size}, f)
+        elif self.embedding_size != embedding_size:
+            raise ValueError(f'Feature cache {self.cache_dir} is built with embedding size {self.embedding_size}, '
+                             f'but got embedding size {embedding_size}.')
+
+        new_count = 0
+        pending: Dict[bytes, Tuple[np.ndarray, np.ndarray]] = {}
+        for x in batches:
+            for key, ids, segments in self._iter_samples(x):
+                if key not in self._index and key not in pending:
+                    pending[key] = (ids, segments)
+            if len(pending) >= self.shard_size:
+                new_count += self._write_shard(embed_model, pending, batch_size=batch_size)
+                pending = {}
+        if pending:
+            new_count += self._write_shard(embed_model, pending, batch_size=batch_size)
+        logger.info(f'Cached features of {new_count} new samples, total {len(self)} samples')
+        return new_count
+
+    def _write_shard(self,
+                     embed_model: tf.keras.Model,
+                     samples: Dict[bytes, Tuple[np.ndarray, np.ndarray]],
+                     *,
+                     batch_size: int) -> int:
+        # sort by length, so that each batch is padded to a similar length.
+        keys = sorted(samples, key=lambda k: len(samples[k][0]))
+        max_length = len(samples[keys[-1]][0])
+
+        shard_path = os.path.join(self.cache_dir, f'shard_{len(self._features):05d}')
+        features = np.lib.format.open_memmap(f'{shard_path}_features.npy', mode='w+', dtype=self.dtype,
+                                             shape=(len(keys), max_length, self.embedding_size))
+        for start in range(0, len(keys), batch_size):
+            batch = [samples[key] for key in keys[start:start + batch_size]]
+            length = len(batch[-1][0])
+            token_ids = np.zeros((len(batch), length), dtype=np.int32)
+            segment_ids = np.zeros((len(batch), length), dtype=np.int32)
+            for i, (ids, segments) in enumerate(batch):
+                token_ids[i, :len(ids)] = ids
+                segment_ids[i, :len(ids)] = segments
+
+            if len(embed_model.inputs) > 1:
+                output = embed_model([token_ids, segment_ids], training=False).numpy()
+            else:
+                output = embed_model(token_ids, training=False).numpy()
+            output *= (token_ids != 0)[:, :, np.newaxis]
+            features[start:start + len(batch), :length] = output
+        features.flush()
+        del features
+
+        np.save(f'{shard_path}_keys.npy', np.frombuffer(b''.join(keys), dtype=np.uint8).reshape(-1, self.KEY_SIZE))
+        self._load_shard(shard_path)
+        return len(keys)
+
+
+class FeatureCacheDataSet(ABCDataSet):
+    """
+    Wraps a dataset, replaces the numericalized inputs with the cached features.
+    """
+
+    def __init__(self,
+                 dataset: ABCDataSet,
+                 feature_cache: FeatureCache) -> None:
+        super(FeatureCacheDataSet, self).__init__(dataset.corpus, batch_size=dataset.batch_size)
+        self.dataset = dataset
+        self.feature_cache = feature_cache
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    def update_cache(self, embed_model: tf.keras.Model) -> int:
+        """
+        Compute and store the features of all corpus samples which are not cached yet.
+
+        Args:
+            embed_model: frozen embedding model.
+
+        Returns:
+            number of new cached samples.
+        """
+        def iter_batches() -> Iterator[Any]:
+            # go through the whole corpus in order, the batch iteration drops the last incomplete batch.
+            samples = iter(self.corpus)
+            while True:
+                batch = list(itertools.islice(samples, self.batch_size))
+                if not batch:
+                    return
+                batch_x, batch_y = zip(*batch)
+                yield self.dataset._transform_batch(list(batch_x), list(batch_y))[0]
+
+        return self.feature_cache.update(embed_model, iter_batches(), batch_size=self.batch_size)
+
+    def _iter_raw_batches(self) -> Iterator[Tuple[List, List]]:
+        return self.dataset._iter_raw_batches()
+
+    def _transform_batch(self, batch_x: List, batch_y: List) -> Tuple[Any, Any]:
+        x_tensor, y_tensor = self.dataset._transform_batch(batch_x, batch_y)
+        return self.feature_cache.lookup(x_tensor), y_tensor
+
+
+if __name__ == "__main__":
+    pass
@@ -14,6 +14,7 @@ from typing import Dict, List, Any, Optional
 from bert4keras.models import build_transformer_model
 
 from kashgari.embeddings.abc_embedding import ABCEmbedding
+from kashgari.embeddings.feature_cache import FeatureCache
 from kashgari.logger import logger
 
 
@@ -28,6 +29,7 @@ class TransformerEmbedding(ABCEmbedding):
         info_dic['config']['config_path'] = self.config_path
         info_dic['config']['checkpoint_path'] = self.checkpoint_path
         info_dic['config']['model_type'] = self.model_type
+        info_dic['config']['feature_cache_dir'] = self.feature_cache_dir
         return info_dic
 
     def __init__(self,
@@ -35,6 +37,7 @@ class TransformerEmbedding(ABCEmbedding):
                  config_path: str,
                  checkpoint_path: str,
                  model_type: str = 'bert',
+                 feature_cache_dir: str = None,
                  **kwargs: Any):
         """
 
@@ -43,15 +46,21 @@ class TransformerEmbedding(ABCEmbedding):
             config_path: model config path, example `config.json`
             checkpoint_path: model weight path, example `model.ckpt-100000`
             model_type: transfer model type, {bert, albert, nezha, gpt2_ml, t5}
+            feature_cache_dir: folder of the feature cache. When set, the frozen transformer runs only once
+              over the training corpus, the contextual vectors are stored in this folder and the task
+              layers are trained with the cached vectors. See :class:`kashgari.embeddings.FeatureCache`.
             kwargs: additional params
         """
         self.vocab_path = vocab_path
         self.config_path = config_path
         self.checkpoint_path = checkpoint_path
         self.model_type = model_type
+        self.feature_cache_dir = feature_cache_dir
         self.vocab_list: List[str] = []
         kwargs['segment'] = True
         super(TransformerEmbedding, self).__init__(**kwargs)
+        if feature_cache_dir:
+            self.feature_cache = FeatureCache(feature_cache_dir)
 
     def load_embed_vocab(self) -> Optional[Dict[str, int]]:
         token2idx: Dict[str, int] = {}
@@ -7,7 +7,11 @@
 # file: word_embedding.py
 # time: 3:06 下午
 
-from typing import Dict, Any, Optional
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Any, Optional, List, Tuple
 
 import numpy as np
 from gensim.models import KeyedVectors
@@ -15,6 +19,8 @@ from tensorflow import keras
 
 from kashgari.embeddings.abc_embedding import ABCEmbedding
 from kashgari.logger import logger
+from kashgari.macros import DATA_PATH
+from kashgari.processors import ABCProcessor
 
 L = keras.layers
 
@@ -24,18 +30,39 @@ class WordEmbedding(ABCEmbedding):
         info_dic = super(WordEmbedding, self).to_dict()
         info_dic['config']['w2v_path'] = self.w2v_path
         info_dic['config']['w2v_kwargs'] = self.w2v_kwargs
+        info_dic['config']['use_cache'] = self.use_cache
+        info_dic['config']['cache_dir'] = self.cache_dir
+        info_dic['config']['prune_vocab'] = self.prune_vocab
+        info_dic['config']['max_vocab_size'] = self.max_vocab_size
+        if self.pruned_vocab2idx:
+            info_dic['config']['pruned_vocab2idx'] = self.pruned_vocab2idx
         return info_dic
 
     def __init__(self,
                  w2v_path: str,
                  *,
                  w2v_kwargs: Dict[str, Any] = None,
+                 use_cache: bool = True,
+                 cache_dir: str = None,
+                 prune_vocab: bool = False,
+                 max_vocab_size: int = None,
+                 pruned_vocab2idx: Dict[str, int] = None,
                  **kwargs: Any):
         """
         Args:
             w2v_path: Word2Vec file path.
             w2v_kwargs: params pass to the ``load_word2vec_format()`` function
               of `gensim.models.KeyedVectors <https://radimrehurek.com/gensim/models/keyedvectors.html#module-gensim.models.keyedvectors>`_
+            use_cache: cache the parsed vocab and float32 vectors at the first load, later loads
+              memory-map the cached vectors instead of parsing the Word2Vec file. The cache is keyed by
+              the file path, modify time, size and ``w2v_kwargs``. Default True.
+            cache_dir: directory of the cache, default is ``~/.kashgari/w2v_cache``.
+            prune_vocab: prune the embedding matrix to the tokens of the text processor's vocab,
+              which is built from the training corpus. Saved model only contains the pruned matrix
+              and could be loaded without the Word2Vec file. Default False.
+            max_vocab_size: keep only the most frequent corpus tokens when pruning,
+              max vocab size including the build-in tokens. Default None, keep all corpus tokens.
+            pruned_vocab2idx: vocab of a pruned embedding, used when loading a saved model.
             kwargs: additional params
         """
         if w2v_kwargs is None:
@@ -43,32 +70,92 @@ class WordEmbedding(ABCEmbedding):
 
         self.w2v_path = w2v_path
         self.w2v_kwargs = w2v_kwargs
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.prune_vocab = prune_vocab
+        self.max_vocab_size = max_vocab_size
+        self.pruned_vocab2idx = pruned_vocab2idx
 
         self.embedding_size = None
         self.w2v_matrix: np.ndarray = None
 
         super(WordEmbedding, self).__init__(**kwargs)
 
-    def load_embed_vocab(self) -> Optional[Dict[str, int]]:
+    def _get_cache_path(self) -> str:
+        cache_dir = self.cache_dir or os.path.join(DATA_PATH, 'w2v_cache')
+        file_stat = os.stat(self.w2v_path)
+        cache_key = json.dumps({
+            'w2v_path': os.path.abspath(self.w2v_path),
+            'mtime': file_stat.st_mtime,
+            'size': file_stat.st_size,
+            'w2v_kwargs': self.w2v_kwargs
+        }, sort_keys=True, default=str)
+        return os.path.join(cache_dir, hashlib.md5(cache_key.encode('utf-8')).hexdigest())
+
+    def _read_w2v(self, cache_path: str = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Parse the Word2Vec file, vectors are written to the cache file directly when cache_path is set.
+        """
         w2v = KeyedVectors.load_word2vec_format(self.w2v_path, **self.w2v_kwargs)
+        # gensim 4 renamed `index2word` to `index_to_key`
+        w2v_tokens = w2v.index_to_key if hasattr(w2v, 'index_to_key') else w2v.index2word
+        tokens = ['[PAD]', '[UNK]', '[BOS]', '[EOS]'] + list(w2v_tokens)
+
+        shape = (len(tokens), w2v.vector_size)
+        if cache_path:
+            vector_matrix = np.lib.format.open_memmap(os.path.join(cache_path, 'vectors.npy'),
+                                                      mode='w+', dtype=np.float32, shape=shape)
+            vector_matrix[:4] = 0
+        else:
+            vector_matrix = np.zeros(shape, dtype=np.float32)
+        vector_matrix[1] = np.random.rand(w2v.vector_size)
+        vector_matrix[4:] = w2v.vectors
+        if isinstance(vector_matrix, np.memmap):
+            vector_matrix.flush()
+        return tokens, vector_matrix
+
+    def _load_w2v_cache(self) -> Tuple[List[str], np.ndarray]:
+        cache_path = self._get_cache_path()
+        if not os.path.exists(cache_path):
+            logger.info(f'Building Word2Vec cache of {self.w2v_path} at {cache_path}')
+            # build in a temp folder and rename, so that an interrupted build never leaves a broken cache.
+            temp_path = f'{cache_path}.{os.getpid()}.tmp'
+            os.makedirs(temp_path, exist_ok=True)
+            try:
+                tokens, vector_matrix = self._read_w2v(temp_path)
+                del vector_matrix
+                with open(os.path.join(temp_path, 'vocab.json'), 'w', encoding='utf-8') as f:
+                    json.dump(tokens, f, ensure_ascii=False)
+                os.rename(temp_path, cache_path)
+            except OSError:
+                # cache built by another process at the same time
+                if not os.path.exists(cache_path):
+                    raise
+            finally:
+                shutil.rmtree(temp_path, ignore_errors=True)
+
+        with open(os.path.join(cache_path, 'vocab.json'), 'r', encoding='utf-8') as f:
+            tokens = json.load(f)
+        vector_matrix = np.load(os.path.join(cache_path, 'vectors.npy'), mmap_mode='r')
+        return tokens, vector_matrix
 
-        token2idx = {
-            '[PAD]': 0,
-            '[UNK]': 1,
-            '[BOS]': 2,
-            '[EOS]': 3
-        }
+    def load_embed_vocab(self) -> Optional[Dict[str, int]]:
+        if self.pruned_vocab2idx:
+            # pruned embedding restored from a saved model, weights are loaded with the embed model.
+            return self.pruned_vocab2idx
 
-        for token in w2v.index2word:
-            token2idx[token] = len(token2idx)
+        if self.use_cache:
+            tokens, vector_matrix = self._load_w2v_cache()
+        else:
+            tokens, vector_matrix = self._read_w2v()
 
-        vector_matrix = np.zeros((len(token2idx), w2v.vector_size))
-        vector_matrix[1] = np.random.rand(w2v.vector_size)
-        vector_matrix[4:] = w2v.vectors
+        token2idx = {}
+        for index, token in enumerate(tokens):
+            token2idx[token] = index
 
-        self.embedding_size = w2v.vector_size
+        self.embedding_size = vector_matrix.shape[1]
         self.w2v_matrix = vector_matrix
-        w2v_top_words = w2v.index2entity[:50]
+        w2v_top_words = tokens[4:54]
 
         logger.debug('------------------------------------------------')
         logger.debug('Loaded gensim word2vec model')
@@ -79,6 +166,37 @@ class WordEmbedding(ABCEmbedding):
 
         return token2idx
 
+    def setup_text_processor(self, processor: ABCProcessor) -> None:
+        if self.prune_vocab and self.embed_model is None:
+            if processor.vocab2idx:
+                self._prune_to_vocab(processor.vocab2idx)
+            else:
+                logger.warning('Text processor vocab is empty, skip the embedding vocab pruning.')
+        super(WordEmbedding, self).setup_text_processor(processor)
+
+    def _prune_to_vocab(self, corpus_vocab2idx: Dict[str, int]) -> None:
+        """
+        Prune the embedding vocab and matrix to the corpus tokens, the build-in tokens are always kept.
+
+        Args:
+            corpus_vocab2idx: corpus vocab dict ordered by token frequency.
+        """
+        tokens = ['[PAD]', '[UNK]', '[BOS]', '[EOS]']
+        indexes = [self.vocab2idx[token] for token in tokens]
+        for token in corpus_vocab2idx:
+            if self.max_vocab_size is not None and len(tokens) >= self.max_vocab_size:
+                break
+            index = self.vocab2idx.get(token)
+            if index is not None and index >= 4:
+                tokens.append(token)
+                indexes.append(index)
+
+        logger.info(f'Pruned embedding vocab from {len(self.vocab2idx)} to {len(tokens)} tokens')
+        # fancy indexing copies the selected rows, so the full matrix could be released.
+        self.w2v_matrix = self.w2v_matrix[np.array(indexes)]
+        self.vocab2idx = dict([(token, index) for index, token in enumerate(tokens)])
+        self.pruned_vocab2idx = self.vocab2idx
+
     def build_embedding_model(self,
                               *,
                               vocab_size: int = None,
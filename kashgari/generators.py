@@ -7,9 +7,14 @@
 # file: generator.py
 # time: 4:53 下午
 
+import bisect
+import itertools
+import json
+import os
 from abc import ABC
+from array import array
 from typing import Iterable, Iterator, TYPE_CHECKING
-from typing import List, Any, Tuple
+from typing import List, Any, Tuple, Union, Dict
 
 import numpy as np
 import tensorflow as tf
@@ -19,8 +24,15 @@ if TYPE_CHECKING:
 
 
 class ABCGenerator(Iterable, ABC):
-    def __init__(self, buffer_size: int = 2000) -> None:
+    def __init__(self, buffer_size: int = 2000, seed: int = None) -> None:
+        """
+        Args:
+            buffer_size: size of the shuffle buffer used by :meth:`sample`.
+            seed: random seed of the shuffle buffer, set it for reproducible sampling.
+        """
         self.buffer_size = buffer_size
+        self.seed = seed
+        self.random_state = np.random.default_rng(seed)
 
     def __iter__(self) -> Iterator[Tuple[Any, Any]]:
         raise NotImplementedError
@@ -28,18 +40,53 @@ class ABCGenerator(Iterable, ABC):
     def __len__(self) -> int:
         raise NotImplementedError
 
+    def shard(self, num_shards: int, index: int) -> 'ABCGenerator':
+        """
+        Get the ``index``-th of ``num_shards`` disjoint shards of the corpus, which is used for
+        data-parallel training, every worker trains with its own shard.
+
+        Shards contain every ``num_shards``-th sample starting from ``index``, and the remainder samples
+        are dropped, so all shards have the same length and the workers run the same number of steps.
+
+        Args:
+            num_shards: number of shards, usually the number of workers.
+            index: index of the shard, usually the index of the worker.
+
+        Returns:
+            sample generator of the shard.
+        """
+        return ShardedGenerator(self, num_shards, index)
+
+    def _random_indices(self, chunk_size: int = 1024) -> Iterator[float]:
+        # draw random numbers in chunks, calling numpy per sample is much slower.
+        while True:
+            yield from self.random_state.random(chunk_size).tolist()
+
     def sample(self) -> Iterator[Tuple[Any, Any]]:
-        buffer, is_full = [], False
+        """
+        Iterate samples in random order with a shuffle buffer of ``buffer_size``.
+        """
+        buffer_size = self.buffer_size
+        buffer: List[Any] = [None] * buffer_size
+        randoms = self._random_indices()
+        count = 0
         for sample in self:
-            buffer.append(sample)
-            if is_full:
-                i = np.random.randint(len(buffer))
-                yield buffer.pop(i)
-            elif len(buffer) == self.buffer_size:
-                is_full = True
-        while buffer:
-            i = np.random.randint(len(buffer))
-            yield buffer.pop(i)
+            if count < buffer_size:
+                buffer[count] = sample
+                count += 1
+                continue
+            # the incoming sample is a candidate too, same as pick one from buffer_size + 1 samples.
+            i = int(next(randoms) * (buffer_size + 1))
+            if i < buffer_size:
+                buffer[i], sample = sample, buffer[i]
+            yield sample
+        while count > 0:
+            i = int(next(randoms) * count)
+            count -= 1
+            yield buffer[i]
+            # swap the last sample into the hole, so the active buffer is always buffer[:count]
+            buffer[i] = buffer[count]
+            buffer[count] = None
 
 
 class CorpusGenerator(ABCGenerator):
@@ -48,8 +95,9 @@ class CorpusGenerator(ABCGenerator):
                  x_data: List,
                  y_data: List,
                  *,
-                 buffer_size: int = 2000) -> None:
-        super(CorpusGenerator, self).__init__(buffer_size=buffer_size)
+                 buffer_size: int = 2000,
+                 seed: int = None) -> None:
+        super(CorpusGenerator, self).__init__(buffer_size=buffer_size, seed=seed)
         self.x_data = x_data
         self.y_data = y_data
         self.buffer_size = buffer_size
@@ -61,8 +109,419 @@ class CorpusGenerator(ABCGenerator):
     def __len__(self) -> int:
         return len(self.x_data)
 
+    def shard(self, num_shards: int, index: int) -> 'CorpusGenerator':
+        if not 0 <= index < num_shards:
+            raise ValueError(f'Shard index should be in [0, {num_shards}), got {index}.')
+        stop = len(self) // num_shards * num_shards
+        return CorpusGenerator(self.x_data[index:stop:num_shards],
+                               self.y_data[index:stop:num_shards],
+                               buffer_size=self.buffer_size,
+                               seed=self.seed)
+
+
+class ShardedGenerator(ABCGenerator):
+    """
+    Every ``num_shards``-th sample of the corpus starting from ``index``, see :meth:`ABCGenerator.shard`.
+    """
 
-class BatchDataSet(Iterable):
+    def __init__(self,
+                 corpus: ABCGenerator,
+                 num_shards: int,
+                 index: int) -> None:
+        if not 0 <= index < num_shards:
+            raise ValueError(f'Shard index should be in [0, {num_shards}), got {index}.')
+        super(ShardedGenerator, self).__init__(buffer_size=corpus.buffer_size, seed=corpus.seed)
+        self.corpus = corpus
+        self.num_shards = num_shards
+        self.index = index
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        return itertools.islice(self.corpus, self.index, len(self) * self.num_shards, self.num_shards)
+
+    def __len__(self) -> int:
+        return len(self.corpus) // self.num_shards
+
+
+class BinaryCorpusGenerator(ABCGenerator):
+    """
+    Corpus of pre-numericalized samples stored in flat binary files, which are memory-mapped
+    instead of loaded, so that corpus larger than memory can be used with O(1) random access.
+
+    Build the files once with :meth:`build` after the processor vocabs are ready, then
+    use the generator like :class:`CorpusGenerator`. Batches from this corpus are padded by
+    the processors' ``transform_numerized`` method.
+
+    Files in the corpus directory:
+
+    - ``x_ids.bin``, ``y_ids.bin``: int32 ids of all samples, concatenated.
+    - ``x_offsets.bin``, ``y_offsets.bin``: int64 start offset of every sample, plus the end offset.
+    - ``meta.json``: sample count and label format.
+    """
+
+    META_FILE = 'meta.json'
+
+    def __init__(self,
+                 path: str,
+                 *,
+                 buffer_size: int = 2000,
+                 seed: int = None) -> None:
+        """
+        Args:
+            path: directory of the binary corpus created by :meth:`build`.
+            buffer_size: not used, samples are shuffled with a full permutation.
+            seed: random seed of the sampling.
+        """
+        super(BinaryCorpusGenerator, self).__init__(buffer_size=buffer_size, seed=seed)
+        self.path = path
+        with open(os.path.join(path, self.META_FILE), 'r') as f:
+            self.meta = json.load(f)
+        self.sample_count: int = self.meta['sample_count']
+        self.scalar_label: bool = self.meta['scalar_label']
+
+        self.x_ids = self._load_array('x_ids.bin', np.int32)
+        self.x_offsets = self._load_array('x_offsets.bin', np.int64)
+        self.y_ids = self._load_array('y_ids.bin', np.int32)
+        self.y_offsets = self._load_array('y_offsets.bin', np.int64)
+
+    def _load_array(self, file_name: str, dtype: Any) -> np.ndarray:
+        file_path = os.path.join(self.path, file_name)
+        # numpy could not memory-map an empty file
+        if os.path.getsize(file_path) == 0:
+            return np.zeros((0,), dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode='r')
+
+    @classmethod
+    def build(cls,
+              corpus: Iterable[Tuple[Any, Any]],
+              path: str,
+              *,
+              text_processor: 'ABCProcessor',
+              label_processor: 'ABCProcessor',
+              chunk_size: int = 10000,
+              buffer_size: int = 2000,
+              seed: int = None) -> 'BinaryCorpusGenerator':
+        """
+        Numericalize the corpus with processors and write it to the binary format in a streaming pass.
+        Processor vocabs need to be built before, for example by building the model first.
+
+        Args:
+            corpus: iterable of ``(x, y)`` samples, such as a :class:`CorpusGenerator`.
+            path: target directory, will be created if not exists.
+            text_processor: processor for the features.
+            label_processor: processor for the labels.
+            chunk_size: number of samples to numericalize and write at once.
+            buffer_size: buffer size of the created generator.
+            seed: random seed of the created generator.
+
+        Returns:
+            generator of the created binary corpus.
+        """
+        os.makedirs(path, exist_ok=True)
+        x_offsets = array('q', [0])
+        y_offsets = array('q', [0])
+        scalar_label = False
+        sample_count = 0
+
+        samples = iter(corpus)
+        with open(os.path.join(path, 'x_ids.bin'), 'wb') as x_file, \
+                open(os.path.join(path, 'y_ids.bin'), 'wb') as y_file:
+            while True:
+                chunk = list(itertools.islice(samples, chunk_size))
+                if not chunk:
+                    break
+                x_ids = text_processor.numerize([x for x, _ in chunk])
+                y_ids = label_processor.numerize([y for _, y in chunk])
+                scalar_label = bool(y_ids) and np.ndim(y_ids[0]) == 0
+                if scalar_label:
+                    y_ids = [[i] for i in y_ids]
+                for ids, file, offsets in ((x_ids, x_file, x_offsets), (y_ids, y_file, y_offsets)):
+                    for i in ids:
+                        offsets.append(offsets[-1] + len(i))
+                    np.concatenate([np.asarray(i, dtype=np.int32) for i in ids]).tofile(file)
+                sample_count += len(chunk)
+
+        np.frombuffer(x_offsets, dtype=np.int64).tofile(os.path.join(path, 'x_offsets.bin'))
+        np.frombuffer(y_offsets, dtype=np.int64).tofile(os.path.join(path, 'y_offsets.bin'))
+        with open(os.path.join(path, cls.META_FILE), 'w') as f:
+            json.dump({'sample_count': sample_count, 'scalar_label': scalar_label}, f)
+        return cls(path, buffer_size=buffer_size, seed=seed)
+
+    @property
+    def text_lengths(self) -> np.ndarray:
+        """
+        token count of every sample, without reading the ids.
+        """
+        return np.diff(self.x_offsets)
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, Any]:
+        x = self.x_ids[self.x_offsets[index]:self.x_offsets[index + 1]]
+        if self.scalar_label:
+            return x, int(self.y_ids[index])
+        return x, self.y_ids[self.y_offsets[index]:self.y_offsets[index + 1]]
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        for i in range(self.sample_count):
+            yield self[i]
+
+    def __len__(self) -> int:
+        return self.sample_count
+
+    def sample(self) -> Iterator[Tuple[Any, Any]]:
+        """
+        Iterate samples in random order. With random access, the whole corpus
+        is shuffled instead of using the shuffle buffer.
+        """
+        for i in self.random_state.permutation(self.sample_count).tolist():
+            yield self[i]
+
+
+class ConllCorpusGenerator(ABCGenerator):
+    """
+    Stream ``(tokens, labels)`` samples from a CoNLL format file, without loading the file into memory.
+
+    Each line holds one token and its label in columns, sentences are separated by lines with a
+    single column, such as blank lines or ``-DOCSTART-``. Empty sentences are skipped.
+
+    The byte range of every sentence is recorded during the first complete pass, later passes use
+    this index for the length and for shuffling the whole corpus with random access.
+    """
+
+    def __init__(self,
+                 file_path: str,
+                 *,
+                 text_index: int = 0,
+                 label_index: int = 1,
+                 separator: str = ' ',
+                 encoding: str = 'utf-8',
+                 use_index: bool = True,
+                 index_path: str = None,
+                 buffer_size: int = 2000,
+                 seed: int = None) -> None:
+        """
+        Args:
+            file_path: path of the CoNLL format file.
+            text_index: column index of the tokens, default 0.
+            label_index: column index of the labels, default 1.
+            separator: column separator, None for splitting by any whitespace.
+            encoding: file encoding.
+            use_index: record the sentence offsets at the first pass, then :meth:`sample` shuffles the
+                whole corpus with random access. Otherwise samples are shuffled with the shuffle buffer.
+            index_path: ``.npz`` file to save and load the sentence offsets index,
+                the index is rebuilt when the file has been modified.
+            buffer_size: size of the shuffle buffer used when the index is disabled.
+            seed: random seed of the sampling.
+        """
+        super(ConllCorpusGenerator, self).__init__(buffer_size=buffer_size, seed=seed)
+        self.file_path = file_path
+        self.text_index = text_index
+        self.label_index = label_index
+        self.separator = separator
+        self.encoding = encoding
+        self.use_index = use_index
+        self.index_path = index_path
+        # start and end byte offsets of the sentences, shape (sentence_count, 2)
+        self.offsets: np.ndarray = None  # type: ignore
+
+        if use_index and index_path and os.path.exists(index_path):
+            index = np.load(index_path)
+            if index['file_stat'].tolist() == self._file_stat():
+                self.offsets = index['offsets']
+
+    def _file_stat(self) -> List[int]:
+        file_stat = os.stat(self.file_path)
+        return [file_stat.st_size, file_stat.st_mtime_ns]
+
+    def _parse_line(self, line: bytes) -> List[str]:
+        return line.decode(self.encoding).rstrip('\r\n').split(self.separator)
+
+    def _scan(self, parse: bool = True) -> Iterator[Tuple[int, int, List[str], List[str]]]:
+        """
+        Read the file line by line, yield ``(start, end, tokens, labels)`` of every sentence.
+        Tokens and labels are empty lists when ``parse`` is False.
+        """
+        x: List[str] = []
+        y: List[str] = []
+        start, offset, sentence_end = 0, 0, 0
+        in_sentence = False
+        with open(self.file_path, 'rb') as f:
+            for line in f:
+                rows = self._parse_line(line)
+                if len(rows) <= 1:
+                    if in_sentence:
+                        yield start, sentence_end, x, y
+                        x, y = [], []
+                        in_sentence = False
+                else:
+                    if not in_sentence:
+                        start = offset
+                        in_sentence = True
+                    if parse:
+                        x.append(rows[self.text_index])
+                        y.append(rows[self.label_index])
+                    sentence_end = offset + len(line)
+                offset += len(line)
+        if in_sentence:
+            yield start, sentence_end, x, y
+
+    def _set_offsets(self, offsets: List[int]) -> None:
+        self.offsets = np.array(offsets, dtype=np.int64).reshape(-1, 2)
+        if self.index_path:
+            np.savez(self.index_path, offsets=self.offsets, file_stat=np.array(self._file_stat()))
+
+    def build_index(self) -> None:
+        """
+        Scan the file for the sentence offsets without parsing the columns.
+        """
+        offsets = array('q')
+        for start, end, _, _ in self._scan(parse=False):
+            offsets.extend((start, end))
+        self._set_offsets(offsets)  # type: ignore
+
+    def __iter__(self) -> Iterator[Tuple[List[str], List[str]]]:
+        record_offsets = self.use_index and self.offsets is None
+        offsets = array('q')
+        for start, end, x, y in self._scan():
+            if record_offsets:
+                offsets.extend((start, end))
+            yield x, y
+        # only a complete pass gives the full index
+        if record_offsets:
+            self._set_offsets(offsets)  # type: ignore
+
+    def __len__(self) -> int:
+        if self.offsets is None:
+            self.build_index()
+        return len(self.offsets)
+
+    def _read_sentence(self, file: Any, index: int) -> Tuple[List[str], List[str]]:
+        start, end = self.offsets[index].tolist()
+        file.seek(start)
+        x, y = [], []
+        for line in file.read(end - start).splitlines():
+            rows = self._parse_line(line)
+            if len(rows) > 1:
+                x.append(rows[self.text_index])
+                y.append(rows[self.label_index])
+        return x, y
+
+    def __getitem__(self, index: int) -> Tuple[List[str], List[str]]:
+        if self.offsets is None:
+            self.build_index()
+        with open(self.file_path, 'rb') as f:
+            return self._read_sentence(f, index)
+
+    def sample(self) -> Iterator[Tuple[List[str], List[str]]]:
+        """
+        Iterate samples in random order. When the index is enabled, the whole corpus
+        is shuffled by seeking to the sentences, otherwise the shuffle buffer is used.
+        """
+        if not self.use_index:
+            yield from super(ConllCorpusGenerator, self).sample()
+            return
+        if self.offsets is None:
+            self.build_index()
+        with open(self.file_path, 'rb') as f:
+            for i in self.random_state.permutation(len(self.offsets)).tolist():
+                yield self._read_sentence(f, i)
+
+
+class ABCDataSet(Iterable, ABC):
+    """
+    Base class of the batch datasets, which groups corpus samples into batches
+    and numericalize them with processors.
+    """
+
+    def __init__(self,
+                 corpus: ABCGenerator,
+                 *,
+                 batch_size: int = 64) -> None:
+        self.corpus = corpus
+        self.batch_size = batch_size
+
+    def __len__(self) -> int:
+        return max(len(self.corpus) // self.batch_size, 1)
+
+    def _iter_raw_batches(self) -> Iterator[Tuple[List, List]]:
+        batch_x, batch_y = [], []
+        for x, y in self.corpus.sample():
+            batch_x.append(x)
+            batch_y.append(y)
+            if len(batch_x) == self.batch_size:
+                yield batch_x, batch_y
+                batch_x, batch_y = [], []
+
+    def _transform_batch(self, batch_x: List, batch_y: List) -> Tuple[Any, Any]:
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator:
+        for batch_x, batch_y in self._iter_raw_batches():
+            yield self._transform_batch(batch_x, batch_y)
+
+    def as_tf_dataset(self,
+                      batch_count: int = None,
+                      *,
+                      num_parallel_calls: int = tf.data.experimental.AUTOTUNE,
+                      prefetch: int = tf.data.experimental.AUTOTUNE,
+                      cache: Union[bool, str] = False) -> tf.data.Dataset:
+        """
+        Build a ``tf.data.Dataset`` from this dataset. Batches are grouped in python,
+        then numericalized in the ``tf.data`` runtime, so that the input preparation
+        runs in parallel with the model computation.
+
+        Args:
+            batch_count: number of batch count, iterate forever when batch_count is None.
+            num_parallel_calls: number of batches to numericalize in parallel.
+            prefetch: number of batches to prefetch, 0 to disable prefetching.
+            cache: cache numericalized batches after the first pass, ``True`` for caching in memory
+                or a file path for caching in file. Cached batches won't be reshuffled in later epochs.
+
+        Returns:
+            A ``tf.data.Dataset`` yields ``(x, y)`` batches.
+        """
+        x0, y0 = next(iter(self.corpus))
+        sample = self._transform_batch([x0], [y0])
+        flat_sample = tf.nest.flatten(sample)
+        output_types = [tf.as_dtype(np.asarray(i).dtype) for i in flat_sample]
+
+        # Raw batches are kept in python and passed to the tf.data graph by key,
+        # because token lists can not be represented as a dense tensor.
+        raw_batches: Dict[int, Tuple[List, List]] = {}
+        batch_keys = itertools.count()
+
+        def key_generator() -> Iterator[int]:
+            for raw_batch in self._iter_raw_batches():
+                key = next(batch_keys)
+                raw_batches[key] = raw_batch
+                yield key
+
+        def transform_key(key: np.ndarray) -> List[np.ndarray]:
+            batch_x, batch_y = raw_batches.pop(int(key))
+            flat_tensors = tf.nest.flatten(self._transform_batch(batch_x, batch_y))
+            return [np.asarray(t, dtype=d.as_numpy_dtype) for t, d in zip(flat_tensors, output_types)]
+
+        def transform(key: tf.Tensor) -> Any:
+            flat_tensors = tf.numpy_function(transform_key, [key], output_types)
+            for tensor, sample_tensor in zip(flat_tensors, flat_sample):
+                tensor.set_shape([None] * np.ndim(sample_tensor))
+            return tf.nest.pack_sequence_as(sample, flat_tensors)
+
+        dataset = tf.data.Dataset.from_generator(key_generator,
+                                                 output_types=tf.int64,
+                                                 output_shapes=())
+        dataset = dataset.map(transform, num_parallel_calls=num_parallel_calls)
+        if cache is True:
+            dataset = dataset.cache()
+        elif cache:
+            dataset = dataset.cache(cache)
+        dataset = dataset.repeat()
+        if batch_count is not None:
+            dataset = dataset.take(batch_count)
+        if prefetch:
+            dataset = dataset.prefetch(prefetch)
+        return dataset
+
+
+class BatchDataSet(ABCDataSet):
     def __init__(self,
                  corpus: CorpusGenerator,
                  *,
@@ -71,8 +530,24 @@ class BatchDataSet(Iterable):
                  seq_length: int = None,
                  max_position: int = None,
                  segment: bool = False,
-                 batch_size: int = 64) -> None:
-        self.corpus = corpus
+                 batch_size: int = 64,
+                 bucket_boundaries: Union[int, List[int]] = None) -> None:
+        """
+        Args:
+            corpus: sample generator.
+            text_processor: processor for the features.
+            label_processor: processor for the labels.
+            seq_length: target sequence length, batch will be truncated to this length.
+            max_position: max sequence length of the embedding.
+            segment: return segment tensor or not.
+            batch_size: batch size.
+            bucket_boundaries: group samples with similar length into the same batch,
+                and pad each batch to the max length of its own samples.
+                Could be a list of sequence length boundaries, for example ``[10, 20, 40]``,
+                or number of buckets, then boundaries will be calculated with length quantiles of the corpus.
+                Default is None, which means no bucketing.
+        """
+        super(BatchDataSet, self).__init__(corpus, batch_size=batch_size)
         self.text_processor = text_processor
         self.label_processor = label_processor
 
@@ -80,26 +555,83 @@ class BatchDataSet(Iterable):
         self.max_position = max_position
         self.segment = segment
 
-        self.batch_size = batch_size
+        self.bucket_boundaries = bucket_boundaries
+        self._bucket_boundaries: List[int] = None  # type: ignore
+        self._bucket_batch_count: int = None  # type: ignore
 
     def __len__(self) -> int:
-        return max(len(self.corpus) // self.batch_size, 1)
-
-    def __iter__(self) -> Iterator:
-        batch_x, batch_y = [], []
+        if self.bucket_boundaries is None:
+            return super(BatchDataSet, self).__len__()
+        if self._bucket_batch_count is None:
+            self._setup_buckets()
+        return max(self._bucket_batch_count, 1)
+
+    def _setup_buckets(self) -> None:
+        if isinstance(self.corpus, BinaryCorpusGenerator):
+            seq_lens = self.corpus.text_lengths
+        else:
+            seq_lens = np.array([len(x) for x, _ in self.corpus])
+        if isinstance(self.bucket_boundaries, int):
+            quantiles = np.linspace(0, 1, self.bucket_boundaries + 1)[1:-1]
+            boundaries = np.unique(np.quantile(seq_lens, quantiles).astype(int))
+            self._bucket_boundaries = [int(i) for i in boundaries]
+        else:
+            self._bucket_boundaries = sorted(self.bucket_boundaries)  # type: ignore
+        # the rest samples of every bucket are flushed as a smaller batch at the end of each pass.
+        bucket_sizes = np.bincount(np.searchsorted(self._bucket_boundaries, seq_lens, side='left'))
+        self._bucket_batch_count = int(np.ceil(bucket_sizes / self.batch_size).sum())
+
+    def _get_bucket_boundaries(self) -> List[int]:
+        if self._bucket_boundaries is None:
+            self._setup_buckets()
+        return self._bucket_boundaries
+
+    def _bucket_seq_length(self, batch_x: List) -> int:
+        # +2 for the bos and eos token
+        seq_length = max([len(x) for x in batch_x]) + 2
+        if self.seq_length is not None:
+            seq_length = min(seq_length, self.seq_length)
+        return seq_length
+
+    def _transform_batch(self, batch_x: List, batch_y: List) -> Tuple[Any, Any]:
+        if self.bucket_boundaries is not None:
+            seq_length = self._bucket_seq_length(batch_x)
+        else:
+            seq_length = self.seq_length
+        if isinstance(self.corpus, BinaryCorpusGenerator):
+            text_transform = self.text_processor.transform_numerized
+            label_transform = self.label_processor.transform_numerized
+        else:
+            text_transform = self.text_processor.transform
+            label_transform = self.label_processor.transform
+        x_tensor = text_transform(batch_x,
+                                  seq_length=seq_length,
+                                  max_position=self.max_position,
+                                  segment=self.segment)
+        y_tensor = label_transform(batch_y,
+                                   seq_length=seq_length,
+                                   max_position=self.max_position)
+        return x_tensor, y_tensor
+
+    def _iter_raw_batches(self) -> Iterator[Tuple[List, List]]:
+        if self.bucket_boundaries is None:
+            yield from super(BatchDataSet, self)._iter_raw_batches()
+            return
+
+        boundaries = self._get_bucket_boundaries()
+        buckets: List[Tuple[List, List]] = [([], []) for _ in range(len(boundaries) + 1)]
         for x, y in self.corpus.sample():
-            batch_x.append(x)
-            batch_y.append(y)
-            if len(batch_x) == self.batch_size:
-                x_tensor = self.text_processor.transform(batch_x,
-                                                         seq_length=self.seq_length,
-                                                         max_position=self.max_position,
-                                                         segment=self.segment)
-                y_tensor = self.label_processor.transform(batch_y,
-                                                          seq_length=self.seq_length,
-                                                          max_position=self.max_position)
-                yield x_tensor, y_tensor
-                batch_x, batch_y = [], []
+            bucket_x, bucket_y = buckets[bisect.bisect_left(boundaries, len(x))]
+            bucket_x.append(x)
+            bucket_y.append(y)
+            if len(bucket_x) == self.batch_size:
+                yield bucket_x[:], bucket_y[:]
+                bucket_x.clear()
+                bucket_y.clear()
+        # flush the rest samples, otherwise we will lose up to (batch_size - 1) samples per bucket
+        for bucket_x, bucket_y in buckets:
+            if bucket_x:
+                yield bucket_x, bucket_y
 
     def take(self, batch_count: int = None) -> Any:
         """
@@ -111,24 +643,13 @@ class BatchDataSet(Iterable):
         i = 0
         while True:
             for batch_x, batch_y in self.__iter__():
-                while batch_count is None or i < batch_count:
-                    i += 1
-                    yield batch_x, batch_y
-                break
-
-        # x_shape = self.text_processor.get_tensor_shape(self.batch_size, self.seq_length)
-        # y_shape = self.label_processor.get_tensor_shape(self.batch_size, self.seq_length)
-        # dataset = tf.data.Dataset.from_generator(self.__iter__,
-        #                                          output_types=(tf.int64, tf.int64),
-        #                                          output_shapes=(x_shape, y_shape))
-        # dataset = dataset.repeat()
-        # dataset = dataset.prefetch(50)
-        # if batch_count is None:
-        #     batch_count = len(self)
-        # return dataset.take(batch_count)
-
-
-class Seq2SeqDataSet(Iterable):
+                if batch_count is not None and i >= batch_count:
+                    return
+                i += 1
+                yield batch_x, batch_y
+
+
+class Seq2SeqDataSet(ABCDataSet):
     def __init__(self,
                  corpus: CorpusGenerator,
                  *,
@@ -139,7 +660,7 @@ class Seq2SeqDataSet(Iterable):
                  decoder_seq_length: int = None,
                  encoder_segment: bool = False,
                  decoder_segment: bool = False):
-        self.corpus = corpus
+        super(Seq2SeqDataSet, self).__init__(corpus, batch_size=batch_size)
 
         self.encoder_processor = encoder_processor
         self.decoder_processor = decoder_processor
@@ -150,34 +671,22 @@ class Seq2SeqDataSet(Iterable):
         self.encoder_segment = encoder_segment
         self.decoder_segment = decoder_segment
 
-        self.batch_size = batch_size
-
-    def __len__(self) -> int:
-        return max(len(self.corpus) // self.batch_size, 1)
-
-    def __iter__(self) -> Iterator:
-        batch_x, batch_y = [], []
-        for x, y in self.corpus.sample():
-            batch_x.append(x)
-            batch_y.append(y)
-            if len(batch_x) == self.batch_size:
-                x_tensor = self.encoder_processor.transform(batch_x,
-                                                            seq_length=self.encoder_seq_length,
-                                                            segment=self.encoder_segment)
-                y_tensor = self.decoder_processor.transform(batch_y,
-                                                            seq_length=self.decoder_seq_length,
-                                                            one_hot=self.decoder_segment)
-                yield x_tensor, y_tensor
-                batch_x, batch_y = [], []
-
-    def take(self, batch_count: int = None) -> Any:
-        x_shape = [self.batch_size, self.encoder_seq_length]
-        y_shape = [self.batch_size, self.decoder_seq_length]
-        dataset = tf.data.Dataset.from_generator(self.__iter__,
-                                                 output_types=(tf.int64, tf.int64),
-                                                 output_shapes=(x_shape, y_shape))
-        dataset = dataset.repeat()
-        dataset = dataset.prefetch(50)
+    def _transform_batch(self, batch_x: List, batch_y: List) -> Tuple[Any, Any]:
+        if isinstance(self.corpus, BinaryCorpusGenerator):
+            encoder_transform = self.encoder_processor.transform_numerized
+            decoder_transform = self.decoder_processor.transform_numerized
+        else:
+            encoder_transform = self.encoder_processor.transform
+            decoder_transform = self.decoder_processor.transform
+        x_tensor = encoder_transform(batch_x,
+                                     seq_length=self.encoder_seq_length,
+                                     segment=self.encoder_segment)
+        y_tensor = decoder_transform(batch_y,
+                                     seq_length=self.decoder_seq_length,
+                                     one_hot=self.decoder_segment)
+        return x_tensor, y_tensor
+
+    def take(self, batch_count: int = None) -> tf.data.Dataset:
         if batch_count is None:
             batch_count = len(self)
-        return dataset.take(batch_count)
+        return self.as_tf_dataset(batch_count)
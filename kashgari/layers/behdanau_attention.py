@@ -15,13 +15,41 @@ from tensorflow.python.util.tf_export import keras_export
 
 @keras_export('keras.layers.BahdanauAttention')
 class BahdanauAttention(tf.keras.layers.Layer):
-    def __init__(self, units):
-        super(BahdanauAttention, self).__init__()
+    def __init__(self, units, **kwargs):
+        super(BahdanauAttention, self).__init__(**kwargs)
+        self.units = units
         self.W1 = tf.keras.layers.Dense(units)
         self.W2 = tf.keras.layers.Dense(units)
         self.V = tf.keras.layers.Dense(1)
 
-    def call(self, query, values):
+    def get_config(self):
+        config = super(BahdanauAttention, self).get_config()
+        config['units'] = self.units
+        return config
+
+    def precompute_keys(self, values):
+        """
+        Project the encoder output to the attention keys. The keys only depend on the encoder output,
+        compute them once and pass to every decoding step with ``call(query, values, keys=keys)``.
+
+        Args:
+            values: encoder output with shape ``(batch_size, max_len, hidden size)``.
+
+        Returns:
+            keys with shape ``(batch_size, max_len, units)``.
+        """
+        return self.W2(values)
+
+    def call(self, query, values, keys=None):
+        """
+        Args:
+            query: decoder hidden state.
+            values: encoder output.
+            keys: keys from :meth:`precompute_keys`, will be computed from values if not provided.
+        """
+        if keys is None:
+            keys = self.precompute_keys(values)
+
         # query hidden state shape == (batch_size, hidden size)
         # query_with_time_axis shape == (batch_size, 1, hidden size)
         # values shape == (batch_size, max_len, hidden size)
@@ -32,7 +60,7 @@ class BahdanauAttention(tf.keras.layers.Layer):
         # we get 1 at the last axis because we are applying score to self.V
         # the shape of the tensor before applying self.V is (batch_size, max_length, units)
         score = self.V(tf.nn.tanh(
-            self.W1(query_with_time_axis) + self.W2(values)))
+            self.W1(query_with_time_axis) + keys))
 
         # attention_weights shape == (batch_size, max_length, 1)
         attention_weights = tf.nn.softmax(score, axis=1)
@@ -9,6 +9,7 @@
 
 from .abc_processor import ABCProcessor
 from .class_processor import ClassificationProcessor
+from .corpus_statistics import CorpusStatistics
 from .sequence_processor import SequenceProcessor
 
 if __name__ == "__main__":
@@ -8,13 +8,16 @@
 # time: 2:53 下午
 
 from abc import ABC
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Union, TYPE_CHECKING
 
 import numpy as np
 
-from kashgari.generators import CorpusGenerator
+from kashgari.generators import ABCGenerator, CorpusGenerator
 from kashgari.types import TextSamplesVar
 
+if TYPE_CHECKING:
+    from kashgari.processors.corpus_statistics import CorpusStatistics
+
 
 class ABCProcessor(ABC):
     def to_dict(self) -> Dict[str, Any]:
@@ -57,7 +60,53 @@ class ABCProcessor(ABC):
         self.build_vocab_generator(corpus_gen)
 
     def build_vocab_generator(self,
-                              generator: Optional[CorpusGenerator]) -> None:
+                              generator: Optional[ABCGenerator],
+                              *,
+                              workers: int = 1,
+                              chunk_size: int = 10000) -> None:
+        """
+        Build vocab dict from the generator in a single streaming pass.
+
+        Args:
+            generator: sample generator.
+            workers: number of processes for counting tokens, default 1.
+            chunk_size: number of samples per counting chunk.
+        """
+        raise NotImplementedError
+
+    def extend_vocab_generator(self,
+                               generator: Optional[ABCGenerator],
+                               *,
+                               workers: int = 1,
+                               chunk_size: int = 10000) -> List[str]:
+        """
+        Append the new tokens of the generator to the end of the vocab dict, ids of the existing tokens
+        are kept, so the weights trained with the current vocab are still valid.
+        Build the vocab dict if it is empty.
+
+        Args:
+            generator: sample generator.
+            workers: number of processes for counting tokens, default 1.
+            chunk_size: number of samples per counting chunk.
+
+        Returns:
+            list of the appended tokens.
+        """
+        raise NotImplementedError
+
+    def _append_vocab(self, tokens: List[str]) -> List[str]:
+        for token in tokens:
+            self.vocab2idx[token] = len(self.vocab2idx)
+            self.idx2vocab[self.vocab2idx[token]] = token
+        return tokens
+
+    def build_vocab_from_statistics(self, stats: 'CorpusStatistics') -> None:
+        """
+        Build vocab dict from the token counts of pre-calculated corpus statistics.
+
+        Args:
+            stats: corpus statistics.
+        """
         raise NotImplementedError
 
     def get_tensor_shape(self, batch_size: int, seq_length: int) -> Tuple:
@@ -75,6 +124,30 @@ class ABCProcessor(ABC):
                   **kwargs: Any) -> np.ndarray:
         raise NotImplementedError
 
+    def numerize(self, samples: TextSamplesVar) -> List[Any]:
+        """
+        Convert samples to ids without padding, used for pre-numericalized binary corpus.
+
+        Args:
+            samples: samples to convert.
+
+        Returns:
+            list of numericalized samples.
+        """
+        raise NotImplementedError
+
+    def transform_numerized(self,
+                            samples: List[Any],
+                            *,
+                            seq_length: int = None,
+                            max_position: int = None,
+                            segment: bool = False,
+                            **kwargs: Any) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Same as :meth:`transform`, but takes the samples numericalized by :meth:`numerize`.
+        """
+        raise NotImplementedError
+
     def inverse_transform(self,
                           labels: List[int],
                           *,
@@ -7,17 +7,19 @@
 # file: label_processor.py
 # time: 2:53 下午
 
-import collections
-import operator
-from typing import List, Union, Dict, Optional, Any, Tuple
+from typing import List, Union, Dict, Optional, Any, Tuple, Counter, TYPE_CHECKING
 
 import numpy as np
 import tqdm
 
-from kashgari.generators import CorpusGenerator
+from kashgari.generators import ABCGenerator
 from kashgari.processors.abc_processor import ABCProcessor
+from kashgari.processors.token_counter import count_tokens, most_common_tokens
 from kashgari.types import TextSamplesVar
 
+if TYPE_CHECKING:
+    from kashgari.processors.corpus_statistics import CorpusStatistics
+
 
 class ClassificationProcessor(ABCProcessor):
 
@@ -35,32 +37,53 @@ class ClassificationProcessor(ABCProcessor):
         self.multi_label_binarizer = MultiLabelBinarizer(self.vocab2idx)
 
     def build_vocab_generator(self,
-                              generator: Optional[CorpusGenerator]) -> None:
-        from kashgari.utils import MultiLabelBinarizer
+                              generator: Optional[ABCGenerator],
+                              *,
+                              workers: int = 1,
+                              chunk_size: int = 10000) -> None:
         if self.vocab2idx:
             return
+        token2count = self._count_generator_labels(generator, workers=workers, chunk_size=chunk_size)
+        self._build_vocab_from_counter(token2count)
+
+    def extend_vocab_generator(self,
+                               generator: Optional[ABCGenerator],
+                               *,
+                               workers: int = 1,
+                               chunk_size: int = 10000) -> List[str]:
+        from kashgari.utils import MultiLabelBinarizer
+        if not self.vocab2idx:
+            self.build_vocab_generator(generator, workers=workers, chunk_size=chunk_size)
+            return list(self.vocab2idx)
 
-        vocab2idx: Dict[str, int] = {}
-        token2count: Dict[str, int] = {}
-
+        token2count = self._count_generator_labels(generator, workers=workers, chunk_size=chunk_size)
+        new_labels = self._append_vocab([token for token, _ in most_common_tokens(token2count,
+                                                                                  exclude=self.vocab2idx)])
+        self.multi_label_binarizer = MultiLabelBinarizer(self.vocab2idx)
+        return new_labels
+
+    def _count_generator_labels(self,
+                                generator: Optional[ABCGenerator],
+                                *,
+                                workers: int = 1,
+                                chunk_size: int = 10000) -> Counter:
+        samples = tqdm.tqdm(generator, desc="Preparing classification label vocab dict")
         if self.multi_label:
-            for _, label in tqdm.tqdm(generator, desc="Preparing classification label vocab dict"):
-                for token in label:
-                    count = token2count.get(token, 0)
-                    token2count[token] = count + 1
+            targets = (label for _, label in samples)
         else:
-            for _, label in tqdm.tqdm(generator, desc="Preparing classification label vocab dict"):
-                count = token2count.get(label, 0)
-                token2count[label] = count + 1
-
-        sorted_token2count = sorted(token2count.items(),
-                                    key=operator.itemgetter(1),
-                                    reverse=True)
-        token2count = collections.OrderedDict(sorted_token2count)
-
-        for token, token_count in token2count.items():
-            if token not in vocab2idx:
-                vocab2idx[token] = len(vocab2idx)
+            targets = ((label,) for _, label in samples)
+        return count_tokens(targets, workers=workers, chunk_size=chunk_size)
+
+    def build_vocab_from_statistics(self, stats: 'CorpusStatistics') -> None:
+        if self.vocab2idx:
+            return
+        self._build_vocab_from_counter(stats.label_token2count)
+
+    def _build_vocab_from_counter(self, token2count: Counter) -> None:
+        from kashgari.utils import MultiLabelBinarizer
+        vocab2idx: Dict[str, int] = {}
+        for token, _ in most_common_tokens(token2count):
+            vocab2idx[token] = len(vocab2idx)
         self.vocab2idx = vocab2idx
         self.idx2vocab = dict([(v, k) for k, v in self.vocab2idx.items()])
         self.multi_label_binarizer = MultiLabelBinarizer(self.vocab2idx)
@@ -85,6 +108,25 @@ class ClassificationProcessor(ABCProcessor):
         sample_tensor = [self.vocab2idx[i] for i in samples]
         return np.array(sample_tensor)
 
+    def numerize(self, samples: TextSamplesVar) -> List[Any]:
+        if self.multi_label:
+            return [np.array([self.vocab2idx[i] for i in sample], dtype=np.int32) for sample in samples]
+        return [self.vocab2idx[i] for i in samples]
+
+    def transform_numerized(self,
+                            samples: List[Any],
+                            *,
+                            seq_length: int = None,
+                            max_position: int = None,
+                            segment: bool = False,
+                            **kwargs: Any) -> np.ndarray:
+        if self.multi_label:
+            sample_tensor = np.zeros((len(samples), len(self.vocab2idx)))
+            for index, ids in enumerate(samples):
+                sample_tensor[index, ids] = 1
+            return sample_tensor
+        return np.array(samples)
+
     def inverse_transform(self,  # type: ignore[override]
                           labels: Union[List[int], np.ndarray],
                           *,
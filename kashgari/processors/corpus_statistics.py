@@ -0,0 +1,120 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: corpus_statistics.py
+# time: 4:32 下午
+
+import collections
+from typing import Any, Counter, List, Tuple
+
+import tqdm
+
+from kashgari.generators import ABCGenerator
+from kashgari.utils.chunks import iter_chunks, map_chunks
+
+
+def _is_token_sequence(label: Any) -> bool:
+    return isinstance(label, (list, tuple))
+
+
+def _count_chunk(chunk: List[Tuple[Any, Any]]) -> Tuple[Counter, Counter, Counter, Counter]:
+    text_token2count: Counter = collections.Counter()
+    label_token2count: Counter = collections.Counter()
+    text_lengths: Counter = collections.Counter()
+    label_lengths: Counter = collections.Counter()
+    for sentence, label in chunk:
+        text_token2count.update(sentence)
+        text_lengths[len(sentence)] += 1
+        if _is_token_sequence(label):
+            label_token2count.update(label)
+            label_lengths[len(label)] += 1
+        else:
+            label_token2count[label] += 1
+    return text_token2count, label_token2count, text_lengths, label_lengths
+
+
+class CorpusStatistics:
+    """
+    Statistics of a corpus collected in a single pass, including token counts of the text and label,
+    and histograms of the text and label sequence length.
+
+    Processors build vocab from it with :meth:`ABCProcessor.build_vocab_from_statistics`,
+    and embeddings calculate sequence length with :meth:`ABCEmbedding.get_seq_length_from_statistics`,
+    so a generator backed corpus only need to be scanned once.
+
+    Example:
+        >>> from kashgari.generators import CorpusGenerator
+        >>> stats = CorpusStatistics.from_generator(CorpusGenerator(x, y))
+        >>> text_processor.build_vocab_from_statistics(stats)
+        >>> seq_length = embedding.get_seq_length_from_statistics(stats)
+    """
+
+    def __init__(self) -> None:
+        self.sample_count = 0
+        self.text_token2count: Counter = collections.Counter()
+        # Tokens of the sequence labels, or the labels itself for the classification task.
+        self.label_token2count: Counter = collections.Counter()
+        self.text_lengths: Counter = collections.Counter()
+        self.label_lengths: Counter = collections.Counter()
+
+    @classmethod
+    def from_generator(cls,
+                       generator: ABCGenerator,
+                       *,
+                       workers: int = 1,
+                       chunk_size: int = 10000) -> 'CorpusStatistics':
+        """
+        Collect statistics from the generator in a single streaming pass.
+
+        Args:
+            generator: sample generator.
+            workers: number of processes for counting, default 1.
+            chunk_size: number of samples per counting chunk.
+        """
+        stats = cls()
+        samples = tqdm.tqdm(generator, desc="Calculating corpus statistics")
+        for chunk_result in map_chunks(_count_chunk, iter_chunks(samples, chunk_size), workers=workers):
+            text_token2count, label_token2count, text_lengths, label_lengths = chunk_result
+            stats.text_token2count.update(text_token2count)
+            stats.label_token2count.update(label_token2count)
+            stats.text_lengths.update(text_lengths)
+            stats.label_lengths.update(label_lengths)
+            stats.sample_count += sum(text_lengths.values())
+        return stats
+
+    def get_seq_length(self,
+                       *,
+                       use_label: bool = False,
+                       cover_rate: float = 0.95) -> int:
+        """
+        Calculate the sequence length which covers ``cover_rate`` of the samples with the length histogram.
+
+        Args:
+            use_label: use the label length instead of the text length.
+            cover_rate: ratio of samples need to be covered, 1.0 means the max length.
+
+        Returns:
+            sequence length
+        """
+        lengths = self.label_lengths if use_label else self.text_lengths
+        total = sum(lengths.values())
+        if total == 0:
+            raise ValueError('Can not calculate sequence length from an empty corpus.')
+        if cover_rate == 1.0:
+            target_index = total - 1
+        else:
+            target_index = int(cover_rate * total)
+
+        covered = 0
+        for length in sorted(lengths):
+            covered += lengths[length]
+            if covered > target_index:
+                return length
+        return max(lengths)
+
+
+if __name__ == "__main__":
+    pass
@@ -8,18 +8,21 @@
 # time: 12:27 下午
 
 import collections
-import operator
-from typing import Dict, List, Any, Optional, Union
+import itertools
+from typing import Dict, List, Any, Optional, Union, Callable, Iterable, Iterator, Tuple, Counter, TYPE_CHECKING
 
 import numpy as np
 import tqdm
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 
-from kashgari.generators import CorpusGenerator
+from kashgari.generators import ABCGenerator
 from kashgari.logger import logger
 from kashgari.processors.abc_processor import ABCProcessor
+from kashgari.processors.token_counter import count_tokens, most_common_tokens
 from kashgari.types import TextSamplesVar
 
+if TYPE_CHECKING:
+    from kashgari.processors.corpus_statistics import CorpusStatistics
+
 
 class SequenceProcessor(ABCProcessor):
     """
@@ -31,7 +34,10 @@ class SequenceProcessor(ABCProcessor):
         data['config'].update({
             'build_in_vocab': self.build_in_vocab,
             'min_count': self.min_count,
-            'allow_unk': self.allow_unk
+            'allow_unk': self.allow_unk,
+            'build_vocab_from_labels': self.build_vocab_from_labels,
+            'cache_size': self.cache_size,
+            'max_vocab_size': self.max_vocab_size
         })
         return data
 
@@ -39,11 +45,17 @@ class SequenceProcessor(ABCProcessor):
                  build_in_vocab: str = 'text',
                  min_count: int = 3,
                  build_vocab_from_labels: bool = False,
+                 cache_size: int = 0,
+                 max_vocab_size: int = None,
                  **kwargs: Any) -> None:
         """
 
         Args:
             vocab_dict_type: initial vocab dict type, one of `text` `labeling`.
+            cache_size: size of the LRU cache of numericalized samples, useful when the same
+                sentences are transformed repeatedly. Default 0, no cache.
+            max_vocab_size: max vocab size including the build-in tokens, keep the most frequent tokens.
+                Default None, no limit.
             **kwargs:
         """
         super(SequenceProcessor, self).__init__(**kwargs)
@@ -52,6 +64,10 @@ class SequenceProcessor(ABCProcessor):
         self.min_count = min_count
         self.allow_unk = True
         self.build_vocab_from_labels = build_vocab_from_labels
+        self.cache_size = cache_size
+        self.max_vocab_size = max_vocab_size
+        self._transform_cache: collections.OrderedDict = collections.OrderedDict()
+        self._transform_cache_key: Tuple = ()
 
         if build_in_vocab == 'text':
             self._initial_vocab_dic = {
@@ -70,44 +86,76 @@ class SequenceProcessor(ABCProcessor):
         self._showed_seq_len_warning = False
 
     def build_vocab_generator(self,
-                              generator: Optional[CorpusGenerator]) -> None:
+                              generator: Optional[ABCGenerator],
+                              *,
+                              workers: int = 1,
+                              chunk_size: int = 10000) -> None:
         if not self.vocab2idx:
-            vocab2idx = self._initial_vocab_dic
-
-            token2count: Dict[str, int] = {}
-
-            for sentence, label in tqdm.tqdm(generator, desc="Preparing text vocab dict"):
-                if self.build_vocab_from_labels:
-                    target = label
-                else:
-                    target = sentence
-                for token in target:
-                    count = token2count.get(token, 0)
-                    token2count[token] = count + 1
-
-            sorted_token2count = sorted(token2count.items(),
-                                        key=operator.itemgetter(1),
-                                        reverse=True)
-            token2count = collections.OrderedDict(sorted_token2count)
-
-            for token, token_count in token2count.items():
-                if token not in vocab2idx and token_count >= self.min_count:
-                    vocab2idx[token] = len(vocab2idx)
-            self.vocab2idx = vocab2idx
-            self.idx2vocab = dict([(v, k) for k, v in self.vocab2idx.items()])
-
-            logger.info("------ Build vocab dict finished, Top 10 token ------")
-            for token, index in list(self.vocab2idx.items())[:10]:
-                logger.info(f"Token: {token:8s} -> {index}")
-            logger.info("------ Build vocab dict finished, Top 10 token ------")
+            token2count = self._count_generator_tokens(generator, workers=workers, chunk_size=chunk_size)
+            self._build_vocab_from_counter(token2count)
 
-    def transform(self,
-                  samples: TextSamplesVar,
-                  *,
-                  seq_length: int = None,
-                  max_position: int = None,
-                  segment: bool = False,
-                  **kwargs: Any) -> np.ndarray:
+    def extend_vocab_generator(self,
+                               generator: Optional[ABCGenerator],
+                               *,
+                               workers: int = 1,
+                               chunk_size: int = 10000) -> List[str]:
+        if not self.vocab2idx:
+            self.build_vocab_generator(generator, workers=workers, chunk_size=chunk_size)
+            return list(self.vocab2idx)
+
+        token2count = self._count_generator_tokens(generator, workers=workers, chunk_size=chunk_size)
+        top_k = None
+        if self.max_vocab_size is not None:
+            top_k = max(self.max_vocab_size - len(self.vocab2idx), 0)
+        new_tokens = [token for token, _ in most_common_tokens(token2count,
+                                                               min_count=self.min_count,
+                                                               top_k=top_k,
+                                                               exclude=self.vocab2idx)]
+        logger.info(f"Extended vocab dict with {len(new_tokens)} new tokens, vocab size {self.vocab_size} -> "
+                    f"{self.vocab_size + len(new_tokens)}")
+        return self._append_vocab(new_tokens)
+
+    def _count_generator_tokens(self,
+                                generator: Optional[ABCGenerator],
+                                *,
+                                workers: int = 1,
+                                chunk_size: int = 10000) -> Counter:
+        samples = tqdm.tqdm(generator, desc="Preparing text vocab dict")
+        if self.build_vocab_from_labels:
+            targets = (label for _, label in samples)
+        else:
+            targets = (sentence for sentence, _ in samples)
+        return count_tokens(targets, workers=workers, chunk_size=chunk_size)
+
+    def build_vocab_from_statistics(self, stats: 'CorpusStatistics') -> None:
+        if not self.vocab2idx:
+            if self.build_vocab_from_labels:
+                self._build_vocab_from_counter(stats.label_token2count)
+            else:
+                self._build_vocab_from_counter(stats.text_token2count)
+
+    def _build_vocab_from_counter(self, token2count: Counter) -> None:
+        vocab2idx = dict(self._initial_vocab_dic)
+        top_k = None
+        if self.max_vocab_size is not None:
+            top_k = max(self.max_vocab_size - len(vocab2idx), 0)
+        for token, _ in most_common_tokens(token2count,
+                                           min_count=self.min_count,
+                                           top_k=top_k,
+                                           exclude=vocab2idx):
+            vocab2idx[token] = len(vocab2idx)
+        self.vocab2idx = vocab2idx
+        self.idx2vocab = dict([(v, k) for k, v in self.vocab2idx.items()])
+
+        logger.info("------ Build vocab dict finished, Top 10 token ------")
+        for token, index in list(self.vocab2idx.items())[:10]:
+            logger.info(f"Token: {token:8s} -> {index}")
+        logger.info("------ Build vocab dict finished, Top 10 token ------")
+
+    def _get_seq_length(self,
+                        samples: List,
+                        seq_length: int = None,
+                        max_position: int = None) -> int:
         seq_length_from = ""
         if seq_length is None:
             seq_length_from = "max length of the samples"
@@ -120,21 +168,69 @@ class SequenceProcessor(ABCProcessor):
             logger.warning(
                 f'Sequence length is None, will use the {seq_length_from}, which is {seq_length}')
             self._showed_seq_len_warning = True
+        return seq_length
 
-        numerized_samples = []
-        for seq in samples:
-            if self.token_bos in self.vocab2idx:
-                seq = [self.token_bos] + seq + [self.token_eos]
-            else:
-                seq = [self.token_pad] + seq + [self.token_pad]
-            if self.allow_unk:
-                unk_index = self.vocab2idx[self.token_unk]
-                numerized_samples.append([self.vocab2idx.get(token, unk_index) for token in seq])
+    def transform(self,
+                  samples: TextSamplesVar,
+                  *,
+                  seq_length: int = None,
+                  max_position: int = None,
+                  segment: bool = False,
+                  **kwargs: Any) -> np.ndarray:
+        seq_length = self._get_seq_length(samples, seq_length, max_position)
+
+        token_ids = np.zeros((len(samples), seq_length), dtype=np.int32)
+        if seq_length > 0 and len(samples) > 0:
+            lookup = self._token_lookup()
+            # max tokens after the bos token
+            max_tokens = seq_length - 1
+            if self.cache_size > 0:
+                flat_ids = np.concatenate([self._cached_lookup(seq, lookup)[:max_tokens] for seq in samples])
             else:
-                numerized_samples.append([self.vocab2idx[token] for token in seq])
+                flat_tokens = list(itertools.chain.from_iterable(
+                    seq if len(seq) <= max_tokens else seq[:max_tokens] for seq in samples))
+                flat_ids = np.fromiter(lookup(flat_tokens), dtype=np.int32, count=len(flat_tokens))
+            lengths = np.array([len(seq) for seq in samples], dtype=np.int64)
+            self._fill_token_ids(token_ids, flat_ids, lengths, lookup)
 
-        sample_index = pad_sequences(numerized_samples, seq_length, padding='post', truncating='post')
-        token_ids = np.array(sample_index)
+        if segment:
+            segment_ids = np.zeros(token_ids.shape, dtype=np.int32)
+            return token_ids, segment_ids
+        else:
+            return token_ids
+
+    def numerize(self, samples: TextSamplesVar) -> List[np.ndarray]:
+        """
+        Convert samples to token id arrays, without the bos, eos token and padding.
+
+        Args:
+            samples: token samples.
+
+        Returns:
+            list of int32 token id arrays.
+        """
+        lookup = self._token_lookup()
+        return [np.fromiter(lookup(seq), dtype=np.int32, count=len(seq)) for seq in samples]
+
+    def transform_numerized(self,
+                            samples: List[np.ndarray],
+                            *,
+                            seq_length: int = None,
+                            max_position: int = None,
+                            segment: bool = False,
+                            **kwargs: Any) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Same as :meth:`transform`, but takes the token id arrays from :meth:`numerize`,
+        only bos, eos token and padding will be added.
+        """
+        seq_length = self._get_seq_length(samples, seq_length, max_position)
+
+        token_ids = np.zeros((len(samples), seq_length), dtype=np.int32)
+        if seq_length > 0 and len(samples) > 0:
+            max_tokens = seq_length - 1
+            flat_ids = np.concatenate([np.asarray(ids, dtype=np.int32)[:max_tokens] for ids in samples])
+            lengths = np.array([len(ids) for ids in samples], dtype=np.int64)
+            self._fill_token_ids(token_ids, flat_ids, lengths, self._token_lookup())
 
         if segment:
             segment_ids = np.zeros(token_ids.shape, dtype=np.int32)
@@ -142,6 +238,63 @@ class SequenceProcessor(ABCProcessor):
         else:
             return token_ids
 
+    def _fill_token_ids(self,
+                        token_ids: np.ndarray,
+                        flat_ids: np.ndarray,
+                        lengths: np.ndarray,
+                        lookup: Callable[[Iterable[str]], Iterator[int]]) -> None:
+        """
+        Write ``[bos] + ids + [eos]`` of every sample into the zero padded ``token_ids`` buffer,
+        truncating at the end of each row.
+
+        Args:
+            token_ids: zero padded buffer with shape ``(batch, seq_length)``.
+            flat_ids: concatenated token ids of all samples, already truncated to ``seq_length - 1``.
+            lengths: original token count of every sample.
+            lookup: token lookup function for the bos and eos token.
+        """
+        if self.token_bos in self.vocab2idx:
+            bos_id, eos_id = lookup([self.token_bos, self.token_eos])
+        else:
+            bos_id, eos_id = lookup([self.token_pad, self.token_pad])
+
+        seq_length = token_ids.shape[1]
+        kept_lengths = np.minimum(lengths, seq_length - 1)
+        rows = np.repeat(np.arange(len(lengths)), kept_lengths)
+        offsets = np.repeat(np.cumsum(kept_lengths) - kept_lengths, kept_lengths)
+        token_ids[rows, np.arange(len(flat_ids)) - offsets + 1] = flat_ids
+
+        token_ids[:, 0] = bos_id
+        has_eos = lengths + 1 < seq_length
+        token_ids[has_eos, lengths[has_eos] + 1] = eos_id
+
+    def _token_lookup(self) -> Callable[[Iterable[str]], Iterator[int]]:
+        vocab2idx = self.vocab2idx
+        unk_index = vocab2idx.get(self.token_unk) if self.allow_unk else None
+        if unk_index is None:
+            return lambda tokens: map(vocab2idx.__getitem__, tokens)
+        return lambda tokens: map(vocab2idx.get, tokens, itertools.repeat(unk_index))
+
+    def _cached_lookup(self,
+                       seq: List[str],
+                       lookup: Callable[[Iterable[str]], Iterator[int]]) -> np.ndarray:
+        # vocab could be replaced or extended after the cache filled, drop the stale entries.
+        cache_key = (id(self.vocab2idx), len(self.vocab2idx), self.allow_unk)
+        if cache_key != self._transform_cache_key:
+            self._transform_cache.clear()
+            self._transform_cache_key = cache_key
+
+        key = tuple(seq)
+        ids = self._transform_cache.get(key)
+        if ids is None:
+            ids = np.fromiter(lookup(seq), dtype=np.int32, count=len(seq))
+            self._transform_cache[key] = ids
+            if len(self._transform_cache) > self.cache_size:
+                self._transform_cache.popitem(last=False)
+        else:
+            self._transform_cache.move_to_end(key)
+        return ids
+
     def inverse_transform(self,  # type: ignore[override]
                           labels: Union[List[List[int]], np.ndarray],
                           *,
@@ -0,0 +1,76 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: token_counter.py
+# time: 2:15 下午
+
+import collections
+import heapq
+import itertools
+import operator
+from typing import Counter, Hashable, Iterable, List, Tuple, Container, TypeVar
+
+from kashgari.utils.chunks import iter_chunks, map_chunks
+
+TokenT = TypeVar("TokenT", bound=Hashable)
+
+
+def _count_chunk(chunk: List[Iterable[TokenT]]) -> Counter[TokenT]:
+    return collections.Counter(itertools.chain.from_iterable(chunk))
+
+
+def count_tokens(samples: Iterable[Iterable[TokenT]],
+                 *,
+                 workers: int = 1,
+                 chunk_size: int = 10000) -> Counter[TokenT]:
+    """
+    Count tokens of the samples in a single streaming pass.
+
+    Samples are consumed in chunks, so the corpus never needs to fit in memory.
+    When ``workers > 1``, chunks are counted in a process pool and merged in order,
+    so the result (including the order of tokens with the same count) is the same as
+    counting in a single process.
+
+    Args:
+        samples: iterable of token sequences.
+        workers: number of counting processes, default 1 which counts in current process.
+        chunk_size: number of samples per chunk.
+
+    Returns:
+        token to count ``Counter``, keys are ordered by first appearance.
+    """
+    token2count: Counter[TokenT] = collections.Counter()
+    for chunk_count in map_chunks(_count_chunk, iter_chunks(samples, chunk_size), workers=workers):
+        token2count.update(chunk_count)
+    return token2count
+
+
+def most_common_tokens(token2count: Counter[TokenT],
+                       *,
+                       min_count: int = 1,
+                       top_k: int = None,
+                       exclude: Container[TokenT] = ()) -> List[Tuple[TokenT, int]]:
+    """
+    Get tokens sorted by count in descending order, tokens with same count keep the counter order.
+
+    Args:
+        token2count: token to count ``Counter``.
+        min_count: tokens appear less than ``min_count`` times will be dropped.
+        top_k: only keep the top k tokens, selected with a heap instead of sorting all tokens.
+        exclude: tokens to skip, for example the build-in tokens of the vocab.
+
+    Returns:
+        list of ``(token, count)`` tuples.
+    """
+    candidates = ((token, count) for token, count in token2count.items()
+                  if count >= min_count and token not in exclude)
+    if top_k is None:
+        return sorted(candidates, key=operator.itemgetter(1), reverse=True)
+    return heapq.nlargest(top_k, candidates, key=operator.itemgetter(1))
+
+
+if __name__ == "__main__":
+    pass
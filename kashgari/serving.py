@@ -0,0 +1,287 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: serving.py
+# time: 5:18 下午
+
+import asyncio
+import collections
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from kashgari.logger import logger
+
+if TYPE_CHECKING:
+    from kashgari.tasks.abs_task_model import ABCTaskModel
+
+
+class ServingStats:
+    """
+    Latency and throughput counters of the :class:`MicroBatchServer`.
+    """
+
+    def __init__(self, latency_window: int = 10000) -> None:
+        """
+        Args:
+            latency_window: number of recent request latencies kept for the percentiles.
+        """
+        self.start_time = time.perf_counter()
+        self.request_count = 0
+        self.error_count = 0
+        self.batch_count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.total_inference_time = 0.0
+        self.recent_latencies: collections.deque = collections.deque(maxlen=latency_window)
+
+    def record_batch(self, batch_size: int, inference_time: float, latencies: List[float]) -> None:
+        self.batch_count += 1
+        self.request_count += batch_size
+        self.total_inference_time += inference_time
+        self.total_latency += sum(latencies)
+        self.max_latency = max([self.max_latency] + latencies)
+        self.recent_latencies.extend(latencies)
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.request_count / self.batch_count if self.batch_count else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """
+        served requests per second since the server started.
+        """
+        return self.request_count / (time.perf_counter() - self.start_time)
+
+    def latency_percentile(self, percentile: float) -> float:
+        """
+        Percentile of the recent request latencies in seconds, from the enqueue to the result.
+        """
+        if not self.recent_latencies:
+            return 0.0
+        return float(np.percentile(self.recent_latencies, percentile))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'request_count': self.request_count,
+            'error_count': self.error_count,
+            'batch_count': self.batch_count,
+            'average_batch_size': self.average_batch_size,
+            'throughput': self.throughput,
+            'average_latency': self.total_latency / self.request_count if self.request_count else 0.0,
+            'p50_latency': self.latency_percentile(50),
+            'p99_latency': self.latency_percentile(99),
+            'max_latency': self.max_latency,
+            'inference_time': self.total_inference_time
+        }
+
+
+class MicroBatchServer:
+    """
+    Serve a task model with dynamic micro-batching. Concurrent requests are collected
+    in an asyncio queue into a batch, bounded by ``max_batch_size`` and ``max_wait_time``,
+    the batch is predicted with one forward pass and the results are scattered back to the requests.
+
+    Example:
+
+        >>> server = MicroBatchServer(model, method='predict_entities', max_batch_size=64)
+        >>> async def handler(tokens):
+        ...     return await server.predict(tokens)
+        >>> async with server:
+        ...     results = await asyncio.gather(*[handler(tokens) for tokens in samples])
+        >>> server.stats.to_dict()
+    """
+
+    def __init__(self,
+                 model: 'ABCTaskModel',
+                 *,
+                 method: str = 'predict',
+                 max_batch_size: int = 32,
+                 max_wait_time: float = 0.005,
+                 max_queue_size: int = 0,
+                 predict_kwargs: Dict = None) -> None:
+        """
+        Args:
+            model: task model to serve.
+            method: name of the model method to call with the batch, such as ``predict`` or ``predict_entities``.
+            max_batch_size: max number of requests in one batch.
+            max_wait_time: max seconds to wait for more requests after the first request of a batch.
+            max_queue_size: max pending requests, 0 for unlimited.
+            predict_kwargs: extra arguments passed to the model method, such as ``multi_label_threshold``.
+        """
+        if not callable(getattr(model, method, None)):
+            raise ValueError(f'{model.__class__.__name__} has no predict method `{method}`')
+        self.model = model
+        self.method = method
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+        self.max_queue_size = max_queue_size
+        self.predict_kwargs = predict_kwargs or {}
+
+        self.stats = ServingStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Future] = None
+        # models are not thread safe, run forward passes one by one in a worker thread,
+        # so that the event loop keeps collecting requests during inference.
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._batch_task is not None and not self._batch_task.done()
+
+    async def start(self) -> None:
+        if self.is_running:
+            return
+        self.stats = ServingStats()
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._batch_task = asyncio.ensure_future(self._batch_loop())
+
+    async def stop(self) -> None:
+        """
+        Stop the server after the pending requests are served.
+        """
+        if not self.is_running:
+            return
+        await self._queue.join()  # type: ignore
+        self._batch_task.cancel()  # type: ignore
+        try:
+            await self._batch_task  # type: ignore
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown()  # type: ignore
+        self._batch_task = None
+
+    async def __aenter__(self) -> 'MicroBatchServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.stop()
+
+    async def predict(self, sample: Any) -> Any:
+        """
+        Predict one sample, the result is the same as ``model.<method>([sample])[0]``.
+
+        Args:
+            sample: one input sample, for example a tokenized sentence.
+
+        Returns:
+            prediction result of the sample.
+        """
+        if not self.is_running:
+            raise RuntimeError('Server is not running, call `start()` first.')
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((sample, future, time.perf_counter()))  # type: ignore
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[Any, asyncio.Future, float]]:
+        queue: asyncio.Queue = self._queue  # type: ignore
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.max_wait_time
+        while len(batch) < self.max_batch_size:
+            # take the already queued requests without waiting
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _predict_batch(self, samples: List[Any]) -> List[Any]:
+        func = getattr(self.model, self.method)
+        return func(samples, batch_size=len(samples), **self.predict_kwargs)
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = await self._collect_batch()
+            samples = [sample for sample, _, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self._predict_batch, samples)
+            except Exception as e:
+                logger.exception(f'Failed to predict batch with {len(batch)} requests')
+                self.stats.error_count += len(batch)
+                # the traceback refers to the frame of this loop, callers clearing it would break the loop.
+                e = e.with_traceback(None)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                end = time.perf_counter()
+                for (_, future, _), result in zip(batch, results):
+                    # request could be cancelled by the caller while waiting
+                    if not future.done():
+                        future.set_result(result)
+                self.stats.record_batch(len(batch),
+                                        inference_time=end - start,
+                                        latencies=[end - enqueue_time for _, _, enqueue_time in batch])
+            finally:
+                for _ in batch:
+                    self._queue.task_done()  # type: ignore
+
+
+class LocalClient:
+    """
+    In-process client of the :class:`MicroBatchServer`, sends concurrent requests
+    without a network layer. Useful for testing and benchmarking the server.
+
+    Example:
+
+        >>> client = LocalClient(MicroBatchServer(model, max_batch_size=64))
+        >>> results = client.predict(samples, concurrency=128)
+        >>> client.server.stats.to_dict()
+    """
+
+    def __init__(self, server: MicroBatchServer) -> None:
+        self.server = server
+
+    async def predict_async(self, samples: List[Any], concurrency: int = 64) -> List[Any]:
+        """
+        Send samples as separate requests with at most ``concurrency`` requests in flight.
+
+        Args:
+            samples: input samples, one request per sample.
+            concurrency: max number of concurrent requests.
+
+        Returns:
+            results in the same order of the samples.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request(sample: Any) -> Any:
+            async with semaphore:
+                return await self.server.predict(sample)
+
+        return await asyncio.gather(*[request(sample) for sample in samples])
+
+    def predict(self, samples: List[Any], concurrency: int = 64) -> List[Any]:
+        """
+        Blocking version of :meth:`predict_async`, starts the server in a new event loop and stops it after.
+        """
+
+        async def run() -> List[Any]:
+            async with self.server:
+                return await self.predict_async(samples, concurrency=concurrency)
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+
+if __name__ == "__main__":
+    pass
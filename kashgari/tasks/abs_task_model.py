@@ -11,12 +11,15 @@ import json
 import os
 import pathlib
 from abc import ABC, abstractmethod
-from typing import Dict, Any, TYPE_CHECKING, Union
+from typing import Dict, Any, TYPE_CHECKING, Union, Callable, Optional, Tuple, List
+
+import numpy as np
 
 import tensorflow as tf
 
 import kashgari
-from kashgari.embeddings import ABCEmbedding
+from kashgari.embeddings import ABCEmbedding, FeatureCacheDataSet
+from kashgari.generators import ABCDataSet, ABCGenerator, CorpusGenerator
 from kashgari.logger import logger
 from kashgari.processors.abc_processor import ABCProcessor
 from kashgari.utils import load_data_object
@@ -37,6 +40,13 @@ class ABCTaskModel(ABC):
 
         self.tf_model: tf.keras.Model
 
+        # batches up to this size are predicted with the compiled fast path, see :meth:`predict_on_tensor`.
+        self.fast_predict_max_batch_size = 64
+        self._predict_function: Optional[Tuple[tf.keras.Model, Callable, List[tf.TensorSpec]]] = None
+        # compile arguments of the ``tf_model``, reused by the feature model, see :meth:`_get_feature_model`.
+        self._compile_kwargs: Dict[str, Any] = {}
+        self._feature_model: Optional[Tuple[tf.keras.Model, tf.keras.Model]] = None
+
     def to_dict(self) -> Dict[str, Any]:
         model_json_str = self.tf_model.to_json()
 
@@ -93,6 +103,202 @@ class ABCTaskModel(ABC):
         logger.info('model saved to {}'.format(os.path.abspath(model_path)))
         return model_path
 
+    def _get_predict_function(self) -> Tuple[Callable, List[tf.TensorSpec]]:
+        # rebuild when tf_model is replaced, such as building or loading the model again.
+        if self._predict_function is None or self._predict_function[0] is not self.tf_model:
+            tf_model = self.tf_model
+            # all input dims are dynamic, one graph serves any batch size and length.
+            input_signature = [tf.TensorSpec(shape=[None] * len(i.shape), dtype=i.dtype)
+                               for i in tf_model.inputs]
+
+            @tf.function(input_signature=input_signature)
+            def predict_function(*inputs: tf.Tensor) -> tf.Tensor:
+                if len(inputs) == 1:
+                    return tf_model(inputs[0], training=False)
+                return tf_model(list(inputs), training=False)
+
+            self._predict_function = (tf_model, predict_function, input_signature)
+        return self._predict_function[1], self._predict_function[2]
+
+    def predict_on_tensor(self,
+                          tensor: Any,
+                          *,
+                          batch_size: int = 32,
+                          predict_kwargs: Dict = None) -> np.ndarray:
+        """
+        Predict numericalized tensor with the ``tf_model``.
+
+        Batches up to ``fast_predict_max_batch_size`` samples call the model in a compiled ``tf.function``
+        directly, which avoids the per-call overhead of :meth:`tf.keras.Model.predict`, the function is
+        traced once for any batch size and sequence length. Larger batches, or calls with ``predict_kwargs``
+        other than ``verbose``, fall back to :meth:`tf.keras.Model.predict`.
+
+        Args:
+            tensor: input tensor, or list of input tensors.
+            batch_size: batch size of the :meth:`tf.keras.Model.predict` fallback.
+            predict_kwargs: arguments passed to :meth:`tf.keras.Model.predict`.
+
+        Returns:
+            model output.
+        """
+        if predict_kwargs is None:
+            predict_kwargs = {}
+        inputs = tensor if isinstance(tensor, (list, tuple)) else [tensor]
+        sample_count = len(inputs[0])
+        if sample_count > self.fast_predict_max_batch_size or set(predict_kwargs) - {'verbose'}:
+            return self.tf_model.predict(tensor, batch_size=batch_size, **predict_kwargs)
+
+        predict_function, input_signature = self._get_predict_function()
+        inputs = [tf.convert_to_tensor(i, dtype=spec.dtype) for i, spec in zip(inputs, input_signature)]
+        return predict_function(*inputs).numpy()
+
+    def _get_feature_model(self) -> tf.keras.Model:
+        """
+        Build the model of the task layers, which takes the embedding outputs as input.
+        Layers are shared with the ``tf_model``, so training the feature model trains the ``tf_model``.
+        """
+        if self._feature_model is None or self._feature_model[0] is not self.tf_model:
+            embed_model = self.embedding.embed_model
+            task_model = tf.keras.Model(embed_model.output, self.tf_model.output)
+
+            input_features = tf.keras.layers.Input(shape=(None, self.embedding.embedding_size),
+                                                   name='input_features')
+            # padding positions are stored as zero vectors in the feature cache.
+            masked_features = tf.keras.layers.Masking(mask_value=0.0)(input_features)
+            feature_model = tf.keras.Model(input_features, task_model(masked_features))
+            feature_model.compile(optimizer=self.tf_model.optimizer, **self._compile_kwargs)
+            self._feature_model = (self.tf_model, feature_model)
+        return self._feature_model[1]
+
+    def _fit_batch_dataset(self,
+                           train_set: ABCDataSet,
+                           valid_set: ABCDataSet = None,
+                           *,
+                           epochs: int = 5,
+                           callbacks: List[tf.keras.callbacks.Callback] = None,
+                           fit_kwargs: Dict = None) -> tf.keras.callbacks.History:
+        """
+        Fit the ``tf_model`` with the batch datasets. When the embedding has a feature cache,
+        embedding outputs are computed once and the task layers are trained with the cached features.
+        """
+        if fit_kwargs is None:
+            fit_kwargs = {}
+        fit_model = self.tf_model
+
+        feature_cache = self.embedding.feature_cache
+        if feature_cache is not None and self.embedding.embed_model.trainable_weights:
+            logger.warning('Embedding model has trainable weights, feature cache is disabled.')
+        elif feature_cache is not None:
+            train_set = FeatureCacheDataSet(train_set, feature_cache)
+            train_set.update_cache(self.embedding.embed_model)
+            if valid_set is not None:
+                valid_set = FeatureCacheDataSet(valid_set, feature_cache)
+                valid_set.update_cache(self.embedding.embed_model)
+            fit_model = self._get_feature_model()
+
+        options = tf.data.Options()
+        if isinstance(fit_model.distribute_strategy, tf.distribute.MultiWorkerMirroredStrategy):
+            # every worker reads its own corpus shard, see :meth:`ABCGenerator.shard`.
+            options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.OFF
+
+        if valid_set is not None:
+            fit_kwargs['validation_data'] = valid_set.as_tf_dataset().with_options(options)
+            fit_kwargs['validation_steps'] = len(valid_set)
+
+        history = fit_model.fit(train_set.as_tf_dataset().with_options(options),
+                                steps_per_epoch=len(train_set),
+                                epochs=epochs,
+                                callbacks=callbacks,
+                                **fit_kwargs)
+        embed_cache = self.embedding.embed_cache
+        if embed_cache is not None and self.embedding.embed_model.trainable_weights:
+            # cached results of the :meth:`ABCEmbedding.embed` are outdated after training the embedding.
+            embed_cache.clear()
+        return history
+
+    def extend_vocab(self,
+                     x_data: Any,
+                     y_data: Any) -> Tuple[List[str], List[str]]:
+        """
+        Append the new tokens and labels of the samples to the processors, and grow the model weights.
+        See :meth:`extend_vocab_generator`.
+        """
+        return self.extend_vocab_generator(CorpusGenerator(x_data, y_data))
+
+    def extend_vocab_generator(self,
+                               train_gen: ABCGenerator) -> Tuple[List[str], List[str]]:
+        """
+        Append the new tokens and labels of the generator to the text and label vocab, and grow the
+        embedding and output layers of the built model, so a trained or loaded model could continue
+        training on new data without rebuilding from scratch.
+
+        Ids of the existing tokens and labels are kept, and existing rows of the grown weights are
+        copied to the new model, only rows of the new tokens and labels are initialized.
+        The model is compiled again with the same type and config of the optimizer, and the same loss and metrics.
+        Text vocab of the pre-trained embeddings, such as the BERT vocab, is fixed and never extended.
+
+        Args:
+            train_gen: train data generator.
+
+        Returns:
+            tuple of the new tokens and the new labels.
+        """
+        if self.embedding.vocab2idx:
+            new_tokens: List[str] = []
+        else:
+            new_tokens = self.text_processor.extend_vocab_generator(train_gen)
+        new_labels = self.label_processor.extend_vocab_generator(train_gen)
+
+        if self.tf_model is not None:
+            if new_tokens or new_labels:
+                self._rebuild_with_weights()
+            elif self.tf_model.optimizer is None:
+                # loaded model is not compiled
+                self.compile_model()  # type: ignore
+        return new_tokens, new_labels
+
+    def _rebuild_with_weights(self) -> None:
+        """
+        Rebuild the embedding model and the ``tf_model`` with the current vocab sizes, copy the current weights
+        into the leading slices of the new weights.
+        """
+        old_layers = [layer for layer in self.tf_model.layers if layer.weights]
+        old_weights = [layer.get_weights() for layer in old_layers]
+        optimizer_config = None
+        if self.tf_model.optimizer is not None:
+            optimizer_config = tf.keras.optimizers.serialize(self.tf_model.optimizer)
+
+        self.embedding.build_embedding_model(vocab_size=self.text_processor.vocab_size, force=True)
+        self.build_model_arc()  # type: ignore
+        new_layers = [layer for layer in self.tf_model.layers if layer.weights]
+        if [type(layer) for layer in new_layers] != [type(layer) for layer in old_layers]:
+            raise ValueError('Model structure changed after rebuilding, could not copy the weights.')
+
+        for layer, weights in zip(new_layers, old_weights):
+            new_weights = layer.get_weights()
+            for new_weight, weight in zip(new_weights, weights):
+                if new_weight.ndim != weight.ndim or any(n < o for n, o in zip(new_weight.shape, weight.shape)):
+                    raise ValueError(f'Could not copy weight with shape {weight.shape} '
+                                     f'to {new_weight.shape} of the layer {layer.name}.')
+                new_weight[tuple(slice(0, size) for size in weight.shape)] = weight
+            layer.set_weights(new_weights)
+
+        # losses and metrics bound to the old layers, such as the CRF loss, are bound to the new layers.
+        new_layer_of = dict((id(old), new) for old, new in zip(old_layers, new_layers))
+
+        def rebind(value: Any) -> Any:
+            if isinstance(value, (list, tuple)):
+                return type(value)(rebind(i) for i in value)
+            owner = getattr(value, '__self__', None)
+            if owner is not None and id(owner) in new_layer_of:
+                return getattr(new_layer_of[id(owner)], value.__name__)
+            return value
+
+        compile_kwargs = dict((key, rebind(value)) for key, value in self._compile_kwargs.items())
+        if optimizer_config is not None:
+            compile_kwargs['optimizer'] = tf.keras.optimizers.deserialize(optimizer_config)
+        self.compile_model(**compile_kwargs)  # type: ignore
+
     @classmethod
     def load_model(cls, model_path: str) -> Union["ABCLabelingModel", "ABCClassificationModel"]:
         from bert4keras.layers import ConditionalRandomField
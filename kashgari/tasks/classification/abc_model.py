@@ -22,6 +22,7 @@ from kashgari.logger import logger
 from kashgari.metrics.multi_label_classification import multi_label_classification_report
 from kashgari.processors import ABCProcessor
 from kashgari.processors import ClassificationProcessor
+from kashgari.processors import CorpusStatistics
 from kashgari.processors import SequenceProcessor
 from kashgari.tasks.abs_task_model import ABCTaskModel
 from kashgari.types import TextSamplesVar, ClassificationLabelVar, MultiLabelClassificationLabelVar
@@ -107,14 +108,16 @@ class ABCClassificationModel(ABCTaskModel, ABC):
 
     def build_model_generator(self,
                               train_gen: CorpusGenerator) -> None:
-        if not self.text_processor.vocab2idx:
-            self.text_processor.build_vocab_generator(train_gen)
-        self.label_processor.build_vocab_generator(train_gen)
+        if not self.text_processor.vocab2idx or not self.label_processor.vocab2idx or self.sequence_length is None:
+            # scan the corpus only once for the text vocab, label vocab and sequence length.
+            stats = CorpusStatistics.from_generator(train_gen)
+            if not self.text_processor.vocab2idx:
+                self.text_processor.build_vocab_from_statistics(stats)
+            self.label_processor.build_vocab_from_statistics(stats)
+            if self.sequence_length is None:
+                self.sequence_length = self.embedding.get_seq_length_from_statistics(stats)
         self.embedding.setup_text_processor(self.text_processor)
 
-        if self.sequence_length is None:
-            self.sequence_length = self.embedding.get_seq_length_from_corpus(corpus_gen=train_gen)
-
         if self.tf_model is None:
             self.build_model_arc()
             self.compile_model()
@@ -159,6 +162,7 @@ class ABCClassificationModel(ABCTaskModel, ABC):
                               optimizer=optimizer,
                               metrics=metrics,
                               **kwargs)
+        self._compile_kwargs = {'loss': loss, 'metrics': metrics, **kwargs}
 
     def fit(self,
             x_train: TextSamplesVar,
@@ -170,6 +174,7 @@ class ABCClassificationModel(ABCTaskModel, ABC):
             epochs: int = 5,
             callbacks: List['keras.callbacks.Callback'] = None,
             fit_kwargs: Dict = None,
+            bucket_boundaries: Union[int, List[int]] = None,
             **kwargs: Dict) -> 'keras.callbacks.History':
         """
         Trains the model for a given number of epochs with given data set list.
@@ -188,6 +193,8 @@ class ABCClassificationModel(ABCTaskModel, ABC):
                 List of callbacks to apply during training.
                 See :class:`tf.keras.callbacks`.
             fit_kwargs: fit_kwargs: additional arguments passed to :meth:`tf.keras.Model.fit`
+            bucket_boundaries: group samples with similar length into the same batch, list of
+                sequence length boundaries or number of buckets. See :class:`kashgari.generators.BatchDataSet`
 
         Returns:
             A :class:`tf.keras.callback.History`  object. Its `History.history` attribute is
@@ -206,6 +213,7 @@ class ABCClassificationModel(ABCTaskModel, ABC):
                                   epochs=epochs,
                                   callbacks=callbacks,
                                   fit_kwargs=fit_kwargs,
+                                  bucket_boundaries=bucket_boundaries,
                                   **kwargs)
 
     def fit_generator(self,
@@ -216,6 +224,7 @@ class ABCClassificationModel(ABCTaskModel, ABC):
                       epochs: int = 5,
                       callbacks: List['keras.callbacks.Callback'] = None,
                       fit_kwargs: Dict = None,
+                      bucket_boundaries: Union[int, List[int]] = None,
                       **kwargs: Dict) -> 'keras.callbacks.History':
         """
         Trains the model for a given number of epochs with given data generator.
@@ -232,6 +241,8 @@ class ABCClassificationModel(ABCTaskModel, ABC):
                 List of callbacks to apply during training.
                 See `tf.keras.callbacks`.
             fit_kwargs: fit_kwargs: additional arguments passed to :meth:`tf.keras.Model.fit`
+            bucket_boundaries: group samples with similar length into the same batch, list of
+                sequence length boundaries or number of buckets. See :class:`kashgari.generators.BatchDataSet`
 
         Returns:
             A :py:class:`tf.keras.callback.History`  object. Its `History.history` attribute is
@@ -250,26 +261,25 @@ class ABCClassificationModel(ABCTaskModel, ABC):
                                  label_processor=self.label_processor,
                                  segment=self.embedding.segment,
                                  seq_length=self.sequence_length,
-                                 batch_size=batch_size)
+                                 batch_size=batch_size,
+                                 bucket_boundaries=bucket_boundaries)
 
-        if fit_kwargs is None:
-            fit_kwargs = {}
+        valid_set = None
 
         if valid_sample_gen:
-            valid_gen = BatchDataSet(valid_sample_gen,
+            valid_set = BatchDataSet(valid_sample_gen,
                                      text_processor=self.text_processor,
                                      label_processor=self.label_processor,
                                      segment=self.embedding.segment,
                                      seq_length=self.sequence_length,
-                                     batch_size=batch_size)
-            fit_kwargs['validation_data'] = valid_gen.take()
-            fit_kwargs['validation_steps'] = len(valid_gen)
+                                     batch_size=batch_size,
+                                     bucket_boundaries=bucket_boundaries)
 
-        return self.tf_model.fit(train_set.take(),
-                                 steps_per_epoch=len(train_set),
-                                 epochs=epochs,
-                                 callbacks=callbacks,
-                                 **fit_kwargs)
+        return self._fit_batch_dataset(train_set,
+                                       valid_set,
+                                       epochs=epochs,
+                                       callbacks=callbacks,
+                                       fit_kwargs=fit_kwargs)
 
     def predict(self,  # type: ignore[override]
                 x_data: TextSamplesVar,
@@ -307,7 +317,7 @@ class ABCClassificationModel(ABCTaskModel, ABC):
                                                    segment=self.embedding.segment,
                                                    seq_lengtg=seq_length,
                                                    max_position=self.embedding.max_position)
-            pred = self.tf_model.predict(tensor, batch_size=batch_size, **predict_kwargs)
+            pred = self.predict_on_tensor(tensor, batch_size=batch_size, predict_kwargs=predict_kwargs)
 
             if self.multi_label:
                 if debug_info:
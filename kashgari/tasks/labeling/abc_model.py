@@ -19,6 +19,7 @@ from kashgari.generators import CorpusGenerator, BatchDataSet
 from kashgari.logger import logger
 from kashgari.metrics.sequence_labeling import get_entities
 from kashgari.metrics.sequence_labeling import sequence_labeling_report
+from kashgari.processors import CorpusStatistics
 from kashgari.processors import SequenceProcessor
 from kashgari.tasks.abs_task_model import ABCTaskModel
 from kashgari.types import TextSamplesVar
@@ -49,6 +50,8 @@ class ABCLabelingModel(ABCTaskModel, ABC):
             hyper_parameters = self.default_hyper_parameters()
 
         self.tf_model: Optional[tf.keras.Model] = None
+        # ConditionalRandomField layer of the CRF models, predict decodes with its transitions.
+        self.layer_crf: Optional[tf.keras.layers.Layer] = None
         self.embedding = embedding
         self.hyper_parameters = hyper_parameters
         self.sequence_length = sequence_length
@@ -79,14 +82,16 @@ class ABCLabelingModel(ABCTaskModel, ABC):
 
     def build_model_generator(self,
                               train_gen: CorpusGenerator) -> None:
-        if not self.text_processor.vocab2idx:
-            self.text_processor.build_vocab_generator(train_gen)
-        self.label_processor.build_vocab_generator(train_gen)
+        if not self.text_processor.vocab2idx or not self.label_processor.vocab2idx or self.sequence_length is None:
+            # scan the corpus only once for the text vocab, label vocab and sequence length.
+            stats = CorpusStatistics.from_generator(train_gen)
+            if not self.text_processor.vocab2idx:
+                self.text_processor.build_vocab_from_statistics(stats)
+            self.label_processor.build_vocab_from_statistics(stats)
+            if self.sequence_length is None:
+                self.sequence_length = self.embedding.get_seq_length_from_statistics(stats)
         self.embedding.setup_text_processor(self.text_processor)
 
-        if self.sequence_length is None:
-            self.sequence_length = self.embedding.get_seq_length_from_corpus(corpus_gen=train_gen)
-
         if self.tf_model is None:
             self.build_model_arc()
             self.compile_model()
@@ -128,6 +133,7 @@ class ABCLabelingModel(ABCTaskModel, ABC):
                               optimizer=optimizer,
                               metrics=metrics,
                               **kwargs)
+        self._compile_kwargs = {'loss': loss, 'metrics': metrics, **kwargs}
 
     def fit(self,
             x_train: TextSamplesVar,
@@ -137,7 +143,8 @@ class ABCLabelingModel(ABCTaskModel, ABC):
             batch_size: int = 64,
             epochs: int = 5,
             callbacks: List[tf.keras.callbacks.Callback] = None,
-            fit_kwargs: Dict = None) -> 'tf.keras.callbacks.History':
+            fit_kwargs: Dict = None,
+            bucket_boundaries: Union[int, List[int]] = None) -> 'tf.keras.callbacks.History':
         """
         Trains the model for a given number of epochs with given data set list.
 
@@ -155,6 +162,8 @@ class ABCLabelingModel(ABCTaskModel, ABC):
                 List of callbacks to apply during training.
                 See :py:class:`tf.keras.callbacks`.
             fit_kwargs: fit_kwargs: additional arguments passed to :meth:`tf.keras.Model.fit`
+            bucket_boundaries: group samples with similar length into the same batch, list of
+                sequence length boundaries or number of buckets. See :class:`kashgari.generators.BatchDataSet`
 
         Returns:
             A :py:class:`tf.keras.callback.History`  object. Its `History.history` attribute is
@@ -172,7 +181,8 @@ class ABCLabelingModel(ABCTaskModel, ABC):
                                   batch_size=batch_size,
                                   epochs=epochs,
                                   callbacks=callbacks,
-                                  fit_kwargs=fit_kwargs)
+                                  fit_kwargs=fit_kwargs,
+                                  bucket_boundaries=bucket_boundaries)
 
     def fit_generator(self,
                       train_sample_gen: CorpusGenerator,
@@ -180,7 +190,8 @@ class ABCLabelingModel(ABCTaskModel, ABC):
                       batch_size: int = 64,
                       epochs: int = 5,
                       callbacks: List['tf.keras.callbacks.Callback'] = None,
-                      fit_kwargs: Dict = None) -> 'tf.keras.callbacks.History':
+                      fit_kwargs: Dict = None,
+                      bucket_boundaries: Union[int, List[int]] = None) -> 'tf.keras.callbacks.History':
         """
         Trains the model for a given number of epochs with given data generator.
 
@@ -196,6 +207,8 @@ class ABCLabelingModel(ABCTaskModel, ABC):
                 List of callbacks to apply during training.
                 See `tf.keras.callbacks`.
             fit_kwargs: fit_kwargs: additional arguments passed to :meth:`tf.keras.Model.fit`
+            bucket_boundaries: group samples with similar length into the same batch, list of
+                sequence length boundaries or number of buckets. See :class:`kashgari.generators.BatchDataSet`
 
         Returns:
             A :py:class:`tf.keras.callback.History`  object. Its `History.history` attribute is
@@ -211,10 +224,10 @@ class ABCLabelingModel(ABCTaskModel, ABC):
                                  segment=self.embedding.segment,
                                  seq_length=self.sequence_length,
                                  max_position=self.embedding.max_position,
-                                 batch_size=batch_size)
+                                 batch_size=batch_size,
+                                 bucket_boundaries=bucket_boundaries)
 
-        if fit_kwargs is None:
-            fit_kwargs = {}
+        valid_set = None
         if valid_sample_gen:
             valid_set = BatchDataSet(valid_sample_gen,
                                      text_processor=self.text_processor,
@@ -222,15 +235,14 @@ class ABCLabelingModel(ABCTaskModel, ABC):
                                      segment=self.embedding.segment,
                                      seq_length=self.sequence_length,
                                      max_position=self.embedding.max_position,
-                                     batch_size=batch_size)
-            fit_kwargs['validation_data'] = valid_set.take()
-            fit_kwargs['validation_steps'] = len(valid_set)
+                                     batch_size=batch_size,
+                                     bucket_boundaries=bucket_boundaries)
 
-        return self.tf_model.fit(train_set.take(),
-                                 steps_per_epoch=len(train_set),
-                                 epochs=epochs,
-                                 callbacks=callbacks,
-                                 **fit_kwargs)
+        return self._fit_batch_dataset(train_set,
+                                       valid_set,
+                                       epochs=epochs,
+                                       callbacks=callbacks,
+                                       fit_kwargs=fit_kwargs)
 
     def predict(self,  # type: ignore[override]
                 x_data: TextSamplesVar,
@@ -266,9 +278,14 @@ class ABCLabelingModel(ABCTaskModel, ABC):
                                                    segment=self.embedding.segment,
                                                    seq_lengtg=seq_length,
                                                    max_position=self.embedding.max_position)
-            pred = self.tf_model.predict(tensor, batch_size=batch_size, **predict_kwargs)
-            pred = pred.argmax(-1)
+            pred = self.predict_on_tensor(tensor, batch_size=batch_size, predict_kwargs=predict_kwargs)
             lengths = [len(sen) for sen in x_data]
+            if self.layer_crf is not None:
+                # decode the emission scores with crf transitions, +2 for the bos and eos token
+                transitions = tf.keras.backend.get_value(self.layer_crf.trans)
+                pred = kashgari.utils.viterbi_decode(pred, transitions, [i + 2 for i in lengths])
+            else:
+                pred = pred.argmax(-1)
 
             res: List[List[str]] = self.label_processor.inverse_transform(pred,  # type: ignore
                                                                           lengths=lengths)
@@ -11,6 +11,7 @@
 
 import tensorflow as tf
 
+from kashgari.embeddings import BareEmbedding, WordEmbedding
 from kashgari.embeddings.abc_embedding import ABCEmbedding
 from kashgari.layers import L
 
@@ -32,9 +33,10 @@ class AttGRUDecoder(tf.keras.Model):
         # 用于注意力
         self.attention = L.BahdanauAttention(hidden_size)
 
-    def call(self, x, hidden, enc_output):
+    def call(self, x, hidden, enc_output, keys=None):
         # enc_output shape == (batch_size, max_length, hidden_size)
-        context_vector, attention_weights = self.attention(hidden, enc_output)
+        # keys from `self.attention.precompute_keys(enc_output)`, reuse them for all decoding steps
+        context_vector, attention_weights = self.attention(hidden, enc_output, keys=keys)
 
         if self.embedding.segment:
             x = x, tf.zeros(x.shape)
@@ -56,6 +58,45 @@ class AttGRUDecoder(tf.keras.Model):
 
         return x, state, attention_weights
 
+    def _embed(self, x):
+        if self.embedding.segment:
+            x = x, tf.zeros(tf.shape(x))
+        return self.embedding.embed_model(x)
+
+    def teacher_forcing(self, dec_inputs, hidden, enc_output):
+        """
+        Decode the whole target sequence with teacher forcing, same as calling the decoder step by step
+        with ``dec_inputs[:, t]``. The encoder side attention projection is computed once, and the
+        embedding and output projection run on the full sequence when possible.
+
+        Args:
+            dec_inputs: decoder input token ids with shape ``(batch_size, steps)``.
+            hidden: initial decoder hidden state.
+            enc_output: encoder output.
+
+        Returns:
+            logits with shape ``(batch_size, steps, vocab_size)``.
+        """
+        keys = self.attention.precompute_keys(enc_output)
+        # token-wise embeddings could be looked up at once, contextual ones would see the future tokens.
+        token_wise = isinstance(self.embedding, (BareEmbedding, WordEmbedding))
+        if token_wise:
+            embedded = self._embed(dec_inputs)
+
+        steps = tf.shape(dec_inputs)[1]
+        outputs = tf.TensorArray(hidden.dtype, size=steps)
+        for t in tf.range(steps):
+            context_vector, _ = self.attention(hidden, enc_output, keys=keys)
+            if token_wise:
+                x = embedded[:, t:t + 1]
+            else:
+                x = self._embed(dec_inputs[:, t:t + 1])
+            x = tf.concat([tf.expand_dims(context_vector, 1), x], axis=-1)
+            output, hidden = self.gru(x)
+            outputs = outputs.write(t, output[:, 0])
+        outputs = tf.transpose(outputs.stack(), [1, 0, 2])
+        return self.fc(outputs)
+
     def model(self):
         x1 = L.Input(shape=(None,))
         x2 = L.Input(shape=(self.hidden_size,))
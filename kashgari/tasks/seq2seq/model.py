@@ -10,7 +10,7 @@
 import json
 import os
 import pathlib
-from typing import Any, Tuple, List, Dict
+from typing import Any, Tuple, List, Dict, Optional
 
 import numpy as np
 import tensorflow as tf
@@ -21,7 +21,7 @@ from kashgari.embeddings import BareEmbedding
 from kashgari.embeddings.abc_embedding import ABCEmbedding
 from kashgari.generators import CorpusGenerator, Seq2SeqDataSet
 from kashgari.logger import logger
-from kashgari.processors import SequenceProcessor
+from kashgari.processors import CorpusStatistics, SequenceProcessor
 from kashgari.tasks.seq2seq.decoder import AttGRUDecoder
 from kashgari.tasks.seq2seq.encoder import GRUEncoder
 from kashgari.types import TextSamplesVar
@@ -86,7 +86,6 @@ class Seq2Seq:
         self.optimizer = tf.keras.optimizers.Adam()
         self.loss_object = tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True, reduction='none')
 
-    # @tf.function
     def loss_function(self, real: tf.Tensor, pred: tf.Tensor) -> tf.Tensor:
         mask = tf.math.logical_not(tf.math.equal(real, 0))
         loss_ = self.loss_object(real, pred)
@@ -128,48 +127,41 @@ class Seq2Seq:
 
         """
         if self.encoder is None:
-            self.encoder_processor.build_vocab_generator(train_gen)
-            self.decoder_processor.build_vocab_generator(train_gen)
+            # scan the corpus only once for the vocabs and sequence lengths.
+            stats = CorpusStatistics.from_generator(train_gen)
+            self.encoder_processor.build_vocab_from_statistics(stats)
+            self.decoder_processor.build_vocab_from_statistics(stats)
             self.encoder_embedding.setup_text_processor(self.encoder_processor)
             self.decoder_embedding.setup_text_processor(self.decoder_processor)
 
             if self.encoder_seq_length is None:
-                self.encoder_seq_length = self.encoder_embedding.get_seq_length_from_corpus(corpus_gen=train_gen,
-                                                                                            cover_rate=1.0)
+                self.encoder_seq_length = self.encoder_embedding.get_seq_length_from_statistics(stats,
+                                                                                                cover_rate=1.0)
                 logger.info(f"calculated encoder sequence length: {self.encoder_seq_length}")
 
             if self.decoder_seq_length is None:
-                self.decoder_seq_length = self.decoder_embedding.get_seq_length_from_corpus(corpus_gen=train_gen,
-                                                                                            use_label=True,
-                                                                                            cover_rate=1.0)
+                self.decoder_seq_length = self.decoder_embedding.get_seq_length_from_statistics(stats,
+                                                                                                use_label=True,
+                                                                                                cover_rate=1.0)
                 logger.info(f"calculated decoder sequence length: {self.decoder_seq_length}")
 
             self._build_encoder_decoder()
 
-    # @tf.function
+    @tf.function
     def train_step(self,  # type: ignore
                    input_seq,
                    target_seq,
                    enc_hidden):
-        loss = 0
-
         with tf.GradientTape() as tape:
             enc_output, enc_hidden = self.encoder(input_seq, enc_hidden)
 
-            dec_hidden = enc_hidden
-
-            bos_token_id = self.encoder_processor.vocab2idx[self.encoder_processor.token_bos]
-            dec_input = tf.expand_dims([bos_token_id] * target_seq.shape[0], 1)
-
             # Teacher forcing - feeding the target as the next input
-            for t in range(1, target_seq.shape[1]):
-                # pass enc_output to the decoder
-                predictions, dec_hidden, _ = self.decoder(dec_input, dec_hidden, enc_output)
-                loss += self.loss_function(target_seq[:, t], predictions)
-                # using teacher forcing
-                dec_input = tf.expand_dims(target_seq[:, t], 1)
-
-        batch_loss = (loss / int(target_seq.shape[1]))
+            predictions = self.decoder.teacher_forcing(target_seq[:, :-1], enc_hidden, enc_output)
+            real = target_seq[:, 1:]
+            # same as the sum of the loss of every step, mean over the batch and steps times the step count
+            loss = self.loss_function(real, predictions) * tf.cast(tf.shape(real)[1], predictions.dtype)
+
+        batch_loss = (loss / tf.cast(tf.shape(target_seq)[1], loss.dtype))
         variables = self.encoder.trainable_variables + self.decoder.trainable_variables
         gradients = tape.gradient(loss, variables)
         self.optimizer.apply_gradients(zip(gradients, variables))
@@ -264,47 +256,141 @@ class Seq2Seq:
 
         return model
 
-    def predict(self,
-                x_data: TextSamplesVar,
-                debug_info: bool = False) -> Tuple[List, np.ndarray]:
-        results = []
-        attentions = []
+    def _decode_batch(self,
+                      input_seq: np.ndarray,
+                      *,
+                      beam_width: int = 1,
+                      length_penalty: float = 0.0,
+                      return_attention: bool = False) -> Tuple[np.ndarray, np.ndarray, Any]:
+        """
+        Encode a batch at once, then decode all sequences step by step with beam search.
+        Beam width 1 is the greedy decoding.
 
+        Returns:
+            token ids with shape ``(batch_size, steps)``, output lengths without the eos token
+            and attention weights with shape ``(batch_size, steps, encoder_seq_length)`` or None.
+        """
+        batch_size, encoder_seq_length = input_seq.shape
+        vocab_size = self.decoder_processor.vocab_size
         bos_token_id = self.decoder_processor.vocab2idx[self.decoder_processor.token_bos]
         eos_token_id = self.decoder_processor.vocab2idx[self.decoder_processor.token_eos]
+        pad_token_id = self.decoder_processor.vocab2idx[self.decoder_processor.token_pad]
+
+        enc_output, enc_hidden = self.encoder(input_seq, tf.zeros((batch_size, self.hidden_size)))
+        # attention keys only depend on the encoder output, project once for all decoding steps
+        keys = tf.repeat(self.decoder.attention.precompute_keys(enc_output), beam_width, axis=0)
+        # every beam of a sample shares the same encoder output
+        enc_output = tf.repeat(enc_output, beam_width, axis=0)
+        dec_hidden = tf.repeat(enc_hidden, beam_width, axis=0)
+        dec_input = tf.fill((batch_size * beam_width, 1), bos_token_id)
+
+        # only the first beam is alive at the beginning, otherwise all beams would be the same
+        scores = tf.tile([[0.0] + [-np.inf] * (beam_width - 1)], [batch_size, 1])
+        finished = tf.zeros((batch_size, beam_width), dtype=tf.bool)
+        lengths = tf.zeros((batch_size, beam_width), dtype=tf.int32)
+        tokens = tf.zeros((batch_size, beam_width, 0), dtype=tf.int32)
+        attentions = tf.zeros((batch_size, beam_width, 0, encoder_seq_length))
+        # finished beams could only be extended with the padding token, at no cost
+        finished_log_probs = tf.one_hot(pad_token_id, vocab_size, on_value=0.0, off_value=-np.inf)
+
+        for _ in range(self.decoder_seq_length):
+            predictions, dec_hidden, att_weights = self.decoder(dec_input, dec_hidden, enc_output, keys=keys)
+            log_probs = tf.reshape(tf.nn.log_softmax(predictions), (batch_size, beam_width, vocab_size))
+            log_probs = tf.where(finished[:, :, tf.newaxis], finished_log_probs, log_probs)
+
+            candidates = tf.reshape(scores[:, :, tf.newaxis] + log_probs, (batch_size, beam_width * vocab_size))
+            scores, indices = tf.math.top_k(candidates, k=beam_width)
+            beam_indices = indices // vocab_size
+            next_tokens = tf.cast(indices % vocab_size, tf.int32)
+
+            previous_finished = tf.gather(finished, beam_indices, batch_dims=1)
+            finished = previous_finished | tf.equal(next_tokens, eos_token_id)
+            lengths = tf.gather(lengths, beam_indices, batch_dims=1) + tf.cast(~previous_finished, tf.int32)
+            tokens = tf.concat([tf.gather(tokens, beam_indices, batch_dims=1),
+                                next_tokens[:, :, tf.newaxis]], axis=-1)
+            dec_hidden = tf.reshape(dec_hidden, (batch_size, beam_width, -1))
+            dec_hidden = tf.reshape(tf.gather(dec_hidden, beam_indices, batch_dims=1),
+                                    (batch_size * beam_width, -1))
+            if return_attention:
+                att_weights = tf.reshape(att_weights, (batch_size, beam_width, 1, encoder_seq_length))
+                attentions = tf.concat([tf.gather(attentions, beam_indices, batch_dims=1),
+                                        tf.gather(att_weights, beam_indices, batch_dims=1)], axis=2)
+            if tf.reduce_all(finished):
+                break
+            dec_input = tf.reshape(next_tokens, (batch_size * beam_width, 1))
+
+        # length penalty of GNMT, ((5 + length) / 6) ^ alpha
+        penalty = tf.pow((5.0 + tf.cast(lengths, tf.float32)) / 6.0, length_penalty)
+        best_beam = tf.argmax(scores / penalty, axis=-1)[:, tf.newaxis]
+        best_tokens = tf.gather(tokens, best_beam, batch_dims=1)[:, 0].numpy()
+        best_lengths = (lengths - tf.cast(finished, tf.int32))
+        best_lengths = tf.gather(best_lengths, best_beam, batch_dims=1)[:, 0].numpy()
+        best_attentions = None
+        if return_attention:
+            best_attentions = tf.gather(attentions, best_beam, batch_dims=1)[:, 0].numpy()
+            # steps after the eos token are not part of the output
+            steps = np.arange(best_attentions.shape[1])
+            best_attentions[steps[np.newaxis, :] > best_lengths[:, np.newaxis]] = 0
+        return best_tokens, best_lengths, best_attentions
 
-        for sample in x_data:
-            input_seq = self.encoder_processor.transform([sample], seq_length=self.encoder_seq_length)
-            enc_hidden = tf.zeros((1, self.hidden_size))
-            enc_output, enc_hidden = self.encoder(input_seq, enc_hidden)
-            dec_hidden = enc_hidden
-
-            attention_plot = np.zeros((self.decoder_seq_length, self.encoder_seq_length))
-            token_out = []
+    def predict(self,
+                x_data: TextSamplesVar,
+                debug_info: bool = False,
+                *,
+                batch_size: int = 32,
+                beam_width: int = 1,
+                length_penalty: float = 0.0,
+                return_attention: bool = False) -> Tuple[List, Optional[np.ndarray]]:
+        """
+        Generates output sequences for the input samples. Samples are encoded and decoded in batches.
 
-            dec_input = tf.expand_dims([bos_token_id], 0)
+        Args:
+            x_data: input samples.
+            debug_info: print the input and output of each sample.
+            batch_size: number of samples to decode at once.
+            beam_width: beam search width, default 1 means greedy decoding.
+            length_penalty: alpha of the GNMT length penalty ``((5 + length) / 6) ^ alpha`` for
+                choosing the best beam, 0 means no penalty, larger value prefers longer outputs.
+            return_attention: return the attention weights for plotting or not.
+
+        Returns:
+            output sequences, and attention weights with shape ``(samples, decoder_seq_length, encoder_seq_length)``
+            if ``return_attention`` is True, otherwise None.
+        """
+        if beam_width < 1 or beam_width > self.decoder_processor.vocab_size:
+            raise ValueError(f'beam_width should between 1 and decoder vocab size, got {beam_width}')
+        bos_token_id = self.decoder_processor.vocab2idx[self.decoder_processor.token_bos]
 
-            for t in range(self.decoder_seq_length):
-                predictions, dec_hidden, att_weights = self.decoder(dec_input, dec_hidden, enc_output)
-                # storing the attention weights to plot later on
-                attention_weights = tf.reshape(att_weights, (-1,))
-                attention_plot[t] = attention_weights.numpy()
+        results = []
+        attentions = []
+        for batch_start in range(0, len(x_data), batch_size):
+            batch_x = x_data[batch_start: batch_start + batch_size]
+            input_seq = self.encoder_processor.transform(batch_x, seq_length=self.encoder_seq_length)
+            token_ids, lengths, att_weights = self._decode_batch(input_seq,
+                                                                 beam_width=beam_width,
+                                                                 length_penalty=length_penalty,
+                                                                 return_attention=return_attention)
+            # inverse_transform drops the first token as bos
+            token_ids = np.concatenate([np.full((len(batch_x), 1), bos_token_id), token_ids], axis=1)
+            batch_results = self.decoder_processor.inverse_transform(token_ids, lengths=lengths.tolist())
+
+            if return_attention:
+                attention_plot = np.zeros((len(batch_x), self.decoder_seq_length, input_seq.shape[1]))
+                attention_plot[:, :att_weights.shape[1]] = att_weights
+                attentions.append(attention_plot)
 
-                next_tokens = tf.argmax(predictions[0]).numpy()
-                token_out.append(next_tokens)
-                if next_tokens == eos_token_id:
-                    break
-                dec_input = tf.expand_dims([next_tokens], 0)
-            r = self.decoder_processor.inverse_transform([token_out])[0]
             if debug_info:
-                print('\n---------------------------')
-                print(f"input sentence  : {' '.join(sample)}")
-                print(f"input idx       : {input_seq[0]}")
-                print(f"output idx      : {token_out}")
-                print(f"output sentence : {' '.join(r)}")
-            results.append(r)
-            attentions.append(attention_plot)
-        return results, np.array(attentions)
+                for index, sample in enumerate(batch_x):
+                    print('\n---------------------------')
+                    print(f"input sentence  : {' '.join(sample)}")
+                    print(f"input idx       : {input_seq[index]}")
+                    print(f"output idx      : {token_ids[index, 1:lengths[index] + 1]}")
+                    print(f"output sentence : {' '.join(batch_results[index])}")
+            results.extend(batch_results)
+
+        if return_attention:
+            return results, np.concatenate(attentions)
+        return results, None
 
 
 if __name__ == "__main__":
@@ -321,7 +407,7 @@ if __name__ == "__main__":
     seq2seq.save('./seq2seq_model')
 
     s = Seq2Seq.load_model('./seq2seq_model')
-    res, att = seq2seq.predict(x[:10])
-    res2, att2 = s.predict(x[:10])
+    res, att = seq2seq.predict(x[:10], return_attention=True)
+    res2, att2 = s.predict(x[:10], return_attention=True)
     print(res == res2)
     print((att == att2).all())
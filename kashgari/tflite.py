@@ -0,0 +1,354 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: tflite.py
+# time: 2:36 下午
+
+"""
+Export task models to TFLite with post-training quantization, and predict with the exported model
+and the saved processors, without rebuilding the keras model.
+
+    >>> export_tflite(model, 'ner_tflite', quantization='int8', calibration_gen=CorpusGenerator(x, y))
+    >>> predictor = TFLitePredictor('ner_tflite')
+    >>> predictor.predict(x[:10])
+"""
+
+import json
+import os
+import pathlib
+import time
+from typing import Any, Dict, Iterator, List, Optional, Union, TYPE_CHECKING
+
+import numpy as np
+import tensorflow as tf
+
+from kashgari.generators import ABCGenerator
+from kashgari.logger import logger
+from kashgari.types import TextSamplesVar
+from kashgari.utils import load_data_object, viterbi_decode
+
+if TYPE_CHECKING:
+    from kashgari.tasks.abs_task_model import ABCTaskModel
+    from kashgari.tasks.classification import ABCClassificationModel
+    from kashgari.tasks.labeling import ABCLabelingModel
+
+QUANTIZATION_MODES = ('float32', 'float16', 'dynamic', 'int8')
+
+
+def _unwrap_rnn_layer(layer: tf.keras.layers.Layer) -> tf.keras.layers.Layer:
+    if isinstance(layer, tf.keras.layers.Bidirectional):
+        return layer.forward_layer
+    return layer
+
+
+def _unfused_rnn_layer(layer: tf.keras.layers.Layer) -> tf.keras.layers.Layer:
+    if isinstance(layer, tf.keras.layers.Bidirectional):
+        return tf.keras.layers.Bidirectional(_unfused_rnn_layer(layer.forward_layer),
+                                             backward_layer=_unfused_rnn_layer(layer.backward_layer),
+                                             merge_mode=layer.merge_mode,
+                                             name=layer.name)
+    cell_class = tf.keras.layers.LSTMCell if isinstance(layer, tf.keras.layers.LSTM) else tf.keras.layers.GRUCell
+    return tf.keras.layers.RNN(cell_class.from_config(layer.cell.get_config()),
+                               return_sequences=layer.return_sequences,
+                               return_state=layer.return_state,
+                               go_backwards=layer.go_backwards,
+                               name=layer.name)
+
+
+def _get_export_model(model: 'ABCTaskModel', quantization: str) -> tf.keras.Model:
+    """
+    Get the model to convert. The CRF layer only masks the emission scores, CRF models export the emission scores
+    and decode with the transitions in python. Labeling models export the logits before the softmax, which have the
+    same argmax and keep the precision of the int8 outputs. Masked embeddings are replaced with unmasked ones,
+    because samples are predicted one by one without padding, and the masked RNN layers could not be quantized
+    by the converter. For the float16 quantization, LSTM and GRU layers are replaced with the generic RNN layers,
+    the converter crashes on the float16 fused RNN kernels.
+    """
+    from kashgari.tasks.labeling import ABCLabelingModel
+
+    layer_crf = getattr(model, 'layer_crf', None)
+    last_layer = model.tf_model.layers[-1]
+    softmax_output = isinstance(last_layer, tf.keras.layers.Activation) and last_layer.get_config()['activation'] == 'softmax'
+    if layer_crf is not None:
+        export_model = tf.keras.Model(model.tf_model.inputs, layer_crf.input)
+    elif isinstance(model, ABCLabelingModel) and softmax_output:
+        export_model = tf.keras.Model(model.tf_model.inputs, last_layer.input)
+    else:
+        export_model = model.tf_model
+
+    rnn_classes = (tf.keras.layers.LSTM, tf.keras.layers.GRU)
+
+    def is_fused_rnn(layer: tf.keras.layers.Layer) -> bool:
+        return quantization == 'float16' and isinstance(_unwrap_rnn_layer(layer), rnn_classes)
+
+    if not any(getattr(layer, 'mask_zero', False) or is_fused_rnn(layer) for layer in export_model.layers):
+        return export_model
+
+    def clone_layer(layer: tf.keras.layers.Layer) -> tf.keras.layers.Layer:
+        if is_fused_rnn(layer):
+            return _unfused_rnn_layer(layer)
+        config = layer.get_config()
+        if config.get('mask_zero'):
+            config['mask_zero'] = False
+        return layer.__class__.from_config(config)
+
+    unmasked_model = tf.keras.models.clone_model(export_model, clone_function=clone_layer)
+    unmasked_model.set_weights(export_model.get_weights())
+    return unmasked_model
+
+
+def _transform_sample(text_processor: Any, sample: List[str], segment: bool, max_position: int) -> List[np.ndarray]:
+    tensor = text_processor.transform([sample], segment=segment, max_position=max_position)
+    return list(tensor) if segment else [tensor]
+
+
+def export_tflite(model: 'ABCTaskModel',
+                  model_path: str,
+                  *,
+                  quantization: str = 'dynamic',
+                  calibration_gen: ABCGenerator = None,
+                  calibration_samples: int = 200) -> str:
+    """
+    Export the labeling or classification model to a TFLite model with post-training quantization.
+
+    The TFLite model predicts one sample per call, so samples are not padded and every invocation only costs
+    the length of the sample. Files in the export folder:
+
+    - ``model.tflite``: the TFLite model.
+    - ``tflite_config.json``: the saved processors and the decoding config, loaded by :class:`TFLitePredictor`.
+
+    Args:
+        model: built labeling or classification model.
+        model_path: export folder.
+        quantization: one of ``float32``, no quantization; ``float16``, float16 weights;
+            ``dynamic``, int8 weights with float activations; ``int8``, int8 weights and activations,
+            activation ranges are calibrated with ``calibration_gen``.
+        calibration_gen: sample generator for calibrating the int8 quantization, usually a part of the train corpus.
+        calibration_samples: max number of samples used for calibrating.
+
+    Returns:
+        path of the export folder.
+    """
+    from kashgari.tasks.classification import ABCClassificationModel
+
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f'Quantization should be one of {QUANTIZATION_MODES}, got {quantization}.')
+    if quantization == 'int8' and calibration_gen is None:
+        raise ValueError('Int8 quantization needs the calibration_gen for calibrating the activation ranges.')
+
+    export_model = _get_export_model(model, quantization)
+    segment = model.embedding.segment
+    max_position = model.embedding.max_position
+    # fixed batch size keeps the state shape of the RNN layers static, which is required by the converter.
+    input_signature = [tf.TensorSpec(shape=[1, None], dtype=i.dtype, name=f'input_{index}')
+                       for index, i in enumerate(export_model.inputs)]
+
+    @tf.function(input_signature=input_signature)
+    def predict_function(*inputs: tf.Tensor) -> tf.Tensor:
+        if len(inputs) == 1:
+            return export_model(inputs[0], training=False)
+        return export_model(list(inputs), training=False)
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([predict_function.get_concrete_function()],
+                                                                export_model)
+    if quantization != 'float32':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        def representative_dataset() -> Iterator[List[np.ndarray]]:
+            for index, (sample, _) in enumerate(calibration_gen):
+                if index >= calibration_samples:
+                    break
+                yield [i.astype(spec.dtype.as_numpy_dtype)
+                       for i, spec in zip(_transform_sample(model.text_processor, sample, segment, max_position),
+                                          input_signature)]
+
+        converter.representative_dataset = representative_dataset
+    tflite_model = converter.convert()
+
+    pathlib.Path(model_path).mkdir(exist_ok=True, parents=True)
+    model_path = os.path.abspath(model_path)
+    with open(os.path.join(model_path, 'model.tflite'), 'wb') as f:
+        f.write(tflite_model)
+
+    layer_crf = getattr(model, 'layer_crf', None)
+    config = {
+        'quantization': quantization,
+        'task': 'classification' if isinstance(model, ABCClassificationModel) else 'labeling',
+        'multi_label': getattr(model, 'multi_label', False),
+        'segment': segment,
+        'max_position': max_position,
+        # the XNNPACK delegate keeps the first input shape of the generic RNN loops, which breaks the resizing.
+        'default_delegates': not any(type(_unwrap_rnn_layer(layer)) is tf.keras.layers.RNN
+                                     for layer in export_model.layers),
+        'crf_transitions': tf.keras.backend.get_value(layer_crf.trans).tolist() if layer_crf is not None else None,
+        'text_processor': model.text_processor.to_dict(),
+        'label_processor': model.label_processor.to_dict()
+    }
+    with open(os.path.join(model_path, 'tflite_config.json'), 'w') as f:
+        f.write(json.dumps(config, indent=2, ensure_ascii=False))
+    logger.info(f'TFLite model exported to {model_path}, quantization: {quantization}, '
+                f'size: {len(tflite_model) / 1024 / 1024:.2f}MB')
+    return model_path
+
+
+class TFLitePredictor:
+    """
+    Predict with the TFLite model exported by :func:`export_tflite`, the outputs are the same
+    as the ``predict`` method of the task model.
+    """
+
+    def __init__(self, model_path: str, *, num_threads: int = None) -> None:
+        """
+        Args:
+            model_path: export folder of :func:`export_tflite`.
+            num_threads: number of threads of the TFLite interpreter, default None, decided by TFLite.
+        """
+        self.model_path = model_path
+        with open(os.path.join(model_path, 'tflite_config.json'), 'r') as f:
+            self.config: Dict[str, Any] = json.loads(f.read())
+        self.text_processor = load_data_object(self.config['text_processor'])
+        self.label_processor = load_data_object(self.config['label_processor'])
+        self.text_processor.segment = self.config['segment']
+
+        self.crf_transitions: Optional[np.ndarray] = None
+        if self.config['crf_transitions'] is not None:
+            self.crf_transitions = np.array(self.config['crf_transitions'], dtype=np.float32)
+
+        if self.config.get('default_delegates', True):
+            op_resolver_type = tf.lite.experimental.OpResolverType.AUTO
+        else:
+            op_resolver_type = tf.lite.experimental.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        self.interpreter = tf.lite.Interpreter(model_path=os.path.join(model_path, 'model.tflite'),
+                                               num_threads=num_threads,
+                                               experimental_op_resolver_type=op_resolver_type)
+        # inputs are named ``input_{index}`` by the export function.
+        self._input_details = sorted(self.interpreter.get_input_details(),
+                                     key=lambda detail: int(detail['name'].rsplit('input_', 1)[1].split(':')[0]))
+        self._output_index = self.interpreter.get_output_details()[0]['index']
+        self.interpreter.allocate_tensors()
+
+    def predict_raw(self, sample: List[str]) -> np.ndarray:
+        """
+        Get the model output of one sample, the scores before the softmax or the CRF layer with shape
+        ``(1, seq_length, num_labels)`` for the labeling models, and the probabilities with shape
+        ``(1, num_labels)`` for the classification models.
+        """
+        inputs = _transform_sample(self.text_processor, sample, self.config['segment'], self.config['max_position'])
+        interpreter = self.interpreter
+        if any(tuple(interpreter.get_tensor(detail['index']).shape) != tensor.shape
+               for detail, tensor in zip(self._input_details, inputs)):
+            for detail, tensor in zip(self._input_details, inputs):
+                interpreter.resize_tensor_input(detail['index'], tensor.shape)
+            interpreter.allocate_tensors()
+        # fused RNN kernels keep the states in variables between invocations.
+        interpreter.reset_all_variables()
+        for detail, tensor in zip(self._input_details, inputs):
+            interpreter.set_tensor(detail['index'], tensor.astype(detail['dtype']))
+        interpreter.invoke()
+        return interpreter.get_tensor(self._output_index)
+
+    def predict(self,
+                x_data: TextSamplesVar,
+                *,
+                multi_label_threshold: float = 0.5) -> List[Any]:
+        """
+        Predict the labels of the samples.
+
+        Args:
+            x_data: token samples.
+            multi_label_threshold: threshold of the multi-label classification.
+
+        Returns:
+            label sequences of the labeling models, or labels of the classification models.
+        """
+        results = []
+        for sample in x_data:
+            pred = self.predict_raw(sample)
+            if self.config['task'] == 'classification':
+                if self.config['multi_label']:
+                    results += self.label_processor.multi_label_binarizer.inverse_transform(
+                        pred, threshold=multi_label_threshold)
+                else:
+                    results += self.label_processor.inverse_transform(pred.argmax(-1))
+            else:
+                if self.crf_transitions is not None:
+                    pred = viterbi_decode(pred, self.crf_transitions, [pred.shape[1]])
+                else:
+                    pred = pred.argmax(-1)
+                results += self.label_processor.inverse_transform(pred, lengths=[len(sample)])
+        return results
+
+
+def _latency_stats(latencies: List[float]) -> Dict[str, float]:
+    return {
+        'mean_ms': float(np.mean(latencies) * 1000),
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000)
+    }
+
+
+def compare_with_model(model: Union['ABCLabelingModel', 'ABCClassificationModel'],
+                       predictor: TFLitePredictor,
+                       x_data: TextSamplesVar,
+                       y_data: List[Any] = None) -> Dict[str, Any]:
+    """
+    Compare the TFLite model with the float keras model on the samples, with single sample requests,
+    which is the common case of the online serving.
+
+    Args:
+        model: the float task model.
+        predictor: predictor of the exported TFLite model.
+        x_data: samples to predict.
+        y_data: labels of the samples, the accuracies are reported when given.
+
+    Returns:
+        report dict of the model sizes, latencies, the agreement of the predictions and the accuracies.
+        Agreement and accuracy are calculated by labels for the labeling models, and by samples for
+        the classification models.
+    """
+    model_preds: List[Any] = []
+    tflite_preds: List[Any] = []
+    model_latencies: List[float] = []
+    tflite_latencies: List[float] = []
+    for sample in x_data:
+        start = time.perf_counter()
+        model_preds += model.predict([sample])
+        model_latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        tflite_preds += predictor.predict([sample])
+        tflite_latencies.append(time.perf_counter() - start)
+
+    def flatten(labels: List[Any]) -> List[Any]:
+        if predictor.config['task'] == 'labeling':
+            return [label for sample in labels for label in sample]
+        return [sorted(i) if isinstance(i, list) else i for i in labels]
+
+    def agreement(labels1: List[Any], labels2: List[Any]) -> float:
+        flat1, flat2 = flatten(labels1), flatten(labels2)
+        return sum(a == b for a, b in zip(flat1, flat2)) / max(len(flat1), 1)
+
+    model_bytes = sum(w.nbytes for w in model.tf_model.get_weights())
+    tflite_bytes = os.path.getsize(os.path.join(predictor.model_path, 'model.tflite'))
+    report: Dict[str, Any] = {
+        'quantization': predictor.config['quantization'],
+        'sample_count': len(x_data),
+        'model_size_mb': model_bytes / 1024 / 1024,
+        'tflite_size_mb': tflite_bytes / 1024 / 1024,
+        'model_latency': _latency_stats(model_latencies),
+        'tflite_latency': _latency_stats(tflite_latencies),
+        'agreement': agreement(model_preds, tflite_preds)
+    }
+    if y_data is not None:
+        report['model_accuracy'] = agreement(model_preds, y_data)
+        report['tflite_accuracy'] = agreement(tflite_preds, y_data)
+    return report
+
+
+if __name__ == "__main__":
+    pass
@@ -7,7 +7,21 @@
 # file: base_tokenizer.py
 # time: 11:24 上午
 
-from typing import List
+from typing import List, Optional
+
+from kashgari.utils.chunks import iter_chunks, map_chunks
+
+# tokenizer of the worker process, sent once by the pool initializer instead of with every chunk
+_worker_tokenizer: Optional['Tokenizer'] = None
+
+
+def _set_worker_tokenizer(tokenizer: 'Tokenizer') -> None:
+    global _worker_tokenizer
+    _worker_tokenizer = tokenizer
+
+
+def _tokenize_chunk_in_worker(texts: List[str]) -> List[List[str]]:
+    return _worker_tokenizer._tokenize_chunk(texts)  # type: ignore
 
 
 class Tokenizer:
@@ -25,3 +39,33 @@ class Tokenizer:
             List of tokens in this sample
         """
         return text.split(' ')
+
+    def tokenize_batch(self,
+                       texts: List[str],
+                       *,
+                       workers: int = 1,
+                       chunk_size: int = 1000) -> List[List[str]]:
+        """
+        Tokenize a batch of texts, optionally in a process pool.
+
+        Args:
+            texts: target text samples
+            workers: number of tokenizing processes, default 1 which tokenizes in current process.
+            chunk_size: number of texts sent to a worker at a time.
+
+        Returns:
+            List of token lists, in the same order of the texts
+        """
+        if workers <= 1 or len(texts) <= chunk_size:
+            return self._tokenize_chunk(texts)
+        results: List[List[str]] = []
+        for chunk_tokens in map_chunks(_tokenize_chunk_in_worker,
+                                       iter_chunks(texts, chunk_size),
+                                       workers=workers,
+                                       initializer=_set_worker_tokenizer,
+                                       initargs=(self,)):
+            results.extend(chunk_tokens)
+        return results
+
+    def _tokenize_chunk(self, texts: List[str]) -> List[List[str]]:
+        return [self.tokenize(text) for text in texts]
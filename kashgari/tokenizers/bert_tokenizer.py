@@ -11,7 +11,7 @@
 
 import codecs
 import unicodedata
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Any
 
 from kashgari.tokenizers.base_tokenizer import Tokenizer
 
@@ -21,6 +21,45 @@ TOKEN_CLS = '[CLS]'  # Token for classification
 TOKEN_SEP = '[SEP]'  # Token for separation
 TOKEN_MASK = '[MASK]'  # Token for masking
 
+# marks the end of a token in the word piece trie, never a character of the text
+_TRIE_END = ''
+
+
+class _CharTable(dict):
+    """
+    ``str.translate`` table built on demand, maps each character to its replacement
+    in the spaced text, the ``unicodedata`` lookups run once per distinct character.
+    """
+
+    def __missing__(self, code: int) -> Optional[str]:
+        ch = chr(code)
+        if BertTokenizer._is_punctuation(ch) or BertTokenizer._is_cjk_character(ch):
+            value: Optional[str] = ' ' + ch + ' '
+        elif BertTokenizer._is_space(ch):
+            value = ' '
+        elif code == 0 or code == 0xfffd or BertTokenizer._is_control(ch):
+            value = None
+        else:
+            value = ch
+        self[code] = value
+        return value
+
+
+class _NonSpacingMarkTable(dict):
+    """
+    ``str.translate`` table built on demand, removes the non-spacing marks.
+    """
+
+    def __missing__(self, code: int) -> Optional[str]:
+        ch = chr(code)
+        value = None if unicodedata.category(ch) == 'Mn' else ch
+        self[code] = value
+        return value
+
+
+_CHAR_TABLE = _CharTable()
+_NON_SPACING_MARK_TABLE = _NonSpacingMarkTable()
+
 
 class BertTokenizer(Tokenizer):
     """
@@ -60,6 +99,14 @@ class BertTokenizer(Tokenizer):
         self._pad_index: int = pad_index
         self._cased: bool = cased
 
+        # prefix tries of all tokens for the word start, and of the ``##`` tokens for the continuation
+        self._word_trie: Dict[str, Any] = {}
+        self._suffix_trie: Dict[str, Any] = {}
+        for token in self._token_dict:
+            self._add_to_trie(self._word_trie, token)
+            if token.startswith('##'):
+                self._add_to_trie(self._suffix_trie, token[2:])
+
     @classmethod
     def load_from_vocab_file(cls, vocab_path: str) -> 'BertTokenizer':
         token2idx: Dict[str, int] = {}
@@ -69,6 +116,13 @@ class BertTokenizer(Tokenizer):
                 token2idx[token] = len(token2idx)
         return BertTokenizer(token_dict=token2idx)
 
+    @staticmethod
+    def _add_to_trie(trie: Dict[str, Any], token: str) -> None:
+        node = trie
+        for ch in token:
+            node = node.setdefault(ch, {})
+        node[_TRIE_END] = True
+
     def tokenize(self, text: str) -> List[str]:
         """
         Split text to tokens.
@@ -81,48 +135,61 @@ class BertTokenizer(Tokenizer):
         tokens = self._tokenize(text)
         return tokens
 
-    def _tokenize(self, text: str) -> List[str]:
+    def _tokenize_chunk(self, texts: List[str]) -> List[List[str]]:
+        # word pieces of the repeated words are computed once per chunk
+        word_cache: Dict[str, List[str]] = {}
+        return [self._tokenize(text, word_cache=word_cache) for text in texts]
+
+    def _tokenize(self, text: str, word_cache: Dict[str, List[str]] = None) -> List[str]:
         if not self._cased:
             text = unicodedata.normalize('NFD', text)
-            text = ''.join([ch for ch in text if unicodedata.category(ch) != 'Mn'])
+            text = text.translate(_NON_SPACING_MARK_TABLE)
             text = text.lower()
-        spaced = ''
-        for ch in text:
-            if self._is_punctuation(ch) or self._is_cjk_character(ch):
-                spaced += ' ' + ch + ' '
-            elif self._is_space(ch):
-                spaced += ' '
-            elif ord(ch) == 0 or ord(ch) == 0xfffd or self._is_control(ch):
-                continue
-            else:
-                spaced += ch
+        words = text.translate(_CHAR_TABLE).split()
 
         if len(self._token_dict) > 0:
             tokens = []
-            for word in spaced.strip().split():
-                tokens += self._word_piece_tokenize(word)
+            for word in words:
+                if word_cache is None:
+                    tokens += self._word_piece_tokenize(word)
+                    continue
+                pieces = word_cache.get(word)
+                if pieces is None:
+                    pieces = self._word_piece_tokenize(word)
+                    word_cache[word] = pieces
+                tokens += pieces
             return tokens
         else:
-            return spaced.strip().split()
+            return words
 
     def _word_piece_tokenize(self, word: str) -> List[str]:
+        """
+        Greedy longest-match-first word piece tokenization, walks the vocab trie from each start position.
+        """
         if word in self._token_dict:
             return [word]
         tokens = []
-        start, stop = 0, 0
+        start = 0
+        trie = self._word_trie
         while start < len(word):
-            stop = len(word)
-            while stop > start:
-                sub = word[start:stop]
-                if start > 0:
-                    sub = '##' + sub
-                if sub in self._token_dict:
+            # find the longest token in the trie starting at `start`
+            node = trie
+            stop = start
+            for index in range(start, len(word)):
+                node = node.get(word[index])
+                if node is None:
                     break
-                stop -= 1
-            if start == stop:
+                if _TRIE_END in node:
+                    stop = index + 1
+            if stop == start:
+                # no matched token, take one character
                 stop += 1
-            tokens.append(sub)
+            if start > 0:
+                tokens.append('##' + word[start:stop])
+            else:
+                tokens.append(word[start:stop])
             start = stop
+            trie = self._suffix_trie
         return tokens
 
     @staticmethod
@@ -7,7 +7,7 @@
 # file: jieba_tokenizer.py
 # time: 11:54 上午
 
-from typing import List, Any
+from typing import List, Any, Dict
 
 from kashgari.tokenizers.base_tokenizer import Tokenizer
 
@@ -24,6 +24,17 @@ class JiebaTokenizer(Tokenizer):
         except ModuleNotFoundError:
             raise ModuleNotFoundError("Jieba module not found, please install use `pip install jieba`")
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # modules can't be pickled, re-import jieba when sending to the worker processes
+        state = self.__dict__.copy()
+        del state['_jieba']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        import jieba
+        self.__dict__.update(state)
+        self._jieba = jieba
+
     def tokenize(self, text: str, **kwargs: Any) -> List[str]:
         """
         Tokenize text into token sequence
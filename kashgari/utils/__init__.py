@@ -13,10 +13,15 @@ from typing import TYPE_CHECKING, Union
 from tensorflow.keras.utils import CustomObjectScope
 
 from kashgari import custom_objects
+from .chunks import iter_chunks
+from .chunks import map_chunks
+from .crf import viterbi_decode
 from .data import get_list_subset
 from .data import unison_shuffled_copies
+from .lru_cache import LRUCache
 from .multi_label import MultiLabelBinarizer
 from .serialize import load_data_object
+from .saved_model import convert_to_saved_model
 
 if TYPE_CHECKING:
     from kashgari.tasks.labeling import ABCLabelingModel
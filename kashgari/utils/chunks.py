@@ -0,0 +1,59 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: chunks.py
+# time: 2:15 下午
+
+import collections
+import itertools
+import multiprocessing
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def iter_chunks(samples: Iterable[T], chunk_size: int) -> Iterator[List[T]]:
+    """
+    Split an iterable into lists of ``chunk_size`` items, the last chunk could be smaller.
+    """
+    iterator = iter(samples)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def map_chunks(func: Callable[[List[T]], Any],
+               chunks: Iterable[List[T]],
+               workers: int = 1,
+               initializer: Callable = None,
+               initargs: Tuple = ()) -> Iterator[Any]:
+    """
+    Apply ``func`` to every chunk and yield results in the order of chunks.
+    When ``workers > 1``, chunks are processed in a process pool, ``func`` must be picklable,
+    ``initializer(*initargs)`` runs once in each worker process, for sending large objects only once.
+    """
+    if workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for chunk in chunks:
+            yield func(chunk)
+        return
+
+    with multiprocessing.Pool(workers, initializer=initializer, initargs=initargs) as pool:
+        # keep a bounded number of chunks in flight, Pool.imap reads the whole input eagerly.
+        pending: Deque = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(func, (chunk,)))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,121 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: crf.py
+# time: 3:12 下午
+
+from typing import Union, List
+
+import numpy as np
+import tensorflow as tf
+
+
+def viterbi_decode(emissions: np.ndarray,
+                   transitions: np.ndarray,
+                   lengths: Union[List[int], np.ndarray] = None) -> np.ndarray:
+    """
+    Batched viterbi decoding for the linear chain CRF, vectorized over the batch.
+
+    Args:
+        emissions: emission scores with shape ``(batch_size, seq_length, num_tags)``,
+            such as the output of the ``ConditionalRandomField`` layer.
+            Masked positions could be ``-inf``, they won't be decoded.
+        transitions: transition scores with shape ``(num_tags, num_tags)``,
+            ``transitions[i, j]`` is the score from tag ``i`` to tag ``j``.
+        lengths: valid length of each sequence. Default None,
+            which means the finite positions of the emissions.
+
+    Returns:
+        best tag path with shape ``(batch_size, seq_length)``, positions after the length are 0.
+    """
+    emissions = np.asarray(emissions)
+    transitions = np.asarray(transitions, dtype=emissions.dtype)
+    batch_size, seq_length, _ = emissions.shape
+
+    if lengths is None:
+        lengths = np.isfinite(emissions).all(axis=-1).sum(axis=-1)
+    lengths = np.minimum(np.asarray(lengths, dtype=np.int64), seq_length)
+    # masked positions are skipped, replace -inf to avoid nan in the discarded scores.
+    emissions = np.where(np.isfinite(emissions), emissions, 0)
+
+    batch_index = np.arange(batch_size)
+    tags = np.zeros((batch_size, seq_length), dtype=np.int64)
+    if seq_length == 0:
+        return tags
+
+    score = emissions[:, 0]
+    # (current tag, previous tag), reduce on the contiguous last axis
+    transitions_t = np.ascontiguousarray(transitions.T)
+    backpointers = np.zeros((seq_length, batch_size, transitions.shape[0]), dtype=np.int64)
+    for t in range(1, seq_length):
+        # (batch_size, current tag, previous tag)
+        candidates = score[:, None, :] + transitions_t[None, :, :]
+        best_previous = candidates.argmax(axis=-1)
+        backpointers[t] = best_previous
+        next_score = np.take_along_axis(candidates, best_previous[:, :, None], axis=-1)[:, :, 0] + emissions[:, t]
+        score = np.where((t < lengths)[:, None], next_score, score)
+
+    current = score.argmax(axis=-1)
+    for t in range(seq_length - 1, -1, -1):
+        active = t < lengths
+        tags[active, t] = current[active]
+        if t > 0:
+            current = np.where(active, backpointers[t, batch_index, current], current)
+    return tags
+
+
+def tf_viterbi_decode(emissions: tf.Tensor,
+                      transitions: tf.Tensor,
+                      lengths: tf.Tensor) -> tf.Tensor:
+    """
+    Graph version of :func:`viterbi_decode`, for decoding inside the exported models.
+
+    Args:
+        emissions: emission scores with shape ``(batch_size, seq_length, num_tags)``,
+            masked positions could be ``-inf``.
+        transitions: transition scores with shape ``(num_tags, num_tags)``.
+        lengths: int tensor of the valid length of each sequence, with shape ``(batch_size,)``.
+
+    Returns:
+        int32 tensor of the best tag path with shape ``(batch_size, seq_length)``, positions after the length are 0.
+    """
+    emissions = tf.convert_to_tensor(emissions)
+    transitions = tf.cast(transitions, emissions.dtype)
+    seq_length = tf.shape(emissions)[1]
+    lengths = tf.minimum(tf.cast(lengths, tf.int32), seq_length)
+    emissions = tf.where(tf.math.is_finite(emissions), emissions, tf.zeros_like(emissions))
+    # time major, (seq_length, batch_size, num_tags)
+    emissions = tf.transpose(emissions, [1, 0, 2])
+    steps = tf.range(1, seq_length)
+
+    def forward(carry: tf.Tensor, elems: tf.Tensor) -> tf.Tensor:
+        score, _ = carry
+        emission, t = elems
+        # (batch_size, previous tag, current tag)
+        candidates = score[:, :, None] + transitions[None, :, :]
+        best_previous = tf.argmax(candidates, axis=1, output_type=tf.int32)
+        next_score = tf.reduce_max(candidates, axis=1) + emission
+        return tf.where((t < lengths)[:, None], next_score, score), best_previous
+
+    initial_score = emissions[0]
+    scores, backpointers = tf.scan(forward,
+                                   (emissions[1:], steps),
+                                   initializer=(initial_score, tf.zeros_like(initial_score, dtype=tf.int32)))
+    last_score = tf.concat([initial_score[None], scores], axis=0)[-1]
+    last_tag = tf.argmax(last_score, axis=-1, output_type=tf.int32)
+
+    def backward(current: tf.Tensor, elems: tf.Tensor) -> tf.Tensor:
+        backpointer, t = elems
+        previous = tf.gather(backpointer, current[:, None], batch_dims=1)[:, 0]
+        return tf.where(t < lengths, previous, current)
+
+    previous_tags = tf.scan(backward, (backpointers, steps), initializer=last_tag, reverse=True)
+    tags = tf.transpose(tf.concat([previous_tags, last_tag[None]], axis=0))
+    return tf.where(tf.range(seq_length)[None, :] < lengths[:, None], tags, tf.zeros_like(tags))
+
+
+if __name__ == "__main__":
+    pass
@@ -8,11 +8,12 @@
 # time: 11:22 上午
 
 import random
-from typing import List, Union, TypeVar, Tuple
+from typing import Any, List, Union, TypeVar, Tuple, overload
 
 import numpy as np
 
 T = TypeVar("T")
+U = TypeVar("U")
 
 
 def get_list_subset(target: List[T], index_list: List[int]) -> List[T]:
@@ -28,8 +29,18 @@ def get_list_subset(target: List[T], index_list: List[int]) -> List[T]:
     return [target[i] for i in index_list if i < len(target)]
 
 
-def unison_shuffled_copies(a: List[T],
-                           b: List[T]) -> Union[Tuple[List[T], ...], Tuple[np.ndarray, ...]]:
+@overload
+def unison_shuffled_copies(a: List[T], b: List[U]) -> Tuple[List[T], List[U]]:
+    ...
+
+
+@overload
+def unison_shuffled_copies(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    ...
+
+
+def unison_shuffled_copies(a: Union[List[Any], np.ndarray],
+                           b: Union[List[Any], np.ndarray]) -> Tuple[Any, Any]:
     """
     Union shuffle two arrays
     Args:
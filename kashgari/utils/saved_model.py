@@ -0,0 +1,185 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: saved_model.py
+# time: 10:26 上午
+
+import os
+import time
+from typing import Any, Dict, Tuple, Union, TYPE_CHECKING
+
+import tensorflow as tf
+
+from kashgari.logger import logger
+from kashgari.utils.crf import tf_viterbi_decode
+
+if TYPE_CHECKING:
+    from kashgari.tasks.labeling import ABCLabelingModel
+    from kashgari.tasks.classification import ABCClassificationModel
+
+
+def _build_token_lookup(text_processor: Any) -> Tuple[tf.lookup.StaticHashTable, int, int]:
+    """
+    Build the token to id table from the ``vocab2idx``, and get the ids of the bos and eos token.
+    """
+    vocab2idx = text_processor.vocab2idx
+    table = tf.lookup.StaticHashTable(
+        tf.lookup.KeyValueTensorInitializer(tf.constant(list(vocab2idx.keys()), dtype=tf.string),
+                                            tf.constant(list(vocab2idx.values()), dtype=tf.int64)),
+        default_value=vocab2idx.get(text_processor.token_unk, 0))
+    if text_processor.token_bos in vocab2idx:
+        return table, vocab2idx[text_processor.token_bos], vocab2idx[text_processor.token_eos]
+    return table, vocab2idx[text_processor.token_pad], vocab2idx[text_processor.token_pad]
+
+
+def _encode_tokens(tokens: tf.Tensor,
+                   table: tf.lookup.StaticHashTable,
+                   bos_id: int,
+                   eos_id: int,
+                   model: Union["ABCLabelingModel", "ABCClassificationModel"]) -> Tuple[tf.Tensor, tf.Tensor]:
+    """
+    Same as ``SequenceProcessor.transform``, ``[bos] + ids + [eos]`` and zero padding.
+
+    Returns:
+        tuple of the token ids and the token count of every sample.
+    """
+    input_dtype = model.tf_model.inputs[0].dtype
+    token_mask = tf.not_equal(tokens, '')
+    lengths = tf.reduce_sum(tf.cast(token_mask, tf.int32), axis=1)
+    token_ids = tf.where(token_mask, tf.cast(table.lookup(tokens), input_dtype), tf.zeros([], input_dtype))
+    batch_size = tf.shape(tokens)[0]
+    token_ids = tf.concat([tf.fill([batch_size, 1], tf.cast(bos_id, input_dtype)),
+                           token_ids,
+                           tf.zeros([batch_size, 1], input_dtype)], axis=1)
+    positions = tf.range(tf.shape(token_ids)[1])[None, :]
+    token_ids = tf.where(positions == lengths[:, None] + 1, tf.cast(eos_id, input_dtype), token_ids)
+    if model.embedding.max_position is not None:
+        token_ids = token_ids[:, :model.embedding.max_position]
+    return token_ids, lengths
+
+
+def _call_model(token_ids: tf.Tensor,
+                model: Union["ABCLabelingModel", "ABCClassificationModel"]) -> tf.Tensor:
+    if model.embedding.segment:
+        return model.tf_model([token_ids, tf.zeros_like(token_ids)], training=False)
+    return model.tf_model(token_ids, training=False)
+
+
+def _label_vocab(model: Union["ABCLabelingModel", "ABCClassificationModel"]) -> tf.Tensor:
+    label_processor = model.label_processor
+    return tf.constant([label_processor.idx2vocab[i] for i in range(label_processor.vocab_size)])
+
+
+def _serve_labeling(tokens: tf.Tensor,
+                    table: tf.lookup.StaticHashTable,
+                    bos_id: int,
+                    eos_id: int,
+                    model: "ABCLabelingModel") -> Dict[str, tf.Tensor]:
+    token_ids, lengths = _encode_tokens(tokens, table, bos_id, eos_id, model)
+    pred = _call_model(token_ids, model)
+    seq_length = tf.shape(token_ids)[1]
+    if model.layer_crf is not None:
+        # +2 for the bos and eos token
+        label_ids = tf_viterbi_decode(pred, model.layer_crf.trans, lengths + 2)
+    else:
+        label_ids = tf.argmax(pred, axis=-1, output_type=tf.int32)
+
+    # drop the bos token and align with the input tokens, the truncated tokens have no labels.
+    max_length = tf.shape(tokens)[1]
+    label_ids = tf.pad(label_ids[:, 1:], [[0, 0], [0, tf.maximum(max_length - seq_length + 1, 0)]])
+    label_ids = label_ids[:, :max_length]
+    kept_lengths = tf.minimum(lengths, seq_length - 1)
+    label_mask = tf.range(max_length)[None, :] < kept_lengths[:, None]
+    return {'labels': tf.where(label_mask, tf.gather(_label_vocab(model), label_ids), '')}
+
+
+def _serve_classification(tokens: tf.Tensor,
+                          table: tf.lookup.StaticHashTable,
+                          bos_id: int,
+                          eos_id: int,
+                          model: "ABCClassificationModel",
+                          multi_label_threshold: float) -> Dict[str, tf.Tensor]:
+    token_ids, _ = _encode_tokens(tokens, table, bos_id, eos_id, model)
+    probabilities = _call_model(token_ids, model)
+    labels = _label_vocab(model)
+    if model.multi_label:
+        selected = probabilities >= multi_label_threshold
+        pred_labels = tf.where(selected, tf.broadcast_to(labels, tf.shape(probabilities)), '')
+    else:
+        pred_labels = tf.gather(labels, tf.argmax(probabilities, axis=-1, output_type=tf.int32))
+    return {'labels': pred_labels, 'probabilities': probabilities}
+
+
+def convert_to_saved_model(model: Union["ABCLabelingModel", "ABCClassificationModel"],
+                           model_path: str,
+                           version: Union[str, int] = None,
+                           *,
+                           multi_label_threshold: float = 0.5) -> str:
+    """
+    Export the model to the SavedModel format for tensorflow serving, with the processors inside the graph.
+
+    The ``serving_default`` signature takes the raw tokens as a string tensor ``tokens`` with shape
+    ``(batch_size, max_length)``, shorter samples are padded with the empty string. The token lookup,
+    the bos and eos tokens, the padding and the label lookup are all graph ops, so the serving process
+    needs neither python preprocessing nor kashgari.
+
+    Outputs of the signature:
+
+    - labeling models: ``labels``, string tensor with shape ``(batch_size, max_length)``,
+      padded with the empty string.
+    - classification models: ``probabilities`` with shape ``(batch_size, num_labels)``, and ``labels``
+      with shape ``(batch_size,)``, or ``(batch_size, num_labels)`` for the multi-label models,
+      where labels under ``multi_label_threshold`` are the empty string.
+
+    Predictions are the same as the ``predict`` method of the model, when the samples are padded to
+    the max length of the batch.
+
+    Args:
+        model: labeling or classification model.
+        model_path: export folder, the model is saved to the version sub-folder.
+        version: model version, default is the current timestamp.
+        multi_label_threshold: threshold of the multi-label classification.
+
+    Returns:
+        path of the exported version folder.
+    """
+    from kashgari.tasks.classification import ABCClassificationModel
+    from kashgari.tasks.labeling import ABCLabelingModel
+
+    if not isinstance(model, (ABCLabelingModel, ABCClassificationModel)):
+        raise ValueError('Only supports the classification model and labeling model.')
+    if version is None:
+        version = round(time.time())
+    export_path = os.path.join(os.path.abspath(model_path), str(version))
+    table, bos_id, eos_id = _build_token_lookup(model.text_processor)
+    input_signature = [tf.TensorSpec(shape=[None, None], dtype=tf.string, name='tokens')]
+
+    # the narrowed model types are bound to new names, closures do not keep the isinstance narrowing.
+    if isinstance(model, ABCClassificationModel):
+        classification_model = model
+
+        @tf.function(input_signature=input_signature)
+        def serve(tokens: tf.Tensor) -> Dict[str, tf.Tensor]:
+            return _serve_classification(tokens, table, bos_id, eos_id, classification_model, multi_label_threshold)
+    else:
+        labeling_model = model
+
+        @tf.function(input_signature=input_signature)
+        def serve(tokens: tf.Tensor) -> Dict[str, tf.Tensor]:
+            return _serve_labeling(tokens, table, bos_id, eos_id, labeling_model)
+
+    module = tf.Module()
+    # keep the references of the model and the lookup table, so they are tracked and saved.
+    module.tf_model = model.tf_model
+    module.table = table
+    module.serve = serve
+    tf.saved_model.save(module, export_path, signatures={'serving_default': module.serve})
+    logger.info(f'Model exported to {export_path}')
+    return export_path
+
+
+if __name__ == "__main__":
+    pass
@@ -7,9 +7,17 @@
 # file: test_corpus.py
 # time: 10:47 上午
 
+import os
+import random
+import tempfile
 import unittest
+
+import pandas as pd
+
 from kashgari.corpus import ChineseDailyNerCorpus
+from kashgari.corpus import JigsawToxicCommentCorpus
 from kashgari.corpus import SMP2018ECDTCorpus
+from kashgari.tokenizers import BertTokenizer
 
 
 class TestChineseDailyNerCorpus(unittest.TestCase):
@@ -46,5 +54,31 @@ class TestSMP2018ECDTCorpus(unittest.TestCase):
         assert len(test_x) > 0
 
 
+class TestJigsawToxicCommentCorpus(unittest.TestCase):
+
+    def test_load_data(self):
+        labels = ['toxic', 'severe_toxic', 'obscene', 'threat', 'insult', 'identity_hate']
+        words = ['Please', 'stop', 'being', 'a', 'penis—', 'and', 'Grow', 'Up', 'Regards-']
+        rows = []
+        for i in range(3000):
+            row = {'id': i, 'comment_text': ' '.join(random.choices(words, k=random.randint(1, 20)))}
+            for label in labels:
+                row[label] = int(random.random() < 0.2)
+            rows.append(row)
+
+        with tempfile.TemporaryDirectory() as folder:
+            csv_path = os.path.join(folder, 'train.csv')
+            pd.DataFrame(rows).to_csv(csv_path, index=False)
+            corpus = JigsawToxicCommentCorpus(csv_path, workers=2, chunk_size=500)
+            train_x, train_y = corpus.load_data('train', shuffle=False)
+            test_x, test_y = corpus.load_data('test', shuffle=False)
+
+        tokenizer = BertTokenizer()
+        assert train_x == [tokenizer.tokenize(rows[i]['comment_text']) for i in corpus.train_ids]
+        assert train_y == [[label for label in labels if rows[i][label] == 1] for i in corpus.train_ids]
+        assert test_x == [tokenizer.tokenize(rows[i]['comment_text']) for i in corpus.test_ids]
+        assert len(train_x) + len(test_x) + len(corpus.load_data('valid')[0]) == len(rows)
+
+
 if __name__ == "__main__":
     pass
@@ -0,0 +1,64 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: test_distribute.py
+# time: 10:48 上午
+
+import unittest
+from typing import List, Tuple
+
+import numpy as np
+
+from kashgari.distribute import get_worker_context, run_local_workers
+from kashgari.generators import CorpusGenerator
+from tests.synthetic_corpus import build_labeling_corpus
+
+
+def train_worker(x: List[List[str]], y: List[List[str]]) -> Tuple[int, List[np.ndarray]]:
+    import tensorflow as tf
+    strategy = tf.distribute.MultiWorkerMirroredStrategy()
+
+    from kashgari.tasks.labeling import BiLSTM_Model
+    num_workers, worker_index = get_worker_context()
+    corpus = CorpusGenerator(x, y)
+    with strategy.scope():
+        model = BiLSTM_Model(sequence_length=30)
+        model.build_model_generator(corpus)
+    model.fit_generator(corpus.shard(num_workers, worker_index), batch_size=16, epochs=1)
+    return worker_index, model.tf_model.get_weights()
+
+
+class TestDistribute(unittest.TestCase):
+
+    def test_shard(self):
+        x, y = build_labeling_corpus(103)
+        corpus = CorpusGenerator(x, y)
+        shards = [corpus.shard(4, index) for index in range(4)]
+        assert [len(shard) for shard in shards] == [25] * 4
+        assert list(shards[1])[:2] == [(x[1], y[1]), (x[5], y[5])]
+
+        # generic shards of any generator
+        generic_shards = [super(CorpusGenerator, corpus).shard(4, index) for index in range(4)]
+        for shard, generic_shard in zip(shards, generic_shards):
+            assert len(shard) == len(generic_shard)
+            assert list(shard) == list(generic_shard)
+            assert len(list(generic_shard.sample())) == len(generic_shard)
+
+        with self.assertRaises(ValueError):
+            corpus.shard(4, 4)
+
+    def test_local_workers(self):
+        assert get_worker_context() == (1, 0)
+        x, y = build_labeling_corpus()
+        results = run_local_workers(train_worker, 2, args=(x, y), timeout=600)
+        assert [index for index, _ in results] == [0, 1]
+        # gradients are all-reduced, so the workers end with the same weights
+        for weight0, weight1 in zip(results[0][1], results[1][1]):
+            np.testing.assert_allclose(weight0, weight1, atol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
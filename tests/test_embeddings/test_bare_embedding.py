@@ -12,6 +12,9 @@ import time
 import random
 import tempfile
 import unittest
+
+import numpy as np
+
 from kashgari.logger import logger
 from kashgari.processors import SequenceProcessor
 from kashgari.corpus import SMP2018ECDTCorpus
@@ -24,8 +27,8 @@ sample_count = 50
 
 class TestBareEmbedding(unittest.TestCase):
 
-    def build_embedding(self):
-        embedding = BareEmbedding()
+    def build_embedding(self, **kwargs):
+        embedding = BareEmbedding(**kwargs)
         return embedding
 
     def test_base_cases(self):
@@ -50,6 +53,63 @@ class TestBareEmbedding(unittest.TestCase):
         embedding2.setup_text_processor(processor)
         assert embedding2.embed(samples).shape == (len(samples), max_len, embedding.embedding_size)
 
+    def test_embed_cache(self):
+        embedding = self.build_embedding()
+        cached_embedding = self.build_embedding(embed_cache_bytes=100 * 1024 * 1024)
+        x, y = SMP2018ECDTCorpus.load_data()
+        processor = SequenceProcessor()
+        processor.build_vocab(x, y)
+        embedding.setup_text_processor(processor)
+        cached_embedding.setup_text_processor(processor)
+        cached_embedding.embed_model.set_weights(embedding.embed_model.get_weights())
+
+        samples = random.sample(x, sample_count)
+        embed_results = embedding.embed(samples)
+
+        cached_results = cached_embedding.embed(samples + samples[:10])
+        assert cached_embedding.embed_cache.stats()['misses'] == len(set(tuple(s) for s in samples))
+        cached_results = cached_embedding.embed(samples)
+        assert cached_embedding.embed_cache.stats()['hits'] == sample_count
+        assert np.allclose(cached_results, embed_results, atol=1e-5)
+
+        tensor = processor.transform(samples, seq_length=embedding.max_position)
+        assert (cached_results[tensor == 0] == 0).all()
+
+        # results of the replaced embed_model are not reused
+        cached_embedding.embed_model = None
+        cached_embedding.build_embedding_model(vocab_size=processor.vocab_size)
+        cached_embedding.embed(samples)
+        assert cached_embedding.embed_cache.stats()['hits'] == 0
+
+    def test_embed_sentences(self):
+        embedding = self.build_embedding()
+        x, y = SMP2018ECDTCorpus.load_data()
+        processor = SequenceProcessor()
+        processor.build_vocab(x, y)
+        embedding.setup_text_processor(processor)
+
+        samples = random.sample(x, sample_count)
+        token_vectors = embedding.embed(samples)
+        mask = (processor.transform(samples, seq_length=embedding.max_position) > 0)[:, :, np.newaxis]
+        expected = {
+            'mean': (token_vectors * mask).sum(axis=1) / mask.sum(axis=1),
+            'max': np.where(mask, token_vectors, -np.inf).max(axis=1),
+            'cls': token_vectors[:, 0]
+        }
+        for pooling, expected_vectors in expected.items():
+            chunks = list(embedding.embed_sentences(iter(samples),
+                                                    pooling=pooling,
+                                                    batch_size=8,
+                                                    chunk_size=20,
+                                                    sort_by_length=True))
+            assert [len(c) for c in chunks] == [20, 20, 10]
+            assert np.allclose(np.concatenate(chunks), expected_vectors, atol=1e-5)
+
+        with tempfile.TemporaryDirectory() as folder:
+            output_path = os.path.join(folder, 'vectors.npy')
+            embedding.embed_sentences_to_file(samples, output_path, chunk_size=20)
+            assert np.allclose(np.load(output_path), expected['mean'], atol=1e-5)
+
     def test_with_model(self):
         x, y = SMP2018ECDTCorpus.load_data('test')
         embedding = self.build_embedding()
@@ -16,12 +16,12 @@ from tests.test_embeddings.test_bare_embedding import TestBareEmbedding
 
 class TestTransferEmbedding(TestBareEmbedding):
 
-    def build_embedding(self):
+    def build_embedding(self, **kwargs):
         bert_path = get_file('bert_sample_model',
                              "http://s3.bmio.net/kashgari/bert_sample_model.tar.bz2",
                              cache_dir=DATA_PATH,
                              untar=True)
-        embedding = BertEmbedding(model_folder=bert_path)
+        embedding = BertEmbedding(model_folder=bert_path, **kwargs)
         return embedding
 
 
@@ -7,24 +7,77 @@
 # file: test_word_embedding.py
 # time: 2:55 下午
 
+import os
+import tempfile
 import unittest
 
+import numpy as np
+
 from tensorflow.keras.utils import get_file
 
 from kashgari.embeddings import WordEmbedding
 from kashgari.macros import DATA_PATH
+from kashgari.tasks.labeling import BiLSTM_Model
 from tests.test_embeddings.test_bare_embedding import TestBareEmbedding
+from tests.test_macros import TestMacros
 
 
 class TestWordEmbedding(TestBareEmbedding):
 
-    def build_embedding(self):
+    def build_embedding(self, **kwargs):
         sample_w2v_path = get_file('sample_w2v.txt',
                                    "http://s3.bmio.net/kashgari/sample_w2v.txt",
                                    cache_dir=DATA_PATH)
-        embedding = WordEmbedding(sample_w2v_path)
+        embedding = WordEmbedding(sample_w2v_path, **kwargs)
         return embedding
 
+    def test_w2v_cache(self):
+        sample_w2v_path = get_file('sample_w2v.txt',
+                                   "http://s3.bmio.net/kashgari/sample_w2v.txt",
+                                   cache_dir=DATA_PATH)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            embedding = WordEmbedding(sample_w2v_path, cache_dir=cache_dir)
+            assert len(os.listdir(cache_dir)) == 1
+
+            cached_embedding = WordEmbedding(sample_w2v_path, cache_dir=cache_dir)
+            assert isinstance(cached_embedding.w2v_matrix, np.memmap)
+            assert cached_embedding.w2v_matrix.dtype == np.float32
+            assert cached_embedding.vocab2idx == embedding.vocab2idx
+            assert (cached_embedding.w2v_matrix == embedding.w2v_matrix).all()
+
+            no_cache_embedding = WordEmbedding(sample_w2v_path, use_cache=False)
+            assert no_cache_embedding.vocab2idx == embedding.vocab2idx
+            assert np.allclose(no_cache_embedding.w2v_matrix[4:], embedding.w2v_matrix[4:])
+
+            # different kwargs use a different cache
+            WordEmbedding(sample_w2v_path, cache_dir=cache_dir, w2v_kwargs={'limit': 100})
+            assert len(os.listdir(cache_dir)) == 2
+
+    def test_prune_vocab(self):
+        sample_w2v_path = get_file('sample_w2v.txt',
+                                   "http://s3.bmio.net/kashgari/sample_w2v.txt",
+                                   cache_dir=DATA_PATH)
+        full_embedding = WordEmbedding(sample_w2v_path)
+        embedding = WordEmbedding(sample_w2v_path, prune_vocab=True, max_vocab_size=500)
+
+        x, y = TestMacros.load_labeling_corpus()
+        model = BiLSTM_Model(embedding)
+        model.fit(x, y, epochs=1)
+
+        assert len(embedding.vocab2idx) <= 500
+        assert embedding.embed_model.get_layer('layer_embedding').input_dim == len(embedding.vocab2idx)
+        assert model.text_processor.vocab2idx == embedding.vocab2idx
+        for token, index in list(embedding.vocab2idx.items())[4:]:
+            assert token in model.text_processor.vocab2idx
+            assert np.allclose(embedding.w2v_matrix[index],
+                               full_embedding.w2v_matrix[full_embedding.vocab2idx[token]])
+
+        with tempfile.TemporaryDirectory() as model_path:
+            model.save(model_path)
+            new_model = BiLSTM_Model.load_model(model_path)
+            assert new_model.embedding.vocab2idx == embedding.vocab2idx
+            assert new_model.predict(x[:10]) == model.predict(x[:10])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -7,10 +7,12 @@
 # file: test_generator.py
 # time: 5:46 下午
 
+import os
+import tempfile
 import unittest
 
-from kashgari.corpus import ChineseDailyNerCorpus
-from kashgari.generators import CorpusGenerator, BatchDataSet
+from kashgari.corpus import ChineseDailyNerCorpus, DataReader
+from kashgari.generators import CorpusGenerator, BatchDataSet, BinaryCorpusGenerator, ConllCorpusGenerator
 from kashgari.processors import SequenceProcessor
 from tests.test_macros import TestMacros
 
@@ -21,6 +23,21 @@ class TestGenerator(unittest.TestCase):
         corpus_gen = CorpusGenerator(x_set, y_set)
         pass
 
+    def test_corpus_generator_sample(self):
+        x_set = list(range(1000))
+        y_set = list(range(1000))
+
+        corpus_gen = CorpusGenerator(x_set, y_set, buffer_size=100, seed=42)
+        sampled = [x for x, _ in corpus_gen.sample()]
+        assert sorted(sampled) == x_set
+        assert sampled != x_set
+
+        corpus_gen2 = CorpusGenerator(x_set, y_set, buffer_size=100, seed=42)
+        assert [x for x, _ in corpus_gen2.sample()] == sampled
+
+        small_gen = CorpusGenerator(x_set[:10], y_set[:10], buffer_size=100)
+        assert sorted(x for x, _ in small_gen.sample()) == x_set[:10]
+
     def test_batch_generator(self):
         x, y = ChineseDailyNerCorpus.load_data('valid')
 
@@ -70,6 +87,161 @@ class TestGenerator(unittest.TestCase):
         for x, y in batch_dataset3.take(1):
             assert x.shape == y.shape == (12, 100)
 
+    def test_bucket_batch_generator(self):
+        x, y = TestMacros.load_labeling_corpus()
+
+        text_processor = SequenceProcessor()
+        label_processor = SequenceProcessor(build_vocab_from_labels=True, min_count=1)
+
+        corpus_gen = CorpusGenerator(x, y)
+
+        text_processor.build_vocab_generator(corpus_gen)
+        label_processor.build_vocab_generator(corpus_gen)
+
+        boundaries = [10, 20, 40]
+        batch_dataset = BatchDataSet(corpus_gen,
+                                     text_processor=text_processor,
+                                     label_processor=label_processor,
+                                     seq_length=60,
+                                     batch_size=12,
+                                     bucket_boundaries=boundaries)
+        sample_count = 0
+        batch_count = 0
+        for x_tensor, y_tensor in batch_dataset:
+            assert x_tensor.shape == y_tensor.shape
+            assert x_tensor.shape[1] <= 60
+            sample_count += len(x_tensor)
+            batch_count += 1
+        assert sample_count == len(corpus_gen)
+        assert batch_count == len(batch_dataset)
+
+        batch_dataset = BatchDataSet(corpus_gen,
+                                     text_processor=text_processor,
+                                     label_processor=label_processor,
+                                     batch_size=12,
+                                     bucket_boundaries=4)
+        assert len(list(batch_dataset.take(5))) == 5
+        assert len(batch_dataset._get_bucket_boundaries()) <= 3
+
+    def test_tf_dataset(self):
+        x, y = TestMacros.load_labeling_corpus()
+
+        text_processor = SequenceProcessor()
+        label_processor = SequenceProcessor(build_vocab_from_labels=True, min_count=1)
+
+        corpus_gen = CorpusGenerator(x, y)
+
+        text_processor.build_vocab_generator(corpus_gen)
+        label_processor.build_vocab_generator(corpus_gen)
+
+        batch_dataset = BatchDataSet(corpus_gen,
+                                     text_processor=text_processor,
+                                     label_processor=label_processor,
+                                     segment=True,
+                                     seq_length=60,
+                                     batch_size=12)
+        tf_dataset = batch_dataset.as_tf_dataset(len(batch_dataset) * 2, num_parallel_calls=4)
+        assert len(list(tf_dataset)) == len(batch_dataset) * 2
+
+        for (token_ids, segment_ids), y_tensor in tf_dataset.take(1):
+            assert token_ids.shape == segment_ids.shape == y_tensor.shape == (12, 60)
+
+        tf_dataset = batch_dataset.as_tf_dataset(3, cache=True)
+        assert len(list(tf_dataset)) == 3
+
+    def test_binary_corpus_generator(self):
+        x, y = TestMacros.load_labeling_corpus()
+
+        text_processor = SequenceProcessor()
+        label_processor = SequenceProcessor(build_vocab_from_labels=True, min_count=1)
+
+        corpus_gen = CorpusGenerator(x, y)
+
+        text_processor.build_vocab_generator(corpus_gen)
+        label_processor.build_vocab_generator(corpus_gen)
+
+        with tempfile.TemporaryDirectory() as corpus_path:
+            binary_gen = BinaryCorpusGenerator.build(corpus_gen,
+                                                     corpus_path,
+                                                     text_processor=text_processor,
+                                                     label_processor=label_processor,
+                                                     chunk_size=100)
+            assert len(binary_gen) == len(corpus_gen)
+            assert len(list(binary_gen.sample())) == len(corpus_gen)
+
+            x_ids = [binary_gen[i][0] for i in range(20)]
+            y_ids = [binary_gen[i][1] for i in range(20)]
+            x_tensor = text_processor.transform(x[:20], seq_length=30)
+            y_tensor = label_processor.transform(y[:20], seq_length=30)
+            assert (x_tensor == text_processor.transform_numerized(x_ids, seq_length=30)).all()
+            assert (y_tensor == label_processor.transform_numerized(y_ids, seq_length=30)).all()
+
+            batch_dataset = BatchDataSet(BinaryCorpusGenerator(corpus_path),
+                                         text_processor=text_processor,
+                                         label_processor=label_processor,
+                                         seq_length=60,
+                                         batch_size=12,
+                                         bucket_boundaries=4)
+            sample_count = 0
+            batch_count = 0
+            for x_tensor, y_tensor in batch_dataset:
+                assert x_tensor.shape == y_tensor.shape
+                sample_count += len(x_tensor)
+                batch_count += 1
+            assert sample_count == len(corpus_gen)
+            assert batch_count == len(batch_dataset)
+
+    def test_conll_corpus_generator(self):
+        x, y = TestMacros.load_labeling_corpus()
+
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, 'corpus.conll')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write('-DOCSTART- O\n\n')
+                for sentence, labels in zip(x, y):
+                    f.write(''.join(f'{token} {label}\n' for token, label in zip(sentence, labels)))
+                    f.write('\n\n')
+            legacy_x, legacy_y = DataReader.read_conll_format_file(file_path)
+            legacy = [(sx, sy) for sx, sy in zip(legacy_x, legacy_y) if sx]
+
+            index_path = os.path.join(folder, 'corpus.npz')
+            conll_gen = ConllCorpusGenerator(file_path, index_path=index_path, seed=42)
+            assert conll_gen.offsets is None
+            assert list(conll_gen) == legacy
+            assert len(conll_gen) == len(legacy)
+            assert conll_gen[5] == legacy[5]
+
+            sampled = list(conll_gen.sample())
+            assert sampled != legacy
+            assert sorted(sampled) == sorted(legacy)
+
+            # index is loaded from the file
+            conll_gen2 = ConllCorpusGenerator(file_path, index_path=index_path, seed=42)
+            assert conll_gen2.offsets is not None
+            assert list(conll_gen2.sample()) == sampled
+
+            buffer_gen = ConllCorpusGenerator(file_path, use_index=False, buffer_size=10)
+            assert sorted(buffer_gen.sample()) == sorted(legacy)
+            assert buffer_gen.offsets is None
+
+            # tab separated, labels in the last column, without trailing blank line
+            tsv_path = os.path.join(folder, 'corpus.tsv')
+            with open(tsv_path, 'w', encoding='utf-8') as f:
+                f.write('a\tNN\tO\nb\tNN\tB-PER\n\nc\tNN\tO')
+            tsv_gen = ConllCorpusGenerator(tsv_path, separator='\t', label_index=2)
+            assert list(tsv_gen) == [(['a', 'b'], ['O', 'B-PER']), (['c'], ['O'])]
+            assert tsv_gen[1] == (['c'], ['O'])
+
+            batch_dataset = BatchDataSet(conll_gen,
+                                         text_processor=SequenceProcessor(),
+                                         label_processor=SequenceProcessor(build_vocab_from_labels=True),
+                                         seq_length=60,
+                                         batch_size=12)
+            batch_dataset.text_processor.build_vocab_generator(conll_gen)
+            batch_dataset.label_processor.build_vocab_generator(conll_gen)
+            for x_tensor, y_tensor in batch_dataset.take(1):
+                assert x_tensor.shape == y_tensor.shape == (12, 60)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -11,8 +11,10 @@ import os
 import tempfile
 import time
 import unittest
+from collections import Counter
 from typing import Type
 
+import numpy as np
 from tensorflow.keras.utils import get_file
 
 from kashgari.embeddings import BertEmbedding
@@ -50,6 +52,16 @@ class TestBiLSTM_Model(unittest.TestCase):
         report = new_model.evaluate(train_x, train_y)
         print(report)
 
+    def test_fast_predict(self):
+        model = self.TASK_MODEL_CLASS()
+        train_x, train_y = TestMacros.load_labeling_corpus()
+        model.fit(train_x, train_y, epochs=self.EPOCH_COUNT)
+
+        fast_y = [model.predict(train_x[i:i + 1]) for i in range(10)] + [model.predict(train_x[:20])]
+        model.fast_predict_max_batch_size = 0
+        keras_y = [model.predict(train_x[i:i + 1]) for i in range(10)] + [model.predict(train_x[:20])]
+        assert fast_y == keras_y
+
     def test_with_word_embedding(self):
         w2v_embedding = WordEmbedding(TestMacros.w2v_path)
         model = self.TASK_MODEL_CLASS(embedding=w2v_embedding, sequence_length=120)
@@ -83,6 +95,71 @@ class TestBiLSTM_Model(unittest.TestCase):
         model.predict(valid_x, debug_info=True)
         model.predict(valid_x, truncating=True, debug_info=True)
 
+    def test_with_bert_feature_cache(self):
+        bert_path = get_file('bert_sample_model',
+                             "http://s3.bmio.net/kashgari/bert_sample_model.tar.bz2",
+                             cache_dir=DATA_PATH,
+                             untar=True)
+        train_x, train_y = TestMacros.load_labeling_corpus()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            embedding = BertEmbedding(model_folder=bert_path, feature_cache_dir=cache_dir)
+            model = self.TASK_MODEL_CLASS(embedding=embedding)
+            model.fit(train_x, train_y, epochs=self.EPOCH_COUNT)
+            assert 0 < len(embedding.feature_cache) <= len(train_x)
+
+            # the second model reuses the cached features
+            embedding = BertEmbedding(model_folder=bert_path, feature_cache_dir=cache_dir)
+            model = self.TASK_MODEL_CLASS(embedding=embedding)
+            model.build_model(train_x, train_y)
+            tensor = model.text_processor.transform(train_x, segment=True, seq_length=model.sequence_length)
+            assert embedding.feature_cache.update(embedding.embed_model, [tensor]) == 0
+            model.fit(train_x, train_y, epochs=self.EPOCH_COUNT)
+            model.predict(train_x)
+
+    def test_extend_vocab(self):
+        train_x, train_y = TestMacros.load_labeling_corpus()
+        # samples without the rarest label
+        label_counter = Counter(label for sample in train_y for label in sample)
+        rare_label = label_counter.most_common()[-1][0]
+        old_x = [x for x, y in zip(train_x, train_y) if rare_label not in y]
+        old_y = [y for y in train_y if rare_label not in y]
+
+        model = self.TASK_MODEL_CLASS(sequence_length=60)
+        model.fit(old_x, old_y, epochs=self.EPOCH_COUNT)
+        model_path = os.path.join(tempfile.gettempdir(), str(time.time()))
+        model.save(model_path)
+
+        new_model = self.TASK_MODEL_CLASS.load_model(model_path)
+        old_vocab = dict(new_model.text_processor.vocab2idx)
+        tensor = new_model.text_processor.transform(old_x[:20], seq_length=60)
+        old_output = new_model.tf_model.predict(tensor)
+
+        new_tokens, new_labels = new_model.extend_vocab(train_x, train_y)
+        assert new_labels == [rare_label]
+        assert list(new_model.text_processor.vocab2idx.items())[:len(old_vocab)] == list(old_vocab.items())
+        assert new_model.text_processor.vocab_size == len(old_vocab) + len(new_tokens)
+
+        # existing rows of the grown weights are kept
+        new_output = new_model.tf_model.predict(tensor)
+        assert new_output.shape[-1] == old_output.shape[-1] + 1
+        if new_model.layer_crf is not None:
+            np.testing.assert_allclose(new_output[..., :-1], old_output, atol=1e-5)
+        else:
+            # softmax of the existing labels is rescaled by the new label
+            kept_output = new_output[..., :-1] / new_output[..., :-1].sum(axis=-1, keepdims=True)
+            np.testing.assert_allclose(kept_output, old_output, atol=1e-5)
+
+        new_model.fit(train_x, train_y, epochs=self.EPOCH_COUNT)
+        new_model.predict(train_x[:20])
+
+        # custom metrics are kept, default losses of the old layers are bound to the new layers
+        model.compile_model(metrics=['sparse_categorical_accuracy'])
+        model.extend_vocab(train_x, train_y)
+        if model.layer_crf is not None:
+            assert model.tf_model.loss.__self__ is model.layer_crf
+        history = model.fit(train_x, train_y, epochs=self.EPOCH_COUNT)
+        assert 'sparse_categorical_accuracy' in history.history
+
 
 if __name__ == '__main__':
     unittest.main()
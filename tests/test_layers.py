@@ -0,0 +1,50 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: test_layers.py
+# time: 4:12 下午
+
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+import kashgari
+from kashgari.layers import L
+
+
+class TestLayers(unittest.TestCase):
+
+    def test_bahdanau_attention_keys(self):
+        attention = L.BahdanauAttention(16)
+        query = tf.random.normal((4, 32))
+        values = tf.random.normal((4, 10, 32))
+
+        context, weights = attention(query, values)
+        keys = attention.precompute_keys(values)
+        assert keys.shape == (4, 10, 16)
+        cached_context, cached_weights = attention(query, values, keys=keys)
+        assert np.allclose(context, cached_context)
+        assert np.allclose(weights, cached_weights)
+
+    def test_bahdanau_attention_serialize(self):
+        query = L.Input(shape=(32,))
+        values = L.Input(shape=(10, 32))
+        context, weights = L.BahdanauAttention(16, name='attention')(query, values)
+        model = tf.keras.Model([query, values], [context, weights])
+
+        with kashgari.utils.custom_object_scope():
+            new_model = tf.keras.models.model_from_json(model.to_json())
+        new_model.set_weights(model.get_weights())
+        assert new_model.get_layer('attention').units == 16
+
+        inputs = [np.random.randn(4, 32), np.random.randn(4, 10, 32)]
+        for output, new_output in zip(model.predict(inputs), new_model.predict(inputs)):
+            assert np.allclose(output, new_output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -51,6 +51,19 @@ class TestClassificationProcessor(unittest.TestCase):
         for sample_x1, sample_x2 in zip(x1s, x2s):
             assert sorted(sample_x1) == sorted(sample_x2)
 
+    def test_extend_vocab(self):
+        x_set, y_set = TestMacros.load_classification_corpus()
+        last_label = sorted(set(y_set))[-1]
+        old_x = [x for x, y in zip(x_set, y_set) if y != last_label]
+        old_y = [y for y in y_set if y != last_label]
+
+        processor = ClassificationProcessor()
+        processor.build_vocab(old_x, old_y)
+        old_vocab = dict(processor.vocab2idx)
+        assert processor.extend_vocab_generator(CorpusGenerator(x_set, y_set)) == [last_label]
+        assert list(processor.vocab2idx.items())[:len(old_vocab)] == list(old_vocab.items())
+        assert processor.inverse_transform(processor.transform([last_label])) == [last_label]
+
 
 if __name__ == "__main__":
     pass
@@ -0,0 +1,55 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: test_corpus_statistics.py
+# time: 5:10 下午
+
+import unittest
+
+from kashgari.generators import CorpusGenerator
+from kashgari.processors import ClassificationProcessor
+from kashgari.processors import CorpusStatistics
+from kashgari.processors import SequenceProcessor
+from tests.test_macros import TestMacros
+
+
+class TestCorpusStatistics(unittest.TestCase):
+    def test_labeling_statistics(self):
+        x_set, y_set = TestMacros.load_labeling_corpus()
+        corpus_gen = CorpusGenerator(x_set, y_set)
+        stats = CorpusStatistics.from_generator(corpus_gen)
+        assert stats.sample_count == len(x_set)
+
+        text_processor = SequenceProcessor()
+        text_processor.build_vocab_generator(corpus_gen)
+        text_processor2 = SequenceProcessor()
+        text_processor2.build_vocab_from_statistics(stats)
+        assert list(text_processor.vocab2idx.items()) == list(text_processor2.vocab2idx.items())
+
+        label_processor = SequenceProcessor(build_vocab_from_labels=True, min_count=1)
+        label_processor.build_vocab_generator(corpus_gen)
+        label_processor2 = SequenceProcessor(build_vocab_from_labels=True, min_count=1)
+        label_processor2.build_vocab_from_statistics(stats)
+        assert label_processor.vocab2idx == label_processor2.vocab2idx
+
+        seq_lens = sorted(len(x) for x in x_set)
+        assert stats.get_seq_length(cover_rate=1.0) == seq_lens[-1]
+        assert stats.get_seq_length(cover_rate=0.95) == seq_lens[int(0.95 * len(seq_lens))]
+
+    def test_classification_statistics(self):
+        x_set, y_set = TestMacros.load_classification_corpus()
+        corpus_gen = CorpusGenerator(x_set, y_set)
+        stats = CorpusStatistics.from_generator(corpus_gen, workers=2, chunk_size=100)
+
+        processor = ClassificationProcessor()
+        processor.build_vocab_generator(corpus_gen)
+        processor2 = ClassificationProcessor()
+        processor2.build_vocab_from_statistics(stats)
+        assert processor.vocab2idx == processor2.vocab2idx
+
+
+if __name__ == "__main__":
+    pass
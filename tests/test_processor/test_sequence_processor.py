@@ -12,6 +12,7 @@ import unittest
 from tests.test_macros import TestMacros
 
 from kashgari.utils import load_data_object
+from kashgari.generators import CorpusGenerator
 from kashgari.processors import SequenceProcessor
 
 
@@ -55,6 +56,59 @@ class TestSequenceProcessor(unittest.TestCase):
         text_idx3 = text_processor.transform(samples, seq_length=20)
         assert [len(i) for i in text_idx3] == [20] * len(text_idx3)
 
+    def test_transform_cache(self):
+        x_set, y_set = TestMacros.load_labeling_corpus()
+        x_samples = random.sample(x_set, 20) * 3
+        text_processor = SequenceProcessor(min_count=1)
+        text_processor.build_vocab(x_set, y_set)
+
+        cached_processor = SequenceProcessor(min_count=1, cache_size=10)
+        cached_processor.build_vocab(x_set, y_set)
+
+        for seq_length in [None, 5, 30]:
+            text_idx = text_processor.transform(x_samples, seq_length=seq_length)
+            cached_idx = cached_processor.transform(x_samples, seq_length=seq_length)
+            assert text_idx.dtype == cached_idx.dtype
+            assert (text_idx == cached_idx).all()
+        assert len(cached_processor._transform_cache) == 10
+
+    def test_build_vocab_parallel(self):
+        x_set, y_set = TestMacros.load_labeling_corpus()
+        corpus_gen = CorpusGenerator(x_set, y_set)
+
+        text_processor = SequenceProcessor(min_count=1)
+        text_processor.build_vocab_generator(corpus_gen)
+
+        parallel_processor = SequenceProcessor(min_count=1)
+        parallel_processor.build_vocab_generator(corpus_gen, workers=2, chunk_size=100)
+        assert list(text_processor.vocab2idx.items()) == list(parallel_processor.vocab2idx.items())
+
+        top_k_processor = SequenceProcessor(min_count=1, max_vocab_size=100)
+        top_k_processor.build_vocab_generator(corpus_gen)
+        assert top_k_processor.vocab_size == 100
+        assert list(top_k_processor.vocab2idx.items()) == list(text_processor.vocab2idx.items())[:100]
+
+    def test_extend_vocab(self):
+        x_set, y_set = TestMacros.load_labeling_corpus()
+        processor = SequenceProcessor(min_count=1)
+        processor.build_vocab(x_set[:100], y_set[:100])
+        old_vocab = dict(processor.vocab2idx)
+
+        new_tokens = processor.extend_vocab_generator(CorpusGenerator(x_set, y_set))
+        assert new_tokens and not set(new_tokens) & set(old_vocab)
+        assert list(processor.vocab2idx.items())[:len(old_vocab)] == list(old_vocab.items())
+        assert processor.vocab_size == len(old_vocab) + len(new_tokens)
+        assert processor.idx2vocab[processor.vocab_size - 1] == new_tokens[-1]
+        assert processor.extend_vocab_generator(CorpusGenerator(x_set, y_set)) == []
+
+        label_processor = SequenceProcessor(build_in_vocab='labeling',
+                                            build_vocab_from_labels=True,
+                                            min_count=1)
+        label_processor = load_data_object(label_processor.to_dict())
+        assert label_processor.extend_vocab_generator(CorpusGenerator(x_set, y_set)) == \
+            list(label_processor.vocab2idx)
+        assert set(label_processor.vocab2idx) == set(label for sample in y_set for label in sample) | {'[PAD]'}
+
 
 if __name__ == "__main__":
     pass
@@ -0,0 +1,65 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: test_saved_model.py
+# time: 11:02 上午
+
+import tempfile
+import unittest
+from typing import List
+
+import tensorflow as tf
+
+from kashgari.tasks.classification import BiLSTM_Model as BiLSTM_Classification_Model
+from kashgari.tasks.labeling import BiLSTM_CRF_Model, BiLSTM_Model
+from kashgari.utils import convert_to_saved_model
+from tests.synthetic_corpus import build_labeling_corpus
+
+
+def serve(export_path: str, x: List[List[str]]) -> List:
+    serving_fn = tf.saved_model.load(export_path).signatures['serving_default']
+    max_length = max(len(sample) for sample in x)
+    tokens = tf.constant([sample + [''] * (max_length - len(sample)) for sample in x])
+    labels = serving_fn(tokens=tokens)['labels'].numpy()
+    if labels.ndim == 1:
+        return [label.decode('utf-8') for label in labels]
+    return [[label.decode('utf-8') for label in sample if label] for sample in labels]
+
+
+class TestSavedModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.train_x, cls.train_y = build_labeling_corpus()
+        # out of vocab token
+        cls.train_x[0].append('<oov>')
+        cls.train_y[0].append('O')
+
+    def test_labeling_model(self):
+        for model_class in [BiLSTM_Model, BiLSTM_CRF_Model]:
+            model = model_class()
+            model.fit(self.train_x, self.train_y, epochs=2)
+            export_path = convert_to_saved_model(model, tempfile.mkdtemp(), version=1)
+            assert export_path.endswith('1')
+            assert serve(export_path, self.train_x[:20]) == model.predict(self.train_x[:20])
+
+    def test_classification_model(self):
+        y = [sample[0] for sample in self.train_y]
+        model = BiLSTM_Classification_Model()
+        model.fit(self.train_x, y, epochs=2)
+        export_path = convert_to_saved_model(model, tempfile.mkdtemp())
+        assert serve(export_path, self.train_x[:20]) == model.predict(self.train_x[:20])
+
+        y = [sample[:2] for sample in self.train_y]
+        model = BiLSTM_Classification_Model(multi_label=True)
+        model.fit(self.train_x, y, epochs=2)
+        export_path = convert_to_saved_model(model, tempfile.mkdtemp())
+        assert [sorted(i) for i in serve(export_path, self.train_x[:20])] == \
+               [sorted(i) for i in model.predict(self.train_x[:20])]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,17 +24,25 @@ class TestSeq2Seq(unittest.TestCase):
                           encoder_seq_length=64,
                           decoder_seq_length=64)
         seq2seq.fit(x, y, epochs=1)
-        res, att = seq2seq.predict(x)
+        res, att = seq2seq.predict(x, return_attention=True)
+        assert att.shape == (len(x), 64, 64)
 
         model_path = os.path.join(tempfile.gettempdir(), str(time.time()))
         seq2seq.save(model_path)
 
         s2 = Seq2Seq.load_model(model_path)
-        res2, att2 = s2.predict(x)
+        res2, att2 = s2.predict(x, return_attention=True)
 
         assert res2 == res
         assert (att2 == att).all()
 
+        res3, att3 = s2.predict(x, batch_size=7)
+        assert res3 == res
+        assert att3 is None
+
+        beam_res, _ = s2.predict(x[:20], beam_width=3, length_penalty=0.6)
+        assert len(beam_res) == 20
+
 
 if __name__ == '__main__':
     unittest.main()
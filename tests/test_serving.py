@@ -0,0 +1,71 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: test_serving.py
+# time: 5:52 下午
+
+import asyncio
+import unittest
+
+from kashgari.serving import MicroBatchServer, LocalClient
+from kashgari.tasks.classification import BiLSTM_Model
+from kashgari.tasks.labeling import BiGRU_Model
+from tests.test_macros import TestMacros
+
+
+class TestServing(unittest.TestCase):
+
+    def test_classification_serving(self):
+        x, y = TestMacros.load_classification_corpus()
+        model = BiLSTM_Model()
+        model.fit(x, y, epochs=1)
+
+        server = MicroBatchServer(model, max_batch_size=16, max_wait_time=0.01)
+        client = LocalClient(server)
+        results = client.predict(x[:100], concurrency=50)
+        assert results == model.predict(x[:100])
+
+        stats = server.stats.to_dict()
+        assert stats['request_count'] == 100
+        assert stats['error_count'] == 0
+        assert 1 < stats['average_batch_size'] <= 16
+        assert stats['p99_latency'] >= stats['p50_latency'] > 0
+
+    def test_labeling_serving(self):
+        x, y = TestMacros.load_labeling_corpus()
+        model = BiGRU_Model()
+        model.fit(x, y, epochs=1)
+
+        client = LocalClient(MicroBatchServer(model, method='predict_entities', max_batch_size=32))
+        results = client.predict(x[:50])
+        assert results == model.predict_entities(x[:50])
+
+    def test_server_errors(self):
+        x, y = TestMacros.load_classification_corpus()
+        model = BiLSTM_Model()
+        model.fit(x, y, epochs=1)
+
+        with self.assertRaises(ValueError):
+            MicroBatchServer(model, method='not_exists')
+
+        # batch_size is set by the server, duplicated argument fails the batch
+        server = MicroBatchServer(model, predict_kwargs={'batch_size': 1})
+
+        async def run() -> None:
+            with self.assertRaises(RuntimeError):
+                await server.predict(x[0])
+            async with server:
+                with self.assertRaises(TypeError):
+                    await server.predict(x[0])
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(run())
+        loop.close()
+        assert server.stats.error_count == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
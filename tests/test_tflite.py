@@ -0,0 +1,62 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: test_tflite.py
+# time: 3:40 下午
+
+import tempfile
+import unittest
+
+from kashgari.generators import CorpusGenerator
+from kashgari.tasks.classification import BiLSTM_Model as BiLSTM_Classification_Model
+from kashgari.tasks.labeling import BiLSTM_CRF_Model, BiLSTM_Model
+from kashgari.tflite import TFLitePredictor, compare_with_model, export_tflite
+from tests.synthetic_corpus import build_labeling_corpus
+
+
+class TestTFLite(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.train_x, cls.train_y = build_labeling_corpus()
+
+    def _check_model(self, model, x, y) -> None:
+        model.fit(x, y, epochs=5, batch_size=32)
+
+        # float32 model predicts the same as the keras model
+        predictor = TFLitePredictor(export_tflite(model, tempfile.mkdtemp(), quantization='float32'))
+        assert predictor.predict(x[:20]) == model.predict(x[:20])
+
+        for quantization in ['float16', 'dynamic']:
+            predictor = TFLitePredictor(export_tflite(model, tempfile.mkdtemp(), quantization=quantization))
+            report = compare_with_model(model, predictor, x[:20], y[:20])
+            assert report['agreement'] > 0.9
+            assert report['tflite_size_mb'] < report['model_size_mb']
+
+        predictor = TFLitePredictor(export_tflite(model, tempfile.mkdtemp(), quantization='int8',
+                                                  calibration_gen=CorpusGenerator(x, y),
+                                                  calibration_samples=50))
+        assert len(predictor.predict(x[:5])) == 5
+
+    def test_labeling_model(self):
+        for model_class in [BiLSTM_Model, BiLSTM_CRF_Model]:
+            self._check_model(model_class(), self.train_x, self.train_y)
+
+    def test_classification_model(self):
+        y = [sample[0] for sample in self.train_y]
+        self._check_model(BiLSTM_Classification_Model(), self.train_x, y)
+
+    def test_export_errors(self):
+        model = BiLSTM_Model()
+        model.build_model(self.train_x, self.train_y)
+        with self.assertRaises(ValueError):
+            export_tflite(model, tempfile.mkdtemp(), quantization='int4')
+        with self.assertRaises(ValueError):
+            export_tflite(model, tempfile.mkdtemp(), quantization='int8')
+
+
+if __name__ == "__main__":
+    unittest.main()
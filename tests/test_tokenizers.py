@@ -0,0 +1,49 @@
+# encoding: utf-8
+
+# author: BrikerMan
+# contact: eliyar917@gmail.com
+# blog: https://eliyar.biz
+
+# file: test_tokenizers.py
+# time: 5:26 下午
+
+import unittest
+
+from kashgari.tokenizers import BertTokenizer
+
+
+class TestBertTokenizer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        tokens = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', 'un', '##aff', '##able', 'jim', 'hen', '##son',
+                  'was', 'a', 'puppet', '##eer', '.', '中', '##国']
+        cls.token_dict = dict((token, index) for index, token in enumerate(tokens))
+
+    def test_tokenize(self):
+        tokenizer = BertTokenizer(token_dict=self.token_dict)
+        assert tokenizer.tokenize('unaffable') == ['un', '##aff', '##able']
+        assert tokenizer.tokenize('Jim Henson was a puppeteer.') == ['jim', 'hen', '##son', 'was',
+                                                                     'a', 'puppet', '##eer', '.']
+        # unknown characters are kept as single character pieces
+        assert tokenizer.tokenize('unxable') == ['un', '##x', '##able']
+        # cjk characters and punctuations are split, accents are removed, control characters are dropped
+        assert tokenizer.tokenize('中国,Ünaffable\x00\t') == ['中', '国', ',', 'un', '##aff', '##able']
+
+        cased_tokenizer = BertTokenizer(token_dict=self.token_dict, cased=True)
+        assert cased_tokenizer.tokenize('Jim') == ['J', '##i', '##m']
+
+        assert BertTokenizer().tokenize('Jim Henson, 中国') == ['jim', 'henson', ',', '中', '国']
+
+    def test_tokenize_batch(self):
+        tokenizer = BertTokenizer(token_dict=self.token_dict)
+        texts = ['Jim Henson was a puppeteer.', 'unaffable', '', 'unaffable jim']
+        assert tokenizer.tokenize_batch(texts) == [tokenizer.tokenize(text) for text in texts]
+
+        texts = texts * 100
+        assert tokenizer.tokenize_batch(texts, workers=2, chunk_size=30) == [tokenizer.tokenize(text)
+                                                                             for text in texts]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,10 +7,14 @@
 # file: test_utils.py
 # time: 10:48 上午
 
+import itertools
 import unittest
 import numpy as np
 from kashgari.utils import unison_shuffled_copies
 from kashgari.utils import get_list_subset
+from kashgari.utils import viterbi_decode
+from kashgari.utils.crf import tf_viterbi_decode
+from kashgari.utils import LRUCache
 
 
 class TestUtils(unittest.TestCase):
@@ -28,6 +32,59 @@ class TestUtils(unittest.TestCase):
         subset = get_list_subset(x, list(range(10, 20)))
         assert subset == [10, 11, 12, 13, 14, 15, 16, 17, 18, 19]
 
+    def test_viterbi_decode(self):
+        emissions = np.random.randn(16, 6, 3)
+        transitions = np.random.randn(3, 3)
+        lengths = np.random.randint(0, 6, size=(16,))
+        emissions[:, 5:] = -np.inf
+
+        tags = viterbi_decode(emissions, transitions, lengths)
+        assert tags.shape == (16, 6)
+        for index, length in enumerate(lengths):
+            best_path, best_score = [], -np.inf
+            for path in itertools.product(range(3), repeat=length):
+                score = sum(emissions[index, t, tag] for t, tag in enumerate(path))
+                score += sum(transitions[i, j] for i, j in zip(path[:-1], path[1:]))
+                if score > best_score:
+                    best_path, best_score = list(path), score
+            assert tags[index, :length].tolist() == best_path
+            assert (tags[index, length:] == 0).all()
+
+        default_lengths_tags = viterbi_decode(emissions, transitions)
+        assert (default_lengths_tags[:, :5] == viterbi_decode(emissions, transitions, [5] * 16)[:, :5]).all()
+
+    def test_tf_viterbi_decode(self):
+        for seq_length in [1, 2, 6]:
+            emissions = np.random.randn(16, seq_length, 3).astype(np.float32)
+            transitions = np.random.randn(3, 3).astype(np.float32)
+            lengths = np.random.randint(0, seq_length + 1, size=(16,))
+            emissions[:, 5:] = -np.inf
+            assert (tf_viterbi_decode(emissions, transitions, lengths).numpy()
+                    == viterbi_decode(emissions, transitions, lengths)).all()
+
+    def test_lru_cache(self):
+        cache = LRUCache(max_bytes=3 * 80)
+        for i in range(3):
+            cache.put(i, np.full(10, i, dtype=np.float64))
+        assert cache.get(0)[0] == 0
+        # 1 is the least recently used
+        cache.put(3, np.zeros(10))
+        assert 1 not in cache
+        assert cache.get(1) is None
+        assert len(cache) == 3
+        # too large to cache
+        cache.put(4, np.zeros(100))
+        assert 4 not in cache
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['evictions'] == 1
+        assert stats['bytes'] == 240
+
+        cache.clear()
+        assert len(cache) == 0 and cache.stats()['bytes'] == 0
+
 
 if __name__ == "__main__":
     pass